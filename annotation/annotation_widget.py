@@ -1,3 +1,4 @@
+import os
 from datetime import datetime
 from pathlib import Path
 
@@ -11,14 +12,17 @@ from annotation.annotation_ensure_message_box import AnnotationEnsureMessageBox
 from annotation.annotations_list_widget import AnnotationListWidget
 from annotation.canvas_widget import InteractiveCanvas, DrawingStatus
 from annotation.image_list_widget import ImageListWidget
+from annotation.image_prefetcher import ImagePrefetcher
 from annotation.item_property_widget import RectItemPropertyWidget
 from annotation.labels_settings_widget import LabelSettingsWidget
+from annotation.semi_annotation_thread import BatchAnnotationThread, result_class_ids, result_to_yolo_lines
 from annotation.semi_annotation_widget import SemiAutomaticAnnotationEnsureMessageBox, ModelPredict
 from annotation.shape import ShapeType, ShapeItem
 from annotation.types import AnnotationStatus
 from common.component.custom_icon import CustomFluentIcon
 from common.component.fill_tool_button import FillToolButton
 from common.component.model_type_widget import ModelType
+from common.component.progress_message_box import ProgressMessageBox
 from common.core.content_widget_base import ContentWidgetBase
 from common.core.window_manager import window_manager
 from common.database.annotation_task_helper import db_update_annotation_dir_path
@@ -75,6 +79,7 @@ class AnnotationWidget(ContentWidgetBase):
 
         self.cb_label = AnnotationCommandBar(self)
         self.canvas = InteractiveCanvas()
+        self.image_prefetcher = ImagePrefetcher()
 
         self.btn_item_property = FillToolButton(CustomFluentIcon.EXPAND_RIGHT)
         self.btn_item_property.set_border_radius(0)
@@ -104,6 +109,8 @@ class AnnotationWidget(ContentWidgetBase):
         self.annotation_task_id = ""
         self.model_type = ModelType.DETECT
         self.last_selected_label = ""
+        self._batch_annotation_thread: BatchAnnotationThread | None = None
+        self._message_box: ProgressMessageBox | None = None
 
     def connect_signals_and_slots(self):
         self.btn_item_property.clicked.connect(self.on_btn_item_clicked)
@@ -124,6 +131,7 @@ class AnnotationWidget(ContentWidgetBase):
 
         self.canvas.is_drawing_changed.connect(self.on_is_drawing_changed)
         self.canvas.draw_finished.connect(self.on_draw_finished)
+        self.canvas.shapes_loaded.connect(self.on_shapes_loaded)
         self.canvas.shape_item_selected_changed.connect(self.on_shape_item_selected_changed)
         self.canvas.shape_item_geometry_changed.connect(self.on_shape_item_geometry_changed)
         self.canvas.delete_shape_item_clicked.connect(self.on_canvas_item_deleted)
@@ -254,7 +262,7 @@ class AnnotationWidget(ContentWidgetBase):
 
     def check_and_change_labeled_status(self):
         is_saved_annotation = False
-        shape_num = len(self.canvas.get_shape_items()) - 1
+        shape_num = self.canvas.get_shape_item_count()
         image_path = Path(self.label_property_widget.image_list_widget.get_current_image_labeled()[0])
         annotation_path = self.annotation_dir_path / (image_path.stem + ".txt")
         if annotation_path.exists():
@@ -279,42 +287,95 @@ class AnnotationWidget(ContentWidgetBase):
                     parent=window_manager.find_window("main_widget")
                 )
                 return
+            if self.model_type == ModelType.CLASSIFY:
+                InfoBar.error(
+                    title="",
+                    content=self.tr("Semi-automatic annotation does not support classify task"),
+                    duration=2000,
+                    position=InfoBarPosition.TOP_RIGHT,
+                    parent=window_manager.find_window("main_widget")
+                )
+                return
+            if cus_message_box.is_batch():
+                self.batch_semi_automatic_annotation(model_path, cus_message_box.get_batch_size())
+                return
             predictor = ModelPredict(self)
             image_path = Path(self.label_property_widget.image_list_widget.get_current_image_labeled()[0])
             result = predictor.predict(model_path, image_path)
             annotation_path = self.annotation_dir_path / (image_path.stem + ".txt")
-            annotations = []
-            if self.model_type == ModelType.DETECT:
-                boxes = result.boxes.data.cpu().tolist()
-                for box in boxes:
-                    x1, y1, x2, y2, conf, class_id = box
-                    labels = list(self.labels_color.keys())
-                    if class_id >= len(labels):
-                        InfoBar.error(
-                            title='',
-                            content=self.tr("Labels error, please set enough label firstly"),
-                            orient=Qt.Orientation.Vertical,
-                            isClosable=True,
-                            position=InfoBarPosition.TOP_RIGHT,
-                            duration=-1,
-                            parent=window_manager.find_window("main_widget")
-                        )
-                        return
-                    pix = self.canvas.get_background_pix()
-                    w, h = pix.width(), pix.height()
-                    x_center = (x1 + x2) / 2
-                    y_center = (y1 + y2) / 2
-                    width = x2 - x1
-                    height = y2 - y1
-                    annotation = f"{class_id} {x_center / w:.4f} {y_center / h:.4f} {width / w:.4f} {height / h:.4f}\n"
-                    annotations.append(annotation)
-            else:
-                raise NotImplementedError("semi-automatic annotation only support detection task")
+            if any(class_id >= len(self.labels_color) for class_id in result_class_ids(result, self.model_type)):
+                self._show_labels_error()
+                return
+            annotations = result_to_yolo_lines(result, self.model_type)
             with open(annotation_path, "w", encoding="utf8") as f:
                 f.writelines(annotations)
             self.label_property_widget.image_list_widget.set_current_image_labeled(True)
             self.set_history_image_and_annotations(image_path)
 
+    def _show_labels_error(self):
+        InfoBar.error(
+            title='',
+            content=self.tr("Labels error, please set enough label firstly"),
+            orient=Qt.Orientation.Vertical,
+            isClosable=True,
+            position=InfoBarPosition.TOP_RIGHT,
+            duration=-1,
+            parent=window_manager.find_window("main_widget")
+        )
+
+    def batch_semi_automatic_annotation(self, model_path: Path, batch_size: int):
+        if not self.ensure_annotation_dir():
+            return
+        self.update_label_file()
+        image_paths = self.label_property_widget.image_list_widget.get_unlabeled_image_paths()
+        if not image_paths:
+            return
+        self._batch_annotation_thread = BatchAnnotationThread(model_path, self.model_type, image_paths,
+                                                              self.annotation_dir_path, len(self.labels_color),
+                                                              batch_size)
+        self._batch_annotation_thread.annotation_progress_changed.connect(self._on_batch_annotation_progress)
+        self._batch_annotation_thread.annotation_failed.connect(self._on_batch_annotation_failed)
+        self._batch_annotation_thread.annotation_skipped.connect(self._on_batch_annotation_skipped)
+        self._batch_annotation_thread.annotation_finished.connect(self._on_batch_annotation_finished)
+        self._message_box = ProgressMessageBox(parent=window_manager.find_window("main_widget"))
+        self._message_box.set_max_value(len(image_paths))
+        self._message_box.set_cancelable(True)
+        self._message_box.cancel_clicked.connect(self._batch_annotation_thread.requestInterruption)
+        self._batch_annotation_thread.start()
+        self._message_box.exec()
+
+    def _on_batch_annotation_progress(self, finished: int, total: int):
+        self._message_box.set_value(finished)
+
+    def _on_batch_annotation_failed(self, err_msg: str):
+        self._message_box.set_error(True)
+        InfoBar.error(
+            title="",
+            content=err_msg,
+            duration=-1,
+            position=InfoBarPosition.TOP_RIGHT,
+            parent=window_manager.find_window("main_widget")
+        )
+
+    def _on_batch_annotation_skipped(self, skipped: int):
+        InfoBar.warning(
+            title="",
+            content=self.tr("{} images skipped, the predicted class exceeds the labels, please set enough label "
+                            "firstly").format(skipped),
+            duration=-1,
+            position=InfoBarPosition.TOP_RIGHT,
+            parent=window_manager.find_window("main_widget")
+        )
+
+    def _on_batch_annotation_finished(self, labeled_paths: list):
+        self._message_box.close()
+        self.label_property_widget.image_list_widget.set_images_labeled(labeled_paths)
+        # 所有图片处理完后只更新一次标注进度
+        self.update_task_labeled_status()
+        current_image_path = self.label_property_widget.image_list_widget.get_current_image_labeled()[0]
+        if current_image_path:
+            self.set_history_image_and_annotations(Path(current_image_path))
+
     def on_draw_finished(self, shape_item: ShapeItem):
         label = ""
         if not shape_item.get_is_drawing_history():
@@ -334,11 +395,11 @@ class AnnotationWidget(ContentWidgetBase):
                         duration=-1,
                         parent=window_manager.find_window("main_widget")
                     )
-                    self.canvas.scene.removeItem(shape_item)
+                    self.canvas.delete_shape_item(shape_item.get_id())
                     return
             # 模态框点击取消
             else:
-                self.canvas.scene.removeItem(shape_item)
+                self.canvas.delete_shape_item(shape_item.get_id())
                 return
         else:
             label = shape_item.get_annotation()
@@ -353,6 +414,15 @@ class AnnotationWidget(ContentWidgetBase):
         self.canvas.scene.clearSelection()
         self.check_and_change_labeled_status()
 
+    def on_shapes_loaded(self, shape_items: list[ShapeItem]):
+        """加载历史标注，一次性添加到标注列表，最后只检查一次标注状态"""
+        annotations = []
+        for shape_item in shape_items:
+            label = shape_item.get_annotation()
+            annotations.append((shape_item.get_id(), label, self.labels_color[label]))
+        self.label_property_widget.annotation_widget.add_annotations(annotations)
+        self.check_and_change_labeled_status()
+
     def update_item_property(self, item_ids: list[str]):
         if len(item_ids) > 0:
             item_id = item_ids[0]
@@ -404,15 +474,11 @@ class AnnotationWidget(ContentWidgetBase):
         if not self.annotation_dir_path:
             return
         annotation_path = self.annotation_dir_path / (image_path.stem + ".txt")
-        annotations = []
-        if annotation_path.exists():
-            with annotation_path.open("r") as f:
-                for line in f.readlines():
-                    annotation_data = line.strip().split(" ")
-                    annotation = [float(x) for x in annotation_data]
-                    annotations.append(annotation)
+        image, annotations = self.image_prefetcher.get(image_path, annotation_path)
         self.label_property_widget.annotation_widget.clear()
-        self.canvas.set_image_and_draw_annotations(image_path, annotations, self.model_type, self.labels_color)
+        self.canvas.set_image_and_draw_annotations(image, annotations, self.model_type, self.labels_color)
+        self.image_prefetcher.prefetch(self.label_property_widget.image_list_widget.get_prefetch_image_paths(),
+                                       self.annotation_dir_path)
 
     def on_image_item_changed(self, image_path: str | Path):
         if isinstance(image_path, str):
@@ -497,6 +563,7 @@ class AnnotationWidget(ContentWidgetBase):
             self.cb_label.action_next_image.setEnabled(False)
         elif image_path.is_dir():
             self.image_dir_path = image_path
+            self.image_prefetcher.clear()
             self.label_property_widget.label_widget.clear()
             self.canvas.clear()
             self.label_property_widget.annotation_widget.clear()
@@ -506,10 +573,10 @@ class AnnotationWidget(ContentWidgetBase):
                 labels = open(label_file_path).read().splitlines()
                 self.labels_color = {label: generate_random_color() for label in labels}
                 self.label_property_widget.label_widget.set_labels(self.labels_color)
-            annotation_list = []
+            annotation_list = set()
             if self.annotation_dir_path and self.annotation_dir_path.exists():
-                for annotation in self.annotation_dir_path.iterdir():
-                    annotation_list.append(annotation.stem)
+                for annotation in os.scandir(self.annotation_dir_path):
+                    annotation_list.add(annotation.name.rsplit(".", 1)[0])
             image_path_list = []
             for image_path in image_path.iterdir():
                 if image_path.suffix in [".jpg", ".png", ".jpeg"]:
@@ -523,7 +590,7 @@ class AnnotationWidget(ContentWidgetBase):
                 self.cb_label.action_delete.setEnabled(False)
             self.label_property_widget.label_widget.cus_add_label.setEnabled(True)
 
-    def save_current_annotation(self):
+    def ensure_annotation_dir(self) -> bool:
         if self.image_dir_path and self.image_dir_path.exists():
             if not self.annotation_dir_path or not self.annotation_dir_path.exists():
                 w = Dialog(self.tr("Warning"),
@@ -536,13 +603,32 @@ class AnnotationWidget(ContentWidgetBase):
                     db_update_annotation_dir_path(self.annotation_task_id,
                                                   self.annotation_dir_path.resolve().as_posix())
                 else:
-                    return
+                    return False
+        return True
+
+    def update_task_labeled_status(self):
+        labeled_count, total_count = self.label_property_widget.image_list_widget.get_all_image_labeled_count()
+        with db_session() as session:
+            task: AnnotationTask = session.query(AnnotationTask).filter_by(task_id=self.annotation_task_id).first()
+            task.labeled_num = labeled_count
+            task.total = total_count
+            if labeled_count == total_count:
+                task.task_status = AnnotationStatus.AnnoFinished.value
+                task.end_time = datetime.now()
+                delta = task.end_time - task.start_time
+                task.elapsed = format_time_delta(delta)
+            else:
+                task.task_status = AnnotationStatus.Annotating.value
+
+    def save_current_annotation(self):
+        if not self.ensure_annotation_dir():
+            return
         self.update_label_file()
         annotation_name = Path(self.label_property_widget.image_list_widget.get_current_image_labeled()[0])
         annotation_path = self.annotation_dir_path / (annotation_name.stem + ".txt")
         annotations = []
-        pix = self.canvas.get_background_pix()
-        w, h = pix.width(), pix.height()
+        image_size = self.canvas.get_image_size()
+        w, h = image_size.width(), image_size.height()
         for item in self.canvas.get_shape_items():
             if isinstance(item, ShapeItem):
                 annotation = str(list(self.labels_color.keys()).index(item.get_annotation()))
@@ -558,24 +644,13 @@ class AnnotationWidget(ContentWidgetBase):
         with open(annotation_path, "w", encoding="utf8") as f:
             f.writelines(annotations)
         self.label_property_widget.image_list_widget.set_current_image_labeled(True)
-        labeled_count, total_count = self.label_property_widget.image_list_widget.get_all_image_labeled_count()
-        with db_session() as session:
-            task: AnnotationTask = session.query(AnnotationTask).filter_by(task_id=self.annotation_task_id).first()
-            task.labeled_num = labeled_count
-            task.total = total_count
-            if labeled_count == total_count:
-                task.task_status = AnnotationStatus.AnnoFinished.value
-                task.end_time = datetime.now()
-                delta = task.end_time - task.start_time
-                task.elapsed = format_time_delta(delta)
-            else:
-                task.task_status = AnnotationStatus.Annotating.value
-            InfoBar.success(
-                title='',
-                content=self.tr("Annotations save successfully!"),
-                orient=Qt.Orientation.Vertical,
-                isClosable=True,
-                position=InfoBarPosition.TOP_RIGHT,
-                duration=2000,
-                parent=window_manager.find_window("main_widget")
-            )
+        self.update_task_labeled_status()
+        InfoBar.success(
+            title='',
+            content=self.tr("Annotations save successfully!"),
+            orient=Qt.Orientation.Vertical,
+            isClosable=True,
+            position=InfoBarPosition.TOP_RIGHT,
+            duration=2000,
+            parent=window_manager.find_window("main_widget")
+        )
@@ -84,6 +84,20 @@ class AnnotationListWidget(SimpleCardWidget):
         self.list_widget.setItemWidget(item, annotation_item_widget)
         self.annotation_item_map.update({item_id: item})
 
+    def add_annotations(self, annotations: list[tuple[str, str, QColor]]):
+        """
+        批量添加标注，添加过程中不刷新界面
+        :param annotations: (item_id, annotation, color)列表
+        """
+        self.list_widget.setUpdatesEnabled(False)
+        self.list_widget.blockSignals(True)
+        try:
+            for item_id, annotation, color in annotations:
+                self.add_annotation(item_id, annotation, color)
+        finally:
+            self.list_widget.blockSignals(False)
+            self.list_widget.setUpdatesEnabled(True)
+
     def on_delete_item(self, item_id: str):
         self.delete_annotation_item(item_id)
 
@@ -1,16 +1,17 @@
 import math
 from pathlib import Path
 
-from PySide6.QtCore import QLineF, Signal, QPointF
-from PySide6.QtGui import QPolygonF, Qt, QPen, QPainter, QColor, QPixmap, QTransform, QWheelEvent, QKeyEvent, \
+from PySide6.QtCore import QLineF, Signal, QPointF, QSize
+from PySide6.QtGui import QPolygonF, Qt, QPen, QPainter, QColor, QTransform, QWheelEvent, QKeyEvent, \
     QResizeEvent
 from PySide6.QtWidgets import QGraphicsView, QGraphicsScene
 from qfluentwidgets import isDarkTheme, SmoothScrollDelegate, RoundMenu, Action, FluentIcon
 
 from annotation.shape import RectangleItem, ShapeType, LineItem, CircleItem, PointItem, PolygonItem, ShapeItem, \
-    ImageItem, RotatedRectangleItem
+    TiledImageItem, RotatedRectangleItem
 from common.component.model_type_widget import ModelType
 from common.utils.utils import snowflake_generator
+from .tiled_image import TiledImage
 from .types import AlignmentType
 from .core import drawing_status_manager, DrawingStatus
 
@@ -29,6 +30,8 @@ SCALE_STEP = 1.1
 class InteractiveCanvas(QGraphicsView):
     is_drawing_changed = Signal(bool)
     draw_finished = Signal(ShapeItem)
+    # 加载历史标注时一次性发出全部图形
+    shapes_loaded = Signal(list)
     shape_item_selected_changed = Signal(list)
     shape_item_geometry_changed = Signal(list)
     delete_shape_item_clicked = Signal(str)
@@ -38,14 +41,14 @@ class InteractiveCanvas(QGraphicsView):
         super().__init__()
         # 创建绘图场景
         self.scene = QGraphicsScene(self)
-        # 如果不加这一行进行批量删除item那么会直接崩溃
-        self.scene.setItemIndexMethod(QGraphicsScene.ItemIndexMethod.NoIndex)
+        # 图形在几何变化前都会调用prepareGeometryChange，可以安全地使用BSP索引加速命中检测和局部刷新
+        self.scene.setItemIndexMethod(QGraphicsScene.ItemIndexMethod.BspTreeIndex)
         self.scene.selectionChanged.connect(self.on_item_select_changed)
         self.scene.setSceneRect(0, 0, 800, 600)
         self.setScene(self.scene)
         self.setMouseTracking(True)
-        # 必须加不加的话刷新不及时，有残影
-        self.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.FullViewportUpdate)
+        # 图形的包围盒已覆盖控制点，图片只重绘暴露区域的图块，局部刷新即可
+        self.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.SmartViewportUpdate)
         self.setDragMode(QGraphicsView.DragMode.RubberBandDrag)
         # self.setDragMode(QGraphicsView.DragMode.NoDrag)
         self.setTransformationAnchor(QGraphicsView.ViewportAnchor.AnchorUnderMouse)
@@ -57,7 +60,7 @@ class InteractiveCanvas(QGraphicsView):
         # 当前形状类型
         self.current_shape_type = ShapeType.RotatedRectangle
         # 绘制状态
-        self.background_pix = QPixmap()
+        self.image_size = QSize()
         self.menu = None
         self.is_drawing = False
         self.move_start_pos = None
@@ -160,17 +163,21 @@ class InteractiveCanvas(QGraphicsView):
     def get_shape_item(self, item_id: str):
         return self.shape_item_map.get(item_id, None)
 
-    def get_shape_items(self):
-        return self.scene.items()
+    def get_shape_items(self) -> list[ShapeItem]:
+        return list(self.shape_item_map.values())
+
+    def get_shape_item_count(self) -> int:
+        return len(self.shape_item_map)
 
-    def get_background_pix(self):
-        return self.background_pix
+    def get_image_size(self) -> QSize:
+        return self.image_size
 
     def delete_shape_item(self, item_id):
         shape_item = self.shape_item_map.get(item_id, None)
-        if shape_item and shape_item in self.scene.items():
+        if shape_item:
             self.shape_item_map.pop(item_id, None)
-            self.scene.removeItem(shape_item)
+            if shape_item.scene() is self.scene:
+                self.scene.removeItem(shape_item)
 
     def update_shape_item_color(self, annotation, color: QColor):
         for _, shape_item in self.shape_item_map.items():
@@ -187,12 +194,14 @@ class InteractiveCanvas(QGraphicsView):
                 shape_item.setSelected(True)
         self.scene.blockSignals(False)
 
-    def send_draw_finished_signal(self, shape_item: ShapeItem):
+    def _register_shape_item(self, shape_item: ShapeItem):
         item_id = str(next(snowflake_generator))
         shape_item.set_id(item_id)
-        shape_item.prepareGeometryChange()
         self.shape_item_map.update({item_id: shape_item})
         shape_item.shape_item_geometry_changed.connect(self.on_shape_item_geometry_changed)
+
+    def send_draw_finished_signal(self, shape_item: ShapeItem):
+        self._register_shape_item(shape_item)
         self.draw_finished.emit(shape_item)
 
     def update_background_color(self):
@@ -206,40 +215,54 @@ class InteractiveCanvas(QGraphicsView):
             self.border_line_color = VIEW_BORDER_LINE_COLOR[1]
 
     def clear(self):
+        self.shape_item_map.clear()
+        self.temp_item = None
         self.scene.clear()
         self.scene.setSceneRect(0, 0, 800, 600)
 
-    def set_image_and_draw_annotations(self, image_path: str | Path, annotations: list[list[float]],
+    def set_image_and_draw_annotations(self, image: str | Path | TiledImage, annotations: list[list[float]],
                                        model_type: ModelType, labels_color: dict):
-        self.background_pix = QPixmap(image_path)
-        image_item = ImageItem(self.background_pix)
+        """
+        :param image: 图片路径，或预读取线程中已经生成的分块图片
+        """
+        if not isinstance(image, TiledImage):
+            image = TiledImage(image)
+        image_item = TiledImageItem(image)
+        self.image_size = image.size()
+        image_width, image_height = self.image_size.width(), self.image_size.height()
+        self.shape_item_map.clear()
+        self.temp_item = None
         self.scene.clear()
-        self.setSceneRect(self.background_pix.rect())
+        self.setSceneRect(image_item.boundingRect())
+        # 批量添加时不维护索引，全部添加后一次性重建
+        self.scene.setItemIndexMethod(QGraphicsScene.ItemIndexMethod.NoIndex)
         self.scene.addItem(image_item)
+        labels = list(labels_color.keys())
+        shape_items = []
         for annotation in annotations:
             label_index = int(annotation[0])
             shape_data = annotation[1:]
-            label = list(labels_color.keys())[label_index]
+            label = labels[label_index]
             color = labels_color[label]
             if model_type == ModelType.DETECT:
                 shape_item = RectangleItem()
-                x_center = float(shape_data[0]) * self.background_pix.width()
-                y_center = float(shape_data[1]) * self.background_pix.height()
-                w = float(shape_data[2]) * self.background_pix.width()
-                h = float(shape_data[3]) * self.background_pix.height()
+                x_center = float(shape_data[0]) * image_width
+                y_center = float(shape_data[1]) * image_height
+                w = float(shape_data[2]) * image_width
+                h = float(shape_data[3]) * image_height
                 p1 = QPointF(x_center - w / 2, y_center - h / 2)
                 p2 = QPointF(x_center + w / 2, y_center + h / 2)
                 shape_item.update_points([p1, p2])
             elif model_type == ModelType.OBB:
                 shape_item = RotatedRectangleItem()
-                x1 = float(shape_data[0]) * self.background_pix.width()
-                y1 = float(shape_data[1]) * self.background_pix.height()
-                x2 = float(shape_data[2]) * self.background_pix.width()
-                y2 = float(shape_data[3]) * self.background_pix.height()
-                x3 = float(shape_data[4]) * self.background_pix.width()
-                y3 = float(shape_data[5]) * self.background_pix.height()
-                x4 = float(shape_data[6]) * self.background_pix.width()
-                y4 = float(shape_data[7]) * self.background_pix.height()
+                x1 = float(shape_data[0]) * image_width
+                y1 = float(shape_data[1]) * image_height
+                x2 = float(shape_data[2]) * image_width
+                y2 = float(shape_data[3]) * image_height
+                x3 = float(shape_data[4]) * image_width
+                y3 = float(shape_data[5]) * image_height
+                x4 = float(shape_data[6]) * image_width
+                y4 = float(shape_data[7]) * image_height
                 p1 = QPointF(x1, y1)
                 p2 = QPointF(x2, y2)
                 p3 = QPointF((x3 + x4) / 2, (y3 + y4) / 2)
@@ -248,16 +271,16 @@ class InteractiveCanvas(QGraphicsView):
                 shape_item = PolygonItem()
                 points = []
                 for i in range(0, len(shape_data), 2):
-                    x = float(shape_data[i]) * self.background_pix.width()
-                    y = float(shape_data[i + 1]) * self.background_pix.height()
+                    x = float(shape_data[i]) * image_width
+                    y = float(shape_data[i + 1]) * image_height
                     points.append(QPointF(x, y))
                 shape_item.update_points(points)
             elif model_type == ModelType.POSE:
                 shape_item = LineItem()
-                x1 = float(shape_data[0]) * self.background_pix.width()
-                y1 = float(shape_data[1]) * self.background_pix.height()
-                x2 = float(shape_data[2]) * self.background_pix.width()
-                y2 = float(shape_data[3]) * self.background_pix.height()
+                x1 = float(shape_data[0]) * image_width
+                y1 = float(shape_data[1]) * image_height
+                x2 = float(shape_data[2]) * image_width
+                y2 = float(shape_data[3]) * image_height
                 shape_item.update_points([QPointF(x1, y1), QPointF(x2, y2)])
             else:
                 raise NotImplementedError
@@ -265,7 +288,10 @@ class InteractiveCanvas(QGraphicsView):
             shape_item.set_color(color)
             shape_item.set_is_drawing_history(True)
             self.scene.addItem(shape_item)
-            self.send_draw_finished_signal(shape_item)
+            self._register_shape_item(shape_item)
+            shape_items.append(shape_item)
+        self.scene.setItemIndexMethod(QGraphicsScene.ItemIndexMethod.BspTreeIndex)
+        self.shapes_loaded.emit(shape_items)
 
     def on_shape_item_geometry_changed(self):
         item = self.sender()
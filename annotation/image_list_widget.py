@@ -1,39 +1,124 @@
 from pathlib import Path
 
-from PySide6.QtCore import Qt, Signal, QEvent
-from PySide6.QtWidgets import QVBoxLayout, QListWidgetItem, QWidget, QHBoxLayout, QSizePolicy
-from qfluentwidgets import BodyLabel, SimpleCardWidget, StrongBodyLabel, Dialog
+from PySide6.QtCore import Qt, Signal, QEvent, QAbstractListModel, QModelIndex, QSize, QRect
+from PySide6.QtGui import QPainter, QColor
+from PySide6.QtWidgets import QVBoxLayout, QStyledItemDelegate, QStyleOptionViewItem, QStyle, QAbstractItemView
+from qfluentwidgets import SimpleCardWidget, StrongBodyLabel, Dialog, ListView, isDarkTheme, themeColor
 
-from common.component.custom_color_button import CustomColorButton
-from common.component.custom_list_widget import CustomListWidget
-from common.utils.utils import generate_random_color
 
+class ImageListModel(QAbstractListModel):
+    """
+    标注图片列表模型。
+    只保存图片路径和一个字节的标注状态，并维护已标注数量，
+    不为每张图片创建控件，十万级图片也能快速加载。
+    """
+    LabeledRole = Qt.ItemDataRole.UserRole + 1
 
-class ImageListItemWidget(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._image_paths: list[str] = []
+        self._labeled = bytearray()
+        self._labeled_count = 0
 
-    def __init__(self, image_path: str, parent=None):
-        super().__init__(parent=parent)
-        self.hly = QHBoxLayout(self)
-        self.hly.setContentsMargins(0, 0, 0, 0)
-        self.cb_label_status = CustomColorButton(generate_random_color())
-        self.cb_label_status.setFixedSize(16, 16)
-        self.cb_label_status.set_border_radius(8)
-        self.hly.addWidget(self.cb_label_status)
-        self.hly.addWidget(BodyLabel(text=image_path))
+    def set_images(self, image_paths: list[str], labeled: bytearray):
+        self.beginResetModel()
+        self._image_paths = image_paths
+        self._labeled = labeled
+        self._labeled_count = sum(labeled)
+        self.endResetModel()
+
+    def clear(self):
+        self.set_images([], bytearray())
+
+    def append_image(self, image_path: str, labeled: bool):
+        row = len(self._image_paths)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._image_paths.append(image_path)
+        self._labeled.append(int(labeled))
+        self._labeled_count += int(labeled)
+        self.endInsertRows()
+
+    def remove_image(self, row: int):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self._labeled_count -= self._labeled[row]
+        del self._image_paths[row]
+        del self._labeled[row]
+        self.endRemoveRows()
+
+    def image_path(self, row: int) -> str:
+        return self._image_paths[row]
+
+    def is_labeled(self, row: int) -> bool:
+        return bool(self._labeled[row])
+
+    def set_labeled(self, row: int, labeled: bool):
+        if self._labeled[row] == int(labeled):
+            return
+        self._labeled[row] = int(labeled)
+        self._labeled_count += 1 if labeled else -1
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [self.LabeledRole])
+
+    def set_paths_labeled(self, image_paths: set[str]):
+        for row, image_path in enumerate(self._image_paths):
+            if not self._labeled[row] and image_path in image_paths:
+                self._labeled[row] = 1
+                self._labeled_count += 1
+        if self._image_paths:
+            self.dataChanged.emit(self.index(0), self.index(len(self._image_paths) - 1), [self.LabeledRole])
 
-        self.setToolTip(image_path)
-        self.image_path = image_path
-        self.labeled = False
+    def unlabeled_paths(self) -> list[str]:
+        return [image_path for image_path, labeled in zip(self._image_paths, self._labeled) if not labeled]
 
-    def get_image_path(self) -> str:
-        return self.image_path
+    def labeled_count(self) -> int:
+        return self._labeled_count
 
-    def set_label_status(self, labeled=False):
-        self.labeled = labeled
-        self.cb_label_status.setColor(Qt.GlobalColor.green if labeled else Qt.GlobalColor.red)
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self._image_paths)
 
-    def get_image_labeled_info(self) -> tuple[str, bool]:
-        return self.image_path, self.labeled
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            return self._image_paths[row]
+        if role == self.LabeledRole:
+            return bool(self._labeled[row])
+        return None
+
+
+class ImageListDelegate(QStyledItemDelegate):
+    """绘制标注状态圆点和图片路径"""
+    item_height = 25
+    dot_size = 16
+
+    def sizeHint(self, option: QStyleOptionViewItem, index: QModelIndex) -> QSize:
+        return QSize(option.rect.width(), self.item_height)
+
+    def paint(self, painter: QPainter, option: QStyleOptionViewItem, index: QModelIndex) -> None:
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(Qt.PenStyle.NoPen)
+        if option.state & (QStyle.StateFlag.State_Selected | QStyle.StateFlag.State_MouseOver):
+            color = QColor(themeColor())
+            color.setAlpha(90 if option.state & QStyle.StateFlag.State_Selected else 40)
+            painter.setBrush(color)
+            painter.drawRoundedRect(option.rect.adjusted(1, 1, -1, -1), 5, 5)
+
+        rect = option.rect.adjusted(11, 0, -11, 0)
+        dot_rect = QRect(rect.x(), rect.center().y() - self.dot_size // 2 + 1, self.dot_size, self.dot_size)
+        labeled = index.data(ImageListModel.LabeledRole)
+        painter.setBrush(QColor(Qt.GlobalColor.green if labeled else Qt.GlobalColor.red))
+        painter.drawEllipse(dot_rect)
+
+        text_rect = rect.adjusted(self.dot_size + 6, 0, 0, 0)
+        text = option.fontMetrics.elidedText(index.data(Qt.ItemDataRole.DisplayRole),
+                                             Qt.TextElideMode.ElideLeft, text_rect.width())
+        painter.setPen(QColor(255, 255, 255, 197) if isDarkTheme() else QColor(0, 0, 0, 200))
+        painter.drawText(text_rect, Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft, text)
+        painter.restore()
 
 
 class ImageListWidget(SimpleCardWidget):
@@ -46,31 +131,35 @@ class ImageListWidget(SimpleCardWidget):
         self.setObjectName("imageListWidget")
         self.setMinimumHeight(200)
         self.lbl_title = StrongBodyLabel(text=self.tr("Image list"))
-        self.list_widget = CustomListWidget()
-        self.list_widget.set_item_height(25)
+        self.image_model = ImageListModel(self)
+        self.list_view = ListView()
+        # 固定行高，视图不需要逐行计算尺寸
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.list_view.setItemDelegate(ImageListDelegate(self.list_view))
+        self.list_view.setModel(self.image_model)
+        self.list_view.viewport().installEventFilter(self)
+        # 最近一次切换图片的方向，1为向后，-1为向前，用于决定预读取的顺序
+        self._direction = 1
         self.vly_content = QVBoxLayout(self)
         self.vly_content.addWidget(self.lbl_title)
-        self.vly_content.addWidget(self.list_widget)
+        self.vly_content.addWidget(self.list_view)
         self.connect_signals_and_slots()
-        self.last_item = QListWidgetItem()
-        self.item_widgets = []
 
     def connect_signals_and_slots(self):
-        self.list_widget.itemClicked.connect(self.on_item_clicked)
+        self.list_view.clicked.connect(self.on_item_clicked)
 
-    def on_item_clicked(self, item: QListWidgetItem):
-        row = self.list_widget.indexFromItem(item).row()
+    def on_item_clicked(self, index: QModelIndex):
+        row = index.row()
         if row == 0:
             self.item_ending_status_changed.emit(0)
-        elif row == self.list_widget.count() - 1:
+        elif row == self.image_model.rowCount() - 1:
             self.item_ending_status_changed.emit(1)
         else:
             self.item_ending_status_changed.emit(2)
-        widget = self.list_widget.itemWidget(item)
-        if isinstance(widget, ImageListItemWidget):
-            self.image_item_changed.emit(widget.get_image_path())
+        self.image_item_changed.emit(self.image_model.image_path(row))
 
-    def set_image_dir_path(self, image_path_list: list[Path], annotation_list: list):
+    def set_image_dir_path(self, image_path_list: list[Path], annotation_list):
         if len(image_path_list) == 0:
             self.item_ending_status_changed.emit(3)
             return
@@ -78,121 +167,109 @@ class ImageListWidget(SimpleCardWidget):
             self.item_ending_status_changed.emit(3)
         else:
             self.item_ending_status_changed.emit(0)
-        for image_path in image_path_list:
-            self.add_image_item(image_path, image_path.stem in annotation_list)
-        self.list_widget.setCurrentIndex(self.list_widget.model().index(0, 0))
-        self.last_item = self.list_widget.item(0)
-        widget = self.list_widget.itemWidget(self.last_item)
-        if isinstance(widget, ImageListItemWidget):
-            self.image_item_changed.emit(widget.get_image_path())
+        annotation_stems = set(annotation_list)
+        # 同一目录只解析一次
+        resolved_dirs: dict[Path, str] = dict()
+        image_paths = []
+        labeled = bytearray(len(image_path_list))
+        for i, image_path in enumerate(image_path_list):
+            parent = resolved_dirs.get(image_path.parent)
+            if parent is None:
+                parent = resolved_dirs.setdefault(image_path.parent, image_path.parent.resolve().as_posix())
+            image_paths.append(f"{parent}/{image_path.name}")
+            labeled[i] = image_path.stem in annotation_stems
+        self.image_model.set_images(image_paths, labeled)
+        self.list_view.setCurrentIndex(self.image_model.index(0))
+        self.image_item_changed.emit(self.image_model.image_path(0))
 
     def clear(self):
-        self.list_widget.clear()
-        self.update_item_widgets()
+        self.image_model.clear()
 
     def add_image_item(self, image_path, labeled=False):
-        item = QListWidgetItem()
-        image_list_item_widget = ImageListItemWidget(image_path.resolve().as_posix())
-        image_list_item_widget.set_label_status(labeled)
-        image_list_item_widget.installEventFilter(self)
-        self.list_widget.addItem(item)
-        self.list_widget.setItemWidget(item, image_list_item_widget)
-        self.update_item_widgets()
+        self.image_model.append_image(image_path.resolve().as_posix(), labeled)
 
     def delete_current_image_item(self):
-        item = self.list_widget.currentItem()
-        widget = self.list_widget.itemWidget(item)
-        if isinstance(widget, ImageListItemWidget):
-            self.list_widget.removeItemWidget(item)
-            self.list_widget.takeItem(self.list_widget.row(item))
-        item = self.list_widget.currentItem()
-        widget = self.list_widget.itemWidget(item)
-        if isinstance(widget, ImageListItemWidget):
-            self.image_item_changed.emit(widget.get_image_path())
-        self.update_item_widgets()
-
-    def update_item_widgets(self):
-        for i in range(self.list_widget.count()):
-            item = self.list_widget.item(i)
-            widget = self.list_widget.itemWidget(item)
-            self.item_widgets.append(widget)
+        row = self.list_view.currentIndex().row()
+        if row < 0:
+            return
+        self.image_model.remove_image(row)
+        row = self.list_view.currentIndex().row()
+        if row >= 0:
+            self.image_item_changed.emit(self.image_model.image_path(row))
+
+    def _move_to_row(self, row: int):
+        self.list_view.setCurrentIndex(self.image_model.index(row))
+        self.image_item_changed.emit(self.image_model.image_path(row))
 
     def next_item(self):
-        current_index = self.list_widget.currentIndex()
-        current_row = current_index.row()
-        self.last_item = self.list_widget.item(current_row)
-        if current_row == self.list_widget.count() - 1:
+        current_row = self.list_view.currentIndex().row()
+        if current_row == self.image_model.rowCount() - 1:
             return
         next_row = current_row + 1
-        next_index = self.list_widget.model().index(next_row, 0)
-        self.list_widget.setCurrentIndex(next_index)
-        item = self.list_widget.item(next_row)
-        widget = self.list_widget.itemWidget(item)
-        if isinstance(widget, ImageListItemWidget):
-            self.image_item_changed.emit(widget.get_image_path())
-
-        if next_row == self.list_widget.count() - 1:
+        self._direction = 1
+        self._move_to_row(next_row)
+        if next_row == self.image_model.rowCount() - 1:
             self.item_ending_status_changed.emit(1)
         else:
             self.item_ending_status_changed.emit(2)
 
     def pre_item(self):
-        current_index = self.list_widget.currentIndex()
-        current_row = current_index.row()
-        self.last_item = self.list_widget.item(current_row)
-        if current_row == 0:
+        current_row = self.list_view.currentIndex().row()
+        if current_row <= 0:
             return
         pre_row = current_row - 1
-        pre_index = self.list_widget.model().index(pre_row, 0)
-        self.list_widget.setCurrentIndex(pre_index)
-        item = self.list_widget.item(pre_row)
-        widget = self.list_widget.itemWidget(item)
-        if isinstance(widget, ImageListItemWidget):
-            self.image_item_changed.emit(widget.get_image_path())
+        self._direction = -1
+        self._move_to_row(pre_row)
         if pre_row == 0:
             self.item_ending_status_changed.emit(0)
         else:
             self.item_ending_status_changed.emit(2)
 
     def set_current_image_labeled(self, labeled: bool):
-        item = self.list_widget.currentItem()
-        widget = self.list_widget.itemWidget(item)
-        if isinstance(widget, ImageListItemWidget):
-            widget.set_label_status(labeled)
+        row = self.list_view.currentIndex().row()
+        if row >= 0:
+            self.image_model.set_labeled(row, labeled)
 
     def get_current_image_labeled(self) -> [str, bool]:
-        item = self.list_widget.currentItem()
-        widget = self.list_widget.itemWidget(item)
-        if isinstance(widget, ImageListItemWidget):
-            return widget.get_image_labeled_info()
+        row = self.list_view.currentIndex().row()
+        if row >= 0:
+            return self.image_model.image_path(row), self.image_model.is_labeled(row)
         return "", False
 
+    def get_prefetch_image_paths(self, ahead: int = 4, behind: int = 1) -> list[str]:
+        """
+        当前图片附近需要预读取的图片，按切换方向优先排列
+        :param ahead: 沿切换方向预读取的数量
+        :param behind: 反方向预读取的数量
+        """
+        row = self.list_view.currentIndex().row()
+        if row < 0:
+            return []
+        rows = [row + self._direction * i for i in range(1, ahead + 1)]
+        rows += [row - self._direction * i for i in range(1, behind + 1)]
+        return [self.image_model.image_path(r) for r in rows if 0 <= r < self.image_model.rowCount()]
+
+    def get_unlabeled_image_paths(self) -> list[Path]:
+        return [Path(image_path) for image_path in self.image_model.unlabeled_paths()]
+
+    def set_images_labeled(self, image_paths: list[str]):
+        self.image_model.set_paths_labeled(set(image_paths))
+
     def get_all_image_labeled_count(self):
-        count = self.list_widget.count()
-        labeled_count = 0
-        for i in range(count):
-            item = self.list_widget.item(i)
-            widget = self.list_widget.itemWidget(item)
-            if isinstance(widget, ImageListItemWidget):
-                if widget.get_image_labeled_info()[1]:
-                    labeled_count += 1
-        return labeled_count, count
+        return self.image_model.labeled_count(), self.image_model.rowCount()
 
     def eventFilter(self, obj, e):
-        if e.type() == QEvent.Type.MouseButtonPress:
-            if obj in self.item_widgets:
-                item = self.list_widget.currentItem()
-                widget = self.list_widget.itemWidget(item)
-                if isinstance(widget, ImageListItemWidget):
-                    label = widget.get_image_labeled_info()[1]
-                    # 如果未标注直接拦截
-                    if not label:
-                        w = Dialog(self.tr("Warning"),
-                                   self.tr("Current annotation is not saved. Do you want to save it?"), self)
-                        if w.exec():
-                            self.save_annotation_clicked.emit()
-                        else:
-                            # 不保存就重新加载一下当前图片和已经保存过的标签
-                            self.image_item_changed.emit(widget.get_image_path())
-                            return True
+        if obj is self.list_view.viewport() and e.type() == QEvent.Type.MouseButtonPress:
+            row = self.list_view.currentIndex().row()
+            target_row = self.list_view.indexAt(e.position().toPoint()).row()
+            # 如果未标注直接拦截
+            if row >= 0 and target_row >= 0 and not self.image_model.is_labeled(row):
+                w = Dialog(self.tr("Warning"),
+                           self.tr("Current annotation is not saved. Do you want to save it?"), self)
+                if w.exec():
+                    self.save_annotation_clicked.emit()
+                else:
+                    # 不保存就重新加载一下当前图片和已经保存过的标签
+                    self.image_item_changed.emit(self.image_model.image_path(row))
+                    return True
         return super().eventFilter(obj, e)
@@ -0,0 +1,148 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from pathlib import Path
+
+from loguru import logger
+
+from .tiled_image import TiledImage
+
+
+def load_annotations(annotation_path: Path | None) -> list[list[float]]:
+    """
+    读取YOLO格式的标注文件
+    :return: 每行为[类别, 坐标...]
+    """
+    annotations = []
+    if annotation_path is None or not annotation_path.exists():
+        return annotations
+    with open(annotation_path, "r", encoding="utf8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                annotations.append([float(x) for x in line.split(" ")])
+    return annotations
+
+
+def _file_signature(path: Path | None) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except (OSError, TypeError):
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class _PrefetchEntry:
+    def __init__(self, image_future: Future, annotation_path: Path | None):
+        self.image_future = image_future
+        self.annotation_path = annotation_path
+        self.annotation_signature = None
+        self.annotations: list[list[float]] = []
+
+
+class ImagePrefetcher:
+    """
+    标注画布的图片预读取。
+    按浏览方向在线程池中提前生成前后若干张图片的TiledImage并解析标注文件，结果保存在有界的LRU中；
+    切换图片时直接取已生成的图片，标注文件被修改过时重新解析。
+    max_bytes是硬上限，正在生成的图片按单张图片的常驻内存上限计入，超出时预读取的图片也会被淘汰。
+    """
+
+    def __init__(self, max_images: int = 8, max_bytes: int = 1 << 30):
+        self.max_images = max_images
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, _PrefetchEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="annotation_prefetch")
+
+    def clear(self):
+        with self._lock:
+            for entry in self._entries.values():
+                entry.image_future.cancel()
+            self._entries.clear()
+
+    def get(self, image_path: str | Path, annotation_path: Path | None) -> tuple[TiledImage, list[list[float]]]:
+        """
+        获取图片和标注，已预读取的直接返回，正在解码的等待其完成，否则在当前线程读取
+        """
+        image_path = Path(image_path).as_posix()
+        with self._lock:
+            entry = self._entries.get(image_path)
+            if entry is not None and entry.image_future.cancelled():
+                entry = None
+        if entry is None:
+            entry = _PrefetchEntry(self._completed(TiledImage(image_path)), annotation_path)
+        with self._lock:
+            entry = self._entries.setdefault(image_path, entry)
+            self._entries.move_to_end(image_path)
+        try:
+            image = entry.image_future.result()
+        except Exception as e:
+            logger.error(f"load image failed: {image_path}, {e}")
+            image = TiledImage()
+        with self._lock:
+            self._evict([image_path])
+        if image.is_null():
+            with self._lock:
+                self._entries.pop(image_path, None)
+        return image, self._get_annotations(entry, annotation_path)
+
+    def prefetch(self, image_paths: list[str], annotation_dir: Path | None):
+        """
+        提交需要预读取的图片，按优先级从高到低排列，超出上限时淘汰最久未使用的图片
+        """
+        image_paths = [Path(image_path).as_posix() for image_path in image_paths[:self.max_images - 1]]
+        with self._lock:
+            for image_path in image_paths:
+                if image_path in self._entries:
+                    continue
+                annotation_path = annotation_dir / (Path(image_path).stem + ".txt") if annotation_dir else None
+                entry = _PrefetchEntry(self._executor.submit(TiledImage, image_path), annotation_path)
+                if annotation_path is not None:
+                    self._executor.submit(self._get_annotations, entry, annotation_path)
+                self._entries[image_path] = entry
+            for image_path in reversed(image_paths):
+                self._entries.move_to_end(image_path)
+            self._evict(image_paths)
+
+    def _evict(self, protected: list[str]):
+        """
+        :param protected: 按优先级从高到低排列，先淘汰其余最久未使用的图片，仍超出max_bytes时从优先级最低的开始淘汰
+        """
+        while len(self._entries) > self.max_images:
+            _, entry = self._entries.popitem(last=False)
+            entry.image_future.cancel()
+        sizes = {image_path: self._entry_bytes(entry) for image_path, entry in self._entries.items()}
+        total_bytes = sum(sizes.values())
+        order = [image_path for image_path in sizes if image_path not in protected]
+        order += [image_path for image_path in reversed(protected) if image_path in sizes]
+        for image_path in order:
+            if total_bytes <= self.max_bytes:
+                break
+            self._entries.pop(image_path).image_future.cancel()
+            total_bytes -= sizes[image_path]
+
+    @staticmethod
+    def _entry_bytes(entry: _PrefetchEntry) -> int:
+        future = entry.image_future
+        if future.cancelled():
+            return 0
+        if not future.done():
+            return TiledImage.max_nbytes
+        return future.result().nbytes() if future.exception() is None else 0
+
+    @staticmethod
+    def _completed(image: TiledImage) -> Future:
+        future = Future()
+        future.set_result(image)
+        return future
+
+    @staticmethod
+    def _get_annotations(entry: _PrefetchEntry, annotation_path: Path | None) -> list[list[float]]:
+        signature = _file_signature(annotation_path)
+        if annotation_path != entry.annotation_path or signature != entry.annotation_signature:
+            entry.annotations = load_annotations(annotation_path) if signature else []
+            entry.annotation_path = annotation_path
+            entry.annotation_signature = signature
+        return entry.annotations
@@ -0,0 +1,103 @@
+from pathlib import Path
+
+from PySide6.QtCore import QThread, Signal
+from loguru import logger
+
+from common.component.model_type_widget import ModelType
+from common.core.model_registry import model_registry
+from ultralytics.engine.results import Results
+
+
+def result_to_yolo_lines(result: Results, model_type: ModelType) -> list[str]:
+    """
+    将预测结果转换为YOLO格式的标注行，坐标均为归一化坐标
+    :param result: 单张图片的预测结果
+    :param model_type: 任务类型，支持detect/segment/obb/pose
+    :return: 标注行列表，每行以换行符结尾
+    """
+    lines = []
+    if model_type == ModelType.DETECT:
+        for class_id, box in zip(result.boxes.cls.int().tolist(), result.boxes.xywhn.tolist()):
+            lines.append(f"{class_id} " + " ".join(f"{x:.4f}" for x in box) + "\n")
+    elif model_type == ModelType.SEGMENT:
+        if result.masks is not None:
+            for class_id, polygon in zip(result.boxes.cls.int().tolist(), result.masks.xyn):
+                if len(polygon) < 3:
+                    continue
+                lines.append(f"{class_id} " + " ".join(f"{x:.4f}" for x in polygon.reshape(-1).tolist()) + "\n")
+    elif model_type == ModelType.OBB:
+        for class_id, points in zip(result.obb.cls.int().tolist(), result.obb.xyxyxyxyn.tolist()):
+            lines.append(f"{class_id} " + " ".join(f"{x:.4f} {y:.4f}" for x, y in points) + "\n")
+    elif model_type == ModelType.POSE:
+        # 与画布读写的POSE格式一致: class x1 y1 x2 y2，画布以这两点构造线段，这里取目标框的左上角和右下角
+        for class_id, box in zip(result.boxes.cls.int().tolist(), result.boxes.xyxyn.tolist()):
+            lines.append(f"{class_id} " + " ".join(f"{x:.4f}" for x in box) + "\n")
+    else:
+        raise NotImplementedError(f"semi-automatic annotation does not support {model_type.name}")
+    return lines
+
+
+def result_class_ids(result: Results, model_type: ModelType) -> list[int]:
+    """
+    :return: 预测结果中所有目标的类别id
+    """
+    boxes = result.obb if model_type == ModelType.OBB else result.boxes
+    return boxes.cls.int().tolist() if boxes is not None else []
+
+
+class BatchAnnotationThread(QThread):
+    """
+    批量半自动标注。
+    图片以流式分批推理，每得到一张图片的结果就写出YOLO格式的标注文件，
+    结果不会在内存中累积，可随时取消，已经写出的标注会保留。
+    与单张标注一样逐张检查预测的类别id，超出标签数量的图片跳过并在结束时提示。
+    """
+    annotation_progress_changed = Signal(int, int)
+    # 已写出标注的图片路径
+    annotation_finished = Signal(list)
+    annotation_failed = Signal(str)
+    # 被跳过的图片数量
+    annotation_skipped = Signal(int)
+
+    def __init__(self, model_path: Path, model_type: ModelType, image_paths: list[Path], annotation_dir: Path,
+                 label_num: int, batch_size: int = 16):
+        super().__init__()
+        self._model_path = model_path
+        self._model_type = model_type
+        self._image_paths = image_paths
+        self._annotation_dir = annotation_dir
+        self._label_num = label_num
+        self._batch_size = batch_size
+
+    def run(self):
+        labeled_paths = []
+        skipped = 0
+        total = len(self._image_paths)
+        try:
+            entry = model_registry.acquire(self._model_path)
+            with entry.lock:
+                results = entry.model.predict([path.as_posix() for path in self._image_paths], stream=True,
+                                              batch=self._batch_size, verbose=False)
+                for finished, result in enumerate(results, 1):
+                    if self.isInterruptionRequested():
+                        break
+                    self.annotation_progress_changed.emit(finished, total)
+                    if any(class_id >= self._label_num for class_id in result_class_ids(result, self._model_type)):
+                        logger.warning(f"semi-automatic annotation: class id out of labels, skip {result.path}")
+                        skipped += 1
+                        continue
+                    lines = result_to_yolo_lines(result, self._model_type)
+                    # 没有检测到目标的图片保持未标注状态，留给人工确认
+                    if lines:
+                        image_path = Path(result.path)
+                        with open(self._annotation_dir / (image_path.stem + ".txt"), "w", encoding="utf8") as f:
+                            f.writelines(lines)
+                        labeled_paths.append(image_path.resolve().as_posix())
+        except Exception as e:
+            logger.exception(e)
+            self.annotation_failed.emit(str(e))
+        logger.info(f"semi-automatic annotation: {len(labeled_paths)}/{total} images labeled, {skipped} skipped")
+        if skipped:
+            self.annotation_skipped.emit(skipped)
+        # 失败或取消时同样返回已写出的标注，便于更新标注状态
+        self.annotation_finished.emit(labeled_paths)
@@ -1,7 +1,9 @@
 from pathlib import Path
 
 from PySide6.QtCore import QObject, Qt
-from qfluentwidgets import StrongBodyLabel, MessageBoxBase, InfoBar, InfoBarPosition, BodyLabel
+from PySide6.QtWidgets import QHBoxLayout
+from qfluentwidgets import StrongBodyLabel, MessageBoxBase, InfoBar, InfoBarPosition, BodyLabel, CheckBox, \
+    SpinBox
 
 from common.component.file_select_widget import FileSelectWidget
 from common.component.progress_message_box import ProgressMessageBox
@@ -22,14 +24,33 @@ class SemiAutomaticAnnotationEnsureMessageBox(MessageBoxBase):
             "annotation result will override the manual annotation result, please choose carefully!"), self)
         self.lbl_warning.setWordWrap(True)
         self.lbl_warning.setTextColor(Qt.GlobalColor.red, Qt.GlobalColor.red)
+        self.ckb_batch = CheckBox(self.tr("Annotate all unlabeled images"))
+        self.lbl_batch_size = BodyLabel(self.tr("Batch size"), self)
+        self.spb_batch_size = SpinBox()
+        self.spb_batch_size.setRange(1, 256)
+        self.spb_batch_size.setValue(16)
+        self.spb_batch_size.setEnabled(False)
+        self.ckb_batch.toggled.connect(self.spb_batch_size.setEnabled)
+        self.hly_batch = QHBoxLayout()
+        self.hly_batch.addWidget(self.ckb_batch)
+        self.hly_batch.addStretch(1)
+        self.hly_batch.addWidget(self.lbl_batch_size)
+        self.hly_batch.addWidget(self.spb_batch_size)
         # 将组件添加到布局中
         self.viewLayout.addWidget(self.title_label)
         self.viewLayout.addWidget(self.cus_file_select_widget)
+        self.viewLayout.addLayout(self.hly_batch)
         self.viewLayout.addWidget(self.lbl_warning)
 
     def get_model_path(self):
         return self.cus_file_select_widget.text()
 
+    def is_batch(self) -> bool:
+        return self.ckb_batch.isChecked()
+
+    def get_batch_size(self) -> int:
+        return self.spb_batch_size.value()
+
 
 class ModelPredict(QObject):
     def __init__(self, parent=None):
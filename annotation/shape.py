@@ -1,12 +1,14 @@
 import enum
 import math
+from collections import OrderedDict
 
-from PySide6.QtCore import QPointF, QRectF, Qt, QLineF, QSizeF, Signal, QObject
+from PySide6.QtCore import QPointF, QRectF, Qt, QLineF, QSizeF, Signal, QObject, QSize
 from PySide6.QtGui import QPolygonF, QPainterPath, QPainter, QColor, QPen, QTransform, QPainterPathStroker, QPixmap
 from PySide6.QtWidgets import QGraphicsItem, QGraphicsSceneMouseEvent, QGraphicsSceneHoverEvent
 from qfluentwidgets import themeColor
 
 from annotation.core import DrawingStatus, drawing_status_manager
+from annotation.tiled_image import TiledImage
 
 
 class ShapeType(enum.Enum):
@@ -44,6 +46,11 @@ class ShapeItem(QObject, QGraphicsItem):
         self._annotation = ""
         self._is_drawing_history = False
 
+    @property
+    def paint_margin(self) -> float:
+        """包围盒需要覆盖悬停时放大的控制点和线宽，否则局部刷新会留下残影"""
+        return self.corner_radius * 2 + 2
+
     def set_is_drawing_history(self, is_drawing_history: bool):
         self._is_drawing_history = is_drawing_history
 
@@ -67,6 +74,8 @@ class ShapeItem(QObject, QGraphicsItem):
         raise NotImplementedError
 
     def update_points(self, points: list[QPointF]):
+        # 先记录旧的包围盒，视图才能刷新移动前的区域
+        self.prepareGeometryChange()
         self.points = points
         self.update_shape()
 
@@ -77,8 +86,8 @@ class ShapeItem(QObject, QGraphicsItem):
         return self.color
 
     def update_shape(self):
-        self.update_shape_sub()
         self.prepareGeometryChange()
+        self.update_shape_sub()
         self.shape_item_geometry_changed.emit()
         self.update()
 
@@ -92,6 +101,7 @@ class ShapeItem(QObject, QGraphicsItem):
         self.is_hover = is_hover
 
     def move_by(self, offset: QPointF):
+        self.prepareGeometryChange()
         for i in range(len(self.points)):
             self.points[i] = self.points[i] + offset
         self.update_shape()
@@ -118,6 +128,7 @@ class ShapeItem(QObject, QGraphicsItem):
             #     self.points.append(point + delta)
             pass
         elif self.operation_type == ShapeItem.OperationType.Edit:
+            self.prepareGeometryChange()
             self.points[self.hover_index] = event.pos()
         else:
             pass
@@ -195,8 +206,8 @@ class RectangleItem(ShapeItem):
         return [x_center, y_center, w, h]
 
     def boundingRect(self) -> QRectF:
-        return self.rect.adjusted(-self.corner_radius, -self.corner_radius,
-                                  self.corner_radius, self.corner_radius)
+        return self.rect.adjusted(-self.paint_margin, -self.paint_margin,
+                                  self.paint_margin, self.paint_margin)
 
     def shape(self) -> QPainterPath:
         path = QPainterPath()
@@ -252,8 +263,8 @@ class PolygonItem(ShapeItem):
 
     def boundingRect(self) -> QRectF:
         rect = self.polygon.boundingRect()
-        return rect.adjusted(-self.corner_radius, -self.corner_radius,
-                             self.corner_radius, self.corner_radius)
+        return rect.adjusted(-self.paint_margin, -self.paint_margin,
+                             self.paint_margin, self.paint_margin)
 
     def shape(self) -> QPainterPath:
         path = QPainterPath()
@@ -379,8 +390,8 @@ class RotatedRectangleItem(ShapeItem):
         return data
 
     def boundingRect(self) -> QRectF:
-        return self.polygon.boundingRect().adjusted(-self.corner_radius, -self.corner_radius,
-                                                    self.corner_radius, self.corner_radius)
+        return self.polygon.boundingRect().adjusted(-self.paint_margin, -self.paint_margin,
+                                                    self.paint_margin, self.paint_margin)
 
     def shape(self) -> QPainterPath:
         path = QPainterPath()
@@ -449,8 +460,8 @@ class CircleItem(ShapeItem):
         w = radius * 2
         h = radius * 2
         rect = QRectF(x, y, w, h)
-        return rect.adjusted(-self.corner_radius, -self.corner_radius,
-                             self.corner_radius, self.corner_radius)
+        return rect.adjusted(-self.paint_margin, -self.paint_margin,
+                             self.paint_margin, self.paint_margin)
 
     def shape(self) -> QPainterPath:
         path = QPainterPath()
@@ -502,8 +513,8 @@ class PointItem(ShapeItem):
 
     def boundingRect(self) -> QRectF:
         rect = QRectF(self.points[0], QSizeF(1, 1))
-        return rect.adjusted(-self.corner_radius, -self.corner_radius,
-                             self.corner_radius, self.corner_radius)
+        return rect.adjusted(-self.paint_margin, -self.paint_margin,
+                             self.paint_margin, self.paint_margin)
 
     def shape(self) -> QPainterPath:
         path = QPainterPath()
@@ -520,6 +531,8 @@ class PointItem(ShapeItem):
             painter.drawEllipse(self.points[0], self.corner_radius, self.corner_radius)
 
     def mouseMoveEvent(self, event: QGraphicsSceneMouseEvent) -> None:
+        # 包围盒由点的位置决定，修改前通知场景，否则BSP索引中保留旧的包围盒
+        self.prepareGeometryChange()
         self.points[self.hover_index] = event.pos()
         self.update()
         super().mouseMoveEvent(event)
@@ -554,8 +567,8 @@ class LineItem(ShapeItem):
         x2 = max(self.points[0].x(), self.points[1].x())
         y2 = max(self.points[0].y(), self.points[1].y())
         rect = QRectF(QPointF(x1, y1), QPointF(x2, y2))
-        return rect.adjusted(-self.corner_radius, -self.corner_radius,
-                             self.corner_radius, self.corner_radius)
+        return rect.adjusted(-self.paint_margin, -self.paint_margin,
+                             self.paint_margin, self.paint_margin)
 
     def shape(self) -> QPainterPath:
         angle = self.line.angle()
@@ -608,25 +621,67 @@ class LineItem(ShapeItem):
                 painter.drawEllipse(point, corner_radius, corner_radius)
 
 
-class ImageItem(QGraphicsItem):
+class TiledImageItem(QGraphicsItem):
+    """
+    分块、多级细节的图片。
+    绘制时按当前缩放比例选择TiledImage的级别，只绘制与暴露区域相交的图块，
+    图块QPixmap以LRU缓存，每帧的绘制量和图块占用的内存有上限；级别的生成和按区域解码由TiledImage负责。
+    """
+    max_tiles = 128
 
-    def __init__(self, pix, parent=None):
+    def __init__(self, image: TiledImage, parent=None):
         super().__init__(parent)
-        self.pix = pix
+        self._image = image
+        self._tiles: OrderedDict[tuple[int, int, int], QPixmap] = OrderedDict()
+        # paint中通过exposedRect只绘制需要刷新的区域
+        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemUsesExtendedStyleOption)
 
-    def set_pixmap(self, pix: QPixmap):
-        self.pix = pix
+    def image_size(self) -> QSize:
+        return self._image.size()
 
     def boundingRect(self) -> QRectF:
-        rect = self.pix.rect().toRectF()
-        return rect
+        size = self._image.size()
+        return QRectF(0, 0, size.width(), size.height())
 
     def shape(self) -> QPainterPath:
         path = QPainterPath()
-        path.addRect(self.pix.rect())
-
+        path.addRect(self.boundingRect())
         return path
 
+    def _tile(self, level: int, tx: int, ty: int) -> QPixmap:
+        key = (level, tx, ty)
+        pix = self._tiles.get(key)
+        if pix is not None:
+            self._tiles.move_to_end(key)
+            return pix
+        pix = QPixmap.fromImage(self._image.tile(level, tx, ty))
+        self._tiles[key] = pix
+        while len(self._tiles) > self.max_tiles:
+            self._tiles.popitem(last=False)
+        return pix
+
     def paint(self, painter, option, widget=None):
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        painter.drawPixmap(0, 0, self.pix)
+        if self._image.is_null():
+            return
+        lod = option.levelOfDetailFromTransform(painter.worldTransform())
+        level = 0 if lod >= 1 else min(self._image.max_level(), int(math.log2(1 / lod)))
+        level = max(level, self._image.finest_level())
+        source = self._image.size()
+        level_size = self._image.level_size(level)
+        sx = source.width() / level_size.width()
+        sy = source.height() / level_size.height()
+        exposed = option.exposedRect.intersected(self.boundingRect())
+        if exposed.isEmpty():
+            return
+        tile_size = self._image.tile_size
+        x0 = int(exposed.left() / sx) // tile_size
+        y0 = int(exposed.top() / sy) // tile_size
+        x1 = min(math.ceil(exposed.right() / sx / tile_size), math.ceil(level_size.width() / tile_size))
+        y1 = min(math.ceil(exposed.bottom() / sy / tile_size), math.ceil(level_size.height() / tile_size))
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, lod * sx != 1)
+        for ty in range(y0, y1):
+            for tx in range(x0, x1):
+                pix = self._tile(level, tx, ty)
+                rect = self._image.tile_rect(level, tx, ty)
+                target = QRectF(rect.x() * sx, rect.y() * sy, rect.width() * sx, rect.height() * sy)
+                painter.drawPixmap(target, pix, QRectF(pix.rect()))
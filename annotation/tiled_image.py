@@ -0,0 +1,129 @@
+import math
+from pathlib import Path
+
+from PySide6.QtCore import QRect, QSize, Qt
+from PySide6.QtGui import QImage, QImageReader, QImageIOHandler
+
+
+def _to_paint_format(image: QImage) -> QImage:
+    # 提前转换为绘制使用的格式，界面线程转换为QPixmap时只需拷贝
+    if not image.isNull() and image.format() not in (QImage.Format.Format_RGB32,
+                                                     QImage.Format.Format_ARGB32_Premultiplied):
+        image = image.convertToFormat(QImage.Format.Format_ARGB32_Premultiplied)
+    return image
+
+
+class TiledImage:
+    """
+    分块显示用的多级图片，在预读取线程中创建。
+    第level级为原图缩小2^level倍，不保留原图的完整解码结果：
+    只有字节数不超过resident_bytes的最精细级别和比它更粗的级别常驻内存，这些级别在创建时一次生成；
+    更精细的级别在绘制时用QImageReader的clipRect和scaledSize从文件中按图块解码。
+    图片格式不支持按区域解码时，最精细只显示到常驻级别。
+    因此单张图片常驻内存不超过max_nbytes，与图片尺寸无关。
+    """
+    tile_size = 512
+    resident_bytes = 64 << 20
+    # 常驻级别加上更粗的级别，每级为上一级的1/4
+    max_nbytes = resident_bytes * 4 // 3
+
+    def __init__(self, path: str | Path | None = None):
+        self.path = Path(path).as_posix() if path else ""
+        self._size = QSize()
+        self._levels: list[QImage] = []
+        self._resident_level = 0
+        self._clip_supported = False
+        if self.path:
+            self._load()
+
+    def _load(self):
+        reader = QImageReader(self.path)
+        size = reader.size()
+        self._clip_supported = reader.supportsOption(QImageIOHandler.ImageOption.ClipRect)
+        if size.isValid():
+            self._size = size
+            self._resident_level = self._first_resident_level()
+            if self._resident_level > 0:
+                reader.setScaledSize(self.level_size(self._resident_level))
+            image = _to_paint_format(reader.read())
+        else:
+            # 不读取图片就无法得到尺寸的格式，完整解码后只保留常驻级别
+            image = _to_paint_format(reader.read())
+            self._size = image.size()
+            self._clip_supported = False
+            self._resident_level = self._first_resident_level()
+            if self._resident_level > 0 and not image.isNull():
+                image = self._scaled(image, self.level_size(self._resident_level))
+        if image.isNull():
+            self._size = QSize()
+            return
+        self._levels.append(image)
+        for level in range(self._resident_level + 1, self.max_level() + 1):
+            self._levels.append(self._scaled(self._levels[-1], self.level_size(level)))
+
+    @staticmethod
+    def _scaled(image: QImage, size: QSize) -> QImage:
+        return image.scaled(size, Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation)
+
+    def _first_resident_level(self) -> int:
+        level = 0
+        while level < self.max_level():
+            size = self.level_size(level)
+            if size.width() * size.height() * 4 <= self.resident_bytes:
+                break
+            level += 1
+        return level
+
+    def is_null(self) -> bool:
+        return not self._levels
+
+    def size(self) -> QSize:
+        return self._size
+
+    def nbytes(self) -> int:
+        return sum(image.sizeInBytes() for image in self._levels)
+
+    def max_level(self) -> int:
+        longest = max(self._size.width(), self._size.height(), 1)
+        return max(0, math.ceil(math.log2(longest / self.tile_size)))
+
+    def finest_level(self) -> int:
+        """
+        可以显示的最精细级别，支持按区域解码时为原图
+        """
+        return 0 if self._clip_supported else self._resident_level
+
+    def level_size(self, level: int) -> QSize:
+        return QSize(max(1, self._size.width() >> level), max(1, self._size.height() >> level))
+
+    def tile_rect(self, level: int, tx: int, ty: int) -> QRect:
+        """
+        图块在所在级别图片中的区域，右侧和底部的图块裁剪到图片范围内，避免拷贝出图片外的黑色像素
+        """
+        rect = QRect(tx * self.tile_size, ty * self.tile_size, self.tile_size, self.tile_size)
+        return rect.intersected(QRect(0, 0, self.level_size(level).width(), self.level_size(level).height()))
+
+    def tile(self, level: int, tx: int, ty: int) -> QImage:
+        rect = self.tile_rect(level, tx, ty)
+        if level >= self._resident_level:
+            return self._levels[level - self._resident_level].copy(rect)
+        # 常驻级别以下只解码图块对应的原图区域，并直接缩放到图块大小
+        level_size = self.level_size(level)
+        sx = self._size.width() / level_size.width()
+        sy = self._size.height() / level_size.height()
+        left, top = math.floor(rect.left() * sx), math.floor(rect.top() * sy)
+        right = min(math.ceil((rect.right() + 1) * sx), self._size.width())
+        bottom = min(math.ceil((rect.bottom() + 1) * sy), self._size.height())
+        reader = QImageReader(self.path)
+        reader.setClipRect(QRect(left, top, right - left, bottom - top))
+        if level > 0:
+            reader.setScaledSize(rect.size())
+        image = _to_paint_format(reader.read())
+        if image.isNull():
+            # 文件已被修改或删除时用常驻级别放大代替
+            resident = self._levels[0]
+            scale = 1 << (self._resident_level - level)
+            image = resident.copy(QRect(rect.x() // scale, rect.y() // scale,
+                                        max(1, rect.width() // scale), max(1, rect.height() // scale)))
+            image = self._scaled(image, rect.size())
+        return image
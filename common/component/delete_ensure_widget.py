@@ -1,7 +1,10 @@
+from typing import Callable
+
 from PySide6.QtCore import QSize, Signal, Qt
+from PySide6.QtGui import QCursor
 from PySide6.QtWidgets import QVBoxLayout, QHBoxLayout, QWidget
 from qfluentwidgets import FlyoutViewBase, BodyLabel, PrimaryPushButton, PushButton, InfoBarIcon, \
-    TransparentToolButton, StrongBodyLabel
+    TransparentToolButton, StrongBodyLabel, Flyout
 
 
 class CustomFlyoutView(FlyoutViewBase):
@@ -40,3 +43,21 @@ class CustomFlyoutView(FlyoutViewBase):
     def _connect_signals_and_slots(self):
         self.btn_ensure.clicked.connect(lambda: self.accept_status.emit(True))
         self.btn_cancel.clicked.connect(lambda: self.accept_status.emit(False))
+
+
+def show_delete_ensure_flyout(content: str, parent: QWidget, accepted_callback: Callable[[], None]):
+    """
+    在鼠标位置弹出删除确认，用于表格委托绘制的按钮等没有控件可作为锚点的场景
+    :param content: 提示内容
+    :param parent: 父窗口
+    :param accepted_callback: 确认删除后的回调
+    """
+    view = CustomFlyoutView(content=content)
+    flyout = Flyout.make(view, QCursor.pos(), parent)
+
+    def _on_accept_status(accepted: bool):
+        if accepted:
+            accepted_callback()
+        flyout.close()
+
+    view.accept_status.connect(_on_accept_status)
@@ -98,6 +98,9 @@ class PipsPager(QListWidget):
     """
 
     currentIndexChanged = Signal(int)
+    pageSizeChanged = Signal(int)
+
+    PAGE_SIZES = [5, 10, 15, 20]
 
     def __init__(self, parent=None):
         super().__init__(parent=parent)
@@ -131,8 +134,7 @@ class PipsPager(QListWidget):
         self.preButton = ScrollButton(FluentIcon.CARE_LEFT_SOLID, self)
         self.nextButton = ScrollButton(FluentIcon.CARE_RIGHT_SOLID, self)
         self.cmb_per_page_num = ComboBox(self)
-        self.cmb_per_page_num.addItems(
-            [f"5/{self.tr('page')}", f"10/{self.tr('page')}", f"15/{self.tr('page')}", f"20/{self.tr('page')}"])
+        self.cmb_per_page_num.addItems([f"{size}/{self.tr('page')}" for size in self.PAGE_SIZES])
         self.cmb_per_page_num.setFixedHeight(30)
         self.lbl_jump_to = BodyLabel(self.tr("Jump to"), self)
         self.lbl_jump_to.setFixedHeight(30)
@@ -159,13 +161,14 @@ class PipsPager(QListWidget):
         self.nextButton.clicked.connect(self.scrollNext)
         self.itemPressed.connect(self._setPressedItem)
         self.itemEntered.connect(self._setHoveredItem)
+        self.cmb_per_page_num.currentIndexChanged.connect(lambda i: self.pageSizeChanged.emit(self.PAGE_SIZES[i]))
+        self.le_page_num.returnPressed.connect(self._onJumpToPage)
 
     def _updateVisibleItems(self):
         start_index = max(0, self.currentIndex() - self.visibleNumber // 2)
         end_index = min(self.count(), start_index + self.visibleNumber)
 
         self.visible_items = [self.item(i) for i in range(start_index, end_index)]
-        print(f"Visible items: {[item.text() for item in self.visible_items]}")
 
     def _setPressedItem(self, item: QListWidgetItem):
         self.delegate.setPressedRow(self.row(item))
@@ -192,6 +195,19 @@ class PipsPager(QListWidget):
         """ get the number of page """
         return self.count()
 
+    def pageSize(self) -> int:
+        """ get the number of records per page """
+        return self.PAGE_SIZES[self.cmb_per_page_num.currentIndex()]
+
+    def setPageSize(self, size: int):
+        """ set the number of records per page, must be one of `PAGE_SIZES` """
+        self.cmb_per_page_num.setCurrentIndex(self.PAGE_SIZES.index(size))
+
+    def _onJumpToPage(self):
+        text = self.le_page_num.text()
+        if text.isdigit():
+            self.setCurrentIndex(int(text) - 1)
+
     def getVisibleNumber(self):
         """ get the number of visible pips """
         return self._visibleNumber
@@ -233,10 +249,6 @@ class PipsPager(QListWidget):
             return
         item = self.item(index)
         self.scrollToItem(item)
-        for item in self.visible_items:
-            print(item.text())
-        print("*" * 20)
-
         super().setCurrentItem(item)
         self._updateScrollButtonVisibility()
 
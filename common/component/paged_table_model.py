@@ -0,0 +1,143 @@
+from datetime import datetime
+from typing import Any
+
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from sqlalchemy.orm import Query, Session
+
+from common.database.db_helper import db_session
+from common.utils.utils import format_datatime
+
+
+class PagedTableModel(QAbstractTableModel):
+    """
+    数据库分页懒加载的表格模型。
+    筛选、排序和计数都在SQL中完成，视图滚动到末尾时才用LIMIT/OFFSET读取下一页，
+    每行只保存查询字段组成的字典，单元格由委托绘制，不为每行创建控件。
+    子类实现build_query和cell_data，key_field对应的字段作为行的唯一标识。
+    """
+    # 行的唯一标识
+    KeyRole = Qt.ItemDataRole.UserRole + 1
+    # 委托绘制使用的数据
+    ValueRole = Qt.ItemDataRole.UserRole + 2
+
+    key_field = "id"
+    page_size = 100
+
+    def __init__(self, headers: list[str], parent=None):
+        super().__init__(parent)
+        self._headers = headers
+        self._rows: list[dict] = []
+        self._key_rows: dict[Any, int] = dict()
+        self._total = 0
+        self._filters = []
+        self._order_by = []
+
+    def build_query(self, session: Session) -> Query:
+        """
+        :return: 查询的字段，不包含筛选和排序
+        """
+        raise NotImplementedError
+
+    def cell_data(self, record: dict, column: int, role: int) -> Any:
+        raise NotImplementedError
+
+    def set_filters(self, *criteria):
+        self._filters = list(criteria)
+
+    def set_order_by(self, *clauses):
+        self._order_by = list(clauses)
+
+    def _query(self, session: Session) -> Query:
+        query = self.build_query(session)
+        if self._filters:
+            query = query.filter(*self._filters)
+        return query.order_by(*self._order_by)
+
+    def refresh(self):
+        """重新计数并只读取第一页，筛选、排序或数据增删后调用"""
+        self.beginResetModel()
+        self._rows.clear()
+        self._key_rows.clear()
+        with db_session(auto_commit_exit=False) as session:
+            query = self._query(session)
+            self._total = query.order_by(None).count()
+            self._append_records(query.limit(self.page_size).all())
+        self.endResetModel()
+
+    def _append_records(self, records):
+        for record in records:
+            record = dict(record._mapping)
+            self._key_rows[record[self.key_field]] = len(self._rows)
+            self._rows.append(record)
+
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:
+        return not parent.isValid() and len(self._rows) < self._total
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()):
+        if parent.isValid():
+            return
+        start = len(self._rows)
+        with db_session(auto_commit_exit=False) as session:
+            records = self._query(session).offset(start).limit(self.page_size).all()
+        if not records:
+            # 读取期间有记录被删除
+            self._total = start
+            return
+        self.beginInsertRows(QModelIndex(), start, start + len(records) - 1)
+        self._append_records(records)
+        self.endInsertRows()
+
+    def total(self) -> int:
+        return self._total
+
+    def key(self, row: int):
+        return self._rows[row][self.key_field]
+
+    def row_of(self, key) -> int:
+        """
+        :return: 已加载行的行号，未加载时返回-1
+        """
+        return self._key_rows.get(key, -1)
+
+    def update_row(self, key, **values) -> bool:
+        """
+        只更新一行的字段并通知视图重绘该行，不重新查询数据库
+        :return: 该行是否已加载
+        """
+        row = self.row_of(key)
+        if row < 0:
+            return False
+        self._rows[row].update(values)
+        self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+        return True
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self._rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self._headers)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self._headers[section]
+        return None
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        record = self._rows[index.row()]
+        if role == self.KeyRole:
+            return record[self.key_field]
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return Qt.AlignmentFlag.AlignCenter
+        return self.cell_data(record, index.column(), role)
+
+    @staticmethod
+    def format_time(value) -> str:
+        if isinstance(value, datetime):
+            return format_datatime(value)
+        return value or ""
@@ -1,8 +1,8 @@
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, Signal
 from PySide6.QtGui import QColor
 from PySide6.QtWidgets import QVBoxLayout
 from qfluentwidgets import ProgressRing, \
-    FluentStyleSheet, isDarkTheme, IndeterminateProgressRing
+    FluentStyleSheet, isDarkTheme, IndeterminateProgressRing, PushButton
 from qfluentwidgets.components.dialog_box.mask_dialog_base import MaskDialogBase
 
 
@@ -44,6 +44,7 @@ class MessageBoxBaseTransparent(MaskDialogBase):
 
 class ProgressMessageBox(MessageBoxBaseTransparent):
     """ Custom message box """
+    cancel_clicked = Signal()
 
     def __init__(self, indeterminate=False, parent=None):
         super().__init__(parent)
@@ -56,8 +57,20 @@ class ProgressMessageBox(MessageBoxBaseTransparent):
             self.pgr.setFormat(f"{self.tr('current progress: ')}%p%")
         self.pgr.setFixedSize(300, 300)
         self.pgr.setStrokeWidth(15)
+        self.btn_cancel = PushButton(self.tr("Cancel"))
+        self.btn_cancel.setVisible(False)
+        self.btn_cancel.clicked.connect(self._on_cancel_clicked)
         # 将组件添加到布局中
         self.viewLayout.addWidget(self.pgr)
+        self.viewLayout.addWidget(self.btn_cancel, 0, Qt.AlignmentFlag.AlignHCenter)
+
+    def set_cancelable(self, cancelable: bool):
+        self.btn_cancel.setVisible(cancelable)
+
+    def _on_cancel_clicked(self):
+        # 只发出取消请求，由任务结束后关闭对话框
+        self.btn_cancel.setEnabled(False)
+        self.cancel_clicked.emit()
 
     def set_error(self, is_error: bool):
         if not self._indeterminate:
@@ -0,0 +1,146 @@
+from PySide6.QtCore import Qt, Signal, QRect, QRectF, QSize, QModelIndex, QEvent, QPoint
+from PySide6.QtGui import QPainter, QColor, QPen, QMouseEvent
+from PySide6.QtWidgets import QStyledItemDelegate, QStyleOptionViewItem, QTableView
+from qfluentwidgets import isDarkTheme, themeColor
+from qfluentwidgets.common.icon import drawIcon
+
+from common.component.paged_table_model import PagedTableModel
+
+
+class _CellDelegate(QStyledItemDelegate):
+    """
+    单元格委托基类，先由表格默认的委托绘制行背景，保持悬停和选中效果一致，再绘制单元格内容
+    """
+
+    def __init__(self, parent: QTableView):
+        super().__init__(parent)
+
+    def paint(self, painter: QPainter, option: QStyleOptionViewItem, index: QModelIndex) -> None:
+        self.parent().itemDelegate().paint(painter, QStyleOptionViewItem(option), index)
+        value = index.data(PagedTableModel.ValueRole)
+        if value is None:
+            return
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        self.paint_cell(painter, option.rect, value)
+        painter.restore()
+
+    def paint_cell(self, painter: QPainter, rect: QRect, value):
+        raise NotImplementedError
+
+
+class TagItemDelegate(_CellDelegate):
+    """
+    绘制与TextTagWidget相同样式的标签，数据为(文字, 浅色主题颜色, 深色主题颜色)
+    """
+    tag_size = QSize(100, 26)
+
+    def paint_cell(self, painter: QPainter, rect: QRect, value):
+        text, light_color, dark_color = value
+        color = dark_color if isDarkTheme() else light_color
+        tag_rect = QRect(QPoint(0, 0), self.tag_size)
+        tag_rect.moveCenter(rect.center())
+        painter.setPen(QPen(color, 2))
+        painter.drawText(tag_rect, Qt.AlignmentFlag.AlignCenter, text)
+        painter.setBrush(QColor(color.red(), color.green(), color.blue(), 100))
+        painter.drawRoundedRect(tag_rect, 4, 4)
+
+
+class ProgressItemDelegate(_CellDelegate):
+    """
+    绘制与CustomProcessBar相同样式的进度条，数据为(当前值, 最大值, 状态)
+    """
+    NORMAL = 0
+    PAUSED = 1
+    ERROR = 2
+
+    margin = 12
+    text_width = 64
+
+    def paint_cell(self, painter: QPainter, rect: QRect, value):
+        value, maximum, state = value
+        bar_rect = rect.adjusted(self.margin, 0, -self.margin - self.text_width, 0)
+        y = rect.center().y()
+
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor(255, 255, 255, 155) if isDarkTheme() else QColor(0, 0, 0, 155))
+        painter.drawRect(QRectF(bar_rect.x(), y, bar_rect.width(), 1))
+        if maximum > 0 and value > 0:
+            if state == self.PAUSED:
+                color = QColor(252, 225, 0) if isDarkTheme() else QColor(157, 93, 0)
+            elif state == self.ERROR:
+                color = QColor(255, 153, 164) if isDarkTheme() else QColor(196, 43, 28)
+            else:
+                color = themeColor()
+            painter.setBrush(color)
+            width = bar_rect.width() * min(value, maximum) / maximum
+            painter.drawRoundedRect(QRectF(bar_rect.x(), y - 1, width, 3), 1.5, 1.5)
+
+        text_rect = QRect(bar_rect.right() + 8, rect.y(), self.text_width - 8, rect.height())
+        painter.setPen(QColor(255, 255, 255) if isDarkTheme() else QColor(0, 0, 0))
+        painter.drawText(text_rect, Qt.AlignmentFlag.AlignCenter, f"{value}/{maximum}")
+
+
+class OperationButton:
+    def __init__(self, name: str, icon, background_color: QColor = None):
+        self.name = name
+        self.icon = icon
+        self.background_color = background_color
+
+
+class OperationItemDelegate(_CellDelegate):
+    """
+    绘制与FillToolButton相同样式的操作按钮并处理点击，数据为当前行可见按钮的名称
+    """
+    # 按钮名称，行的唯一标识
+    button_clicked = Signal(str, object)
+
+    button_size = 24
+    icon_size = 16
+    spacing = 6
+    separator_width = 8
+
+    def __init__(self, buttons: list[OperationButton], parent: QTableView):
+        super().__init__(parent)
+        self._buttons = {button.name: button for button in buttons}
+
+    def _button_rects(self, rect: QRect, names) -> list[tuple[str, QRect]]:
+        names = [name for name in names if name in self._buttons]
+        step = self.button_size + self.spacing * 2 + self.separator_width
+        width = len(names) * step - self.spacing * 2 - self.separator_width
+        x = rect.center().x() - width // 2
+        y = rect.center().y() - self.button_size // 2
+        rects = []
+        for name in names:
+            rects.append((name, QRect(x, y, self.button_size, self.button_size)))
+            x += step
+        return rects
+
+    def paint_cell(self, painter: QPainter, rect: QRect, value):
+        separator_color = QColor(255, 255, 255, 197) if isDarkTheme() else QColor(0, 0, 0, 200)
+        rects = self._button_rects(rect, value)
+        for i, (name, button_rect) in enumerate(rects):
+            button = self._buttons[name]
+            bg_color = QColor(button.background_color or themeColor())
+            bg_color.setAlpha(40)
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(bg_color)
+            painter.drawRoundedRect(button_rect.adjusted(0, 0, -1, -1), 4, 4)
+            offset = (self.button_size - self.icon_size) / 2
+            drawIcon(button.icon, painter,
+                     QRectF(button_rect.x() + offset, button_rect.y() + offset, self.icon_size, self.icon_size))
+            if i < len(rects) - 1:
+                painter.setPen(separator_color)
+                separator_rect = QRect(button_rect.right() + self.spacing, rect.y(), self.separator_width,
+                                       rect.height())
+                painter.drawText(separator_rect, Qt.AlignmentFlag.AlignCenter, "|")
+
+    def editorEvent(self, event: QEvent, model, option: QStyleOptionViewItem, index: QModelIndex) -> bool:
+        if event.type() == QEvent.Type.MouseButtonRelease and isinstance(event, QMouseEvent) \
+                and event.button() == Qt.MouseButton.LeftButton:
+            names = index.data(PagedTableModel.ValueRole) or []
+            for name, button_rect in self._button_rects(option.rect, names):
+                if button_rect.contains(event.position().toPoint()):
+                    self.button_clicked.emit(name, index.data(PagedTableModel.KeyRole))
+                    return True
+        return super().editorEvent(event, model, option, index)
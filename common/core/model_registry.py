@@ -0,0 +1,90 @@
+import gc
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import torch
+from loguru import logger
+
+from ultralytics import YOLO
+from ultralytics.engine.results import Results
+
+
+class _ModelEntry:
+    def __init__(self, model: YOLO):
+        self.model = model
+        # 同一个模型实例的predictor不是线程安全的，推理时需持有该锁
+        self.lock = threading.Lock()
+
+
+class ModelRegistry:
+    """
+    进程内共享的推理模型缓存。
+    以(模型路径, 修改时间, 设备, 半精度, 输入尺寸)为键复用已加载、已预热的YOLO实例，
+    超过上限时按最近最少使用(LRU)淘汰，模型文件更新或任务删除时可显式释放。
+    """
+
+    def __init__(self, max_models: int = 4):
+        self.max_models = max_models
+        self._entries: OrderedDict[tuple, _ModelEntry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model_path: Path | str, device: str = "", half: bool = False, imgsz: int | list = 640) -> tuple:
+        model_path = Path(model_path).resolve()
+        imgsz = tuple(imgsz) if isinstance(imgsz, (list, tuple)) else imgsz
+        return model_path.as_posix(), os.stat(model_path).st_mtime_ns, str(device), bool(half), imgsz
+
+    def acquire(self, model_path: Path | str, device: str = "", half: bool = False,
+                imgsz: int | list = 640) -> _ModelEntry:
+        """
+        获取模型，未缓存时加载
+        :raise FileNotFoundError: 模型文件不存在
+        """
+        key = self.make_key(model_path, device, half, imgsz)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        # 加载耗时较长，不持有全局锁，同一模型被并发加载时以先放入的为准
+        entry = _ModelEntry(YOLO(key[0]))
+        with self._lock:
+            # 模型文件被覆盖后，旧版本的实例不会再命中
+            for stale_key in [k for k in self._entries if k[0] == key[0] and k[1] != key[1]]:
+                self._entries.pop(stale_key)
+            entry = self._entries.setdefault(key, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_models:
+                evicted_key, _ = self._entries.popitem(last=False)
+                logger.info(f"release model: {evicted_key[0]}")
+        return entry
+
+    def predict(self, model_path: Path | str, source, **kwargs) -> list[Results]:
+        """
+        使用缓存的模型推理，device/half/imgsz参与缓存键，其余参数直接传给predict
+        """
+        entry = self.acquire(model_path, kwargs.get("device", ""), kwargs.get("half", False),
+                             kwargs.get("imgsz", 640))
+        with entry.lock:
+            return entry.model.predict(source, **kwargs)
+
+    def release(self, model_path: Path | str | None = None):
+        """
+        释放模型
+        :param model_path: 模型路径或其所在目录，为None时释放全部模型
+        """
+        with self._lock:
+            if model_path is None:
+                self._entries.clear()
+            else:
+                prefix = Path(model_path).resolve().as_posix()
+                for key in [k for k in self._entries if k[0] == prefix or k[0].startswith(prefix + "/")]:
+                    self._entries.pop(key)
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+
+model_registry = ModelRegistry()
@@ -1,13 +1,31 @@
 import contextlib
 from typing import ContextManager
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 Base = declarative_base()
 # 创建数据库引擎
 engine = create_engine('sqlite:///db.sqlite3', echo=False)
+
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragma(dbapi_connection, _):
+    """
+    WAL模式下读写互不阻塞，训练线程写入时界面仍可查询；
+    WAL模式下synchronous=NORMAL只在检查点时同步磁盘，断电最多丢失最近的事务，不会损坏数据库
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    # 负数单位为KiB
+    cursor.execute("PRAGMA cache_size=-16384")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.close()
+
 Session = sessionmaker(bind=engine)
 
 
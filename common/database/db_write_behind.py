@@ -0,0 +1,73 @@
+import atexit
+import threading
+
+from loguru import logger
+
+from common.database.db_helper import db_session
+
+
+class DbWriteBehind:
+    """
+    高频更新的延迟批量写入。
+    同一条记录的多次更新在内存中合并，只保留每个字段的最新值，
+    后台线程定期在一个事务中批量写入，调用方不会等待数据库。
+    """
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        # (model, 过滤条件) -> 字段的最新值
+        self._pending: dict[tuple, dict] = dict()
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+
+    def update(self, model, values: dict, **filters):
+        """
+        提交一次更新，例如 update(TrainTask, {"epoch": 1}, task_id="xxx")
+        """
+        key = (model, tuple(sorted(filters.items())))
+        with self._condition:
+            if self._closed:
+                return
+            self._pending.setdefault(key, dict()).update(values)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="db_write_behind", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def flush(self):
+        """立即写入全部待写数据"""
+        with self._flush_lock:
+            with self._condition:
+                pending, self._pending = self._pending, dict()
+            if not pending:
+                return
+            try:
+                with db_session() as session:
+                    for (model, filters), values in pending.items():
+                        session.query(model).filter_by(**dict(filters)).update(values, synchronize_session=False)
+            except Exception as e:
+                logger.error(f"write behind flush failed: {e}")
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self.flush()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+            # 等待一个周期，合并这段时间内的更新
+            with self._condition:
+                self._condition.wait(self.interval)
+            self.flush()
+
+
+db_write_behind = DbWriteBehind()
+atexit.register(db_write_behind.close)
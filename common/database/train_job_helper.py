@@ -0,0 +1,67 @@
+from datetime import datetime
+
+from common.database.db_helper import db_session
+from home.types import TrainJobStatus, TrainTaskStatus
+from models.models import TrainJob, TrainTask
+
+
+def db_enqueue_train_job(task_id: str, priority: int = 0) -> bool:
+    """
+    加入训练队列，已在队列中时只更新优先级
+    :return: 是否新加入队列
+    """
+    with db_session() as session:
+        job: TrainJob = session.query(TrainJob).filter_by(task_id=task_id).first()
+        if job is not None:
+            job.priority = priority
+            return False
+        session.add(TrainJob(task_id=task_id, priority=priority, job_status=TrainJobStatus.QUEUED.value,
+                             enqueue_time=datetime.now()))
+        return True
+
+
+def db_get_queued_train_jobs() -> list[tuple[str, int]]:
+    """
+    :return: 排队中的(task_id, priority)，按优先级从高到低、入队时间从早到晚排序
+    """
+    with db_session(auto_commit_exit=False) as session:
+        jobs = (session.query(TrainJob.task_id, TrainJob.priority)
+                .filter_by(job_status=TrainJobStatus.QUEUED.value)
+                .order_by(TrainJob.priority.desc(), TrainJob.enqueue_time, TrainJob.id)
+                .all())
+        return [(task_id, priority) for task_id, priority in jobs]
+
+
+def db_is_train_job_queued(task_id: str) -> bool:
+    with db_session(auto_commit_exit=False) as session:
+        return session.query(TrainJob).filter_by(task_id=task_id,
+                                                 job_status=TrainJobStatus.QUEUED.value).first() is not None
+
+
+def db_update_train_job_status(task_id: str, status: TrainJobStatus):
+    with db_session() as session:
+        job: TrainJob = session.query(TrainJob).filter_by(task_id=task_id).first()
+        if job is not None:
+            job.job_status = status.value
+
+
+def db_remove_train_job(task_id: str):
+    with db_session() as session:
+        session.query(TrainJob).filter_by(task_id=task_id).delete()
+
+
+def db_requeue_interrupted_train_jobs() -> list[str]:
+    """
+    程序退出或异常结束时运行中的任务重新排队，对应训练任务的状态改为暂停，从保存的断点继续训练
+    :return: 重新排队的task_id
+    """
+    with db_session() as session:
+        jobs: list[TrainJob] = session.query(TrainJob).filter_by(job_status=TrainJobStatus.RUNNING.value).all()
+        task_ids = [job.task_id for job in jobs]
+        for job in jobs:
+            job.job_status = TrainJobStatus.QUEUED.value
+        if task_ids:
+            (session.query(TrainTask)
+             .filter(TrainTask.task_id.in_(task_ids), TrainTask.task_status == TrainTaskStatus.TRAINING.value)
+             .update({TrainTask.task_status: TrainTaskStatus.TRN_PAUSE.value}, synchronize_session=False))
+        return task_ids
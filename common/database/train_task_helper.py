@@ -1,55 +1,81 @@
 from datetime import datetime
+from pathlib import Path
 
+from common.component.model_type_widget import ModelType
 from common.database.db_helper import db_session
-from home.types import TrainTaskStatus
+from common.database.db_write_behind import db_write_behind
+from home.types import TrainTaskInfo, TrainTaskStatus
 from models.models import TrainTask
 
 
-def db_update_task_status(task_id, status: TrainTaskStatus):
+def _update_task(task_id, values: dict):
     with db_session() as session:
-        task: TrainTask = session.query(TrainTask).filter_by(task_id=task_id).first()
-        task.task_status = status.value
+        session.query(TrainTask).filter_by(task_id=task_id).update(values, synchronize_session=False)
+
+
+def db_update_task_status(task_id, status: TrainTaskStatus):
+    _update_task(task_id, {TrainTask.task_status: status.value})
 
 
 def db_update_task_epoch_info(task_id, epoch, epochs):
-    with db_session() as session:
-        task = session.query(TrainTask).filter_by(task_id=task_id).first()
-        task.epoch = epoch
-        task.epochs = epochs
+    # 每个epoch都会更新，延迟批量写入，不阻塞训练事件的处理
+    db_write_behind.update(TrainTask, {TrainTask.epoch: epoch, TrainTask.epochs: epochs}, task_id=task_id)
 
 
 def db_update_task_pause(task_id):
-    with db_session() as session:
-        task = session.query(TrainTask).filter_by(task_id=task_id).first()
-        task.task_status = TrainTaskStatus.TRN_PAUSE.value
+    _update_task(task_id, {TrainTask.task_status: TrainTaskStatus.TRN_PAUSE.value})
 
 
 def db_update_task_finished(task_id, end_time: datetime, elapsed: str):
-    with db_session() as session:
-        task: TrainTask = session.query(TrainTask).filter_by(task_id=task_id).first()
-        task.task_status = TrainTaskStatus.TRN_FINISHED.value
-        task.end_time = end_time
-        task.elapsed = elapsed
+    _update_task(task_id, {TrainTask.task_status: TrainTaskStatus.TRN_FINISHED.value,
+                           TrainTask.end_time: end_time,
+                           TrainTask.elapsed: elapsed})
 
 
 def db_update_task_started(task_id, start_time: datetime):
-    with db_session() as session:
-        task: TrainTask = session.query(TrainTask).filter_by(task_id=task_id).first()
-        task.task_status = TrainTaskStatus.TRAINING.value
-        task.start_time = start_time
-        task.end_time = None
-        task.elapsed = None
+    _update_task(task_id, {TrainTask.task_status: TrainTaskStatus.TRAINING.value,
+                           TrainTask.start_time: start_time,
+                           TrainTask.end_time: None,
+                           TrainTask.elapsed: None})
 
 
 def db_update_task_failed(task_id):
-    with db_session() as session:
-        task: TrainTask = session.query(TrainTask).filter_by(task_id=task_id).first()
-        task.task_status = TrainTaskStatus.TRN_FAILED.value
-        task.end_time = None
-        task.elapsed = None
+    _update_task(task_id, {TrainTask.task_status: TrainTaskStatus.TRN_FAILED.value,
+                           TrainTask.end_time: None,
+                           TrainTask.elapsed: None})
 
 
-def db_get_project_id(task_id: str) -> str:
-    with db_session() as session:
+# 任务所属的项目不会改变，只缓存已查到的结果
+_project_id_cache: dict[str, str] = dict()
+_project_id_cache_size = 4096
+
+
+def db_get_project_id(task_id: str) -> str | None:
+    """
+    查询任务所属的项目，任务尚未提交到数据库时返回None且不缓存，之后再次查询可以得到结果
+    """
+    project_id = _project_id_cache.get(task_id)
+    if project_id is not None:
+        return project_id
+    with db_session(auto_commit_exit=False) as session:
+        project_id = session.query(TrainTask.project_id).filter_by(task_id=task_id).scalar()
+    if project_id is not None:
+        if len(_project_id_cache) >= _project_id_cache_size:
+            _project_id_cache.clear()
+        _project_id_cache[task_id] = project_id
+    return project_id
+
+
+def db_get_train_task_info(task_id: str) -> TrainTaskInfo | None:
+    with db_session(auto_commit_exit=False) as session:
         task: TrainTask = session.query(TrainTask).filter_by(task_id=task_id).first()
-        return task.project_id
+        if task is None:
+            return None
+        task_info = TrainTaskInfo()
+        task_info.task_id = task.task_id
+        task_info.dataset_id = task.dataset_id
+        task_info.project_id = task.project_id
+        task_info.task_status = TrainTaskStatus(task.task_status)
+        task_info.model_type = ModelType(task.project.model_type)
+        task_info.task_dir = Path(task.project.project_dir) / task_id
+        return task_info
@@ -3,6 +3,7 @@ import pandas as pd
 from .classify_dataset_draw_widget import ClassifyDatasetDrawWidget
 from ..common.dataset_detail_widget_base import DatasetDetailWidgetBase
 from ..common.label_table_Widget import SplitLabelInfo
+from ...dataset_process.split_manifest import SplitManifest
 from ...types import DatasetType
 
 
@@ -15,21 +16,23 @@ class ClassifyDatasetDetailWidget(DatasetDetailWidgetBase):
         draw_widget = ClassifyDatasetDrawWidget()
         self.draw_widget = draw_widget
         self.hly_content.addWidget(draw_widget)
-    def load_split_info(self, dataset_df: pd.DataFrame) -> list[SplitLabelInfo]:
-        all_num = dataset_df.shape[0]
-        train_num = dataset_df.groupby("type").groups[DatasetType.TRAIN.value].size
-        val_num = dataset_df.groupby("type").groups[DatasetType.VAL.value].size
-        test_num = dataset_df.groupby("type").groups[DatasetType.TEST.value].size
-        info = SplitLabelInfo(label="All", all_num=all_num, train_num=train_num, val_num=val_num, test_num=test_num)
+
+    def load_split_info(self, split_manifest: SplitManifest) -> list[SplitLabelInfo]:
+        type_counts = split_manifest.type_counts
+        info = SplitLabelInfo(label="All", all_num=len(split_manifest),
+                              train_num=type_counts[DatasetType.TRAIN.value],
+                              val_num=type_counts[DatasetType.VAL.value],
+                              test_num=type_counts[DatasetType.TEST.value])
         dataset_split_num_info = [info]
-        for key, group in dataset_df.groupby("label").groups.items():
-            label_df = dataset_df[(dataset_df["label"] == key)]
-            label_dataset_num = group.size
-            train_num = label_df[label_df["type"] == DatasetType.TRAIN.value].shape[0]
-            val_num = label_df[label_df["type"] == DatasetType.VAL.value].shape[0]
-            test_num = label_df[label_df["type"] == DatasetType.TEST.value].shape[0]
-            dataset_split_num_info.append(SplitLabelInfo(label=key,
-                                                         all_num=label_dataset_num,
+        label_df = split_manifest.select(columns=["label", "type"])
+        split_types = [DatasetType.TRAIN.value, DatasetType.VAL.value, DatasetType.TEST.value]
+        df_counter = pd.crosstab(label_df["label"], label_df["type"]).reindex(columns=split_types, fill_value=0)
+        for label, value in df_counter.iterrows():
+            train_num = value[DatasetType.TRAIN.value]
+            val_num = value[DatasetType.VAL.value]
+            test_num = value[DatasetType.TEST.value]
+            dataset_split_num_info.append(SplitLabelInfo(label=label,
+                                                         all_num=train_num + val_num + test_num,
                                                          train_num=train_num,
                                                          val_num=val_num,
                                                          test_num=test_num))
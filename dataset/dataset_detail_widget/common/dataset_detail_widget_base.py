@@ -1,4 +1,3 @@
-from collections import Counter
 from pathlib import Path
 
 import pandas as pd
@@ -6,13 +5,17 @@ import yaml
 from PySide6.QtCore import Slot, Signal
 from PySide6.QtWidgets import QVBoxLayout, QWidget, QHBoxLayout
 
+from common.component.progress_message_box import ProgressMessageBox
+from common.core.window_manager import window_manager
 from common.database.db_helper import db_session
 from common.utils.raise_info_bar import raise_error
 from models.models import Dataset
 from .dataset_draw_widget_base import DatasetDrawWidgetBase
+from .dataset_split_thread import DatasetSplitThread
 from .label_table_Widget import SplitLabelInfo, DatasetLabelsInfoWidget
+from ...dataset_process.label_index import LabelIndex
+from ...dataset_process.split_manifest import SplitManifest
 from ...dataset_process.utils import load_split_dataset
-from ...dataset_process.dataset_split import DatasetSplit
 from ...types import DatasetInfo, DatasetStatus, DatasetType
 
 
@@ -37,6 +40,9 @@ class DatasetDetailWidgetBase(QWidget):
         self._dataset_map = dict()
         self._total_dataset = 0
         self._split_rates = []
+        self._split_thread: DatasetSplitThread | None = None
+        self._split_df: pd.DataFrame | None = None
+        self._message_box: ProgressMessageBox | None = None
         self.set_draw_widget()
 
     def set_draw_widget(self):
@@ -49,42 +55,32 @@ class DatasetDetailWidgetBase(QWidget):
             self._split_rates = [int(rate) for rate in dataset.split_rate.split("_")]
             self._total_dataset = dataset.dataset_total
         if dataset_info.dataset_status == DatasetStatus.CHECKED:
-            dataset_df = load_split_dataset(Path(self._dataset_info.dataset_dir))
-            self._load_dataset(dataset_df)
-            return True
+            split_manifest = load_split_dataset(Path(self._dataset_info.dataset_dir))
+            if split_manifest is not None:
+                self._load_dataset(split_manifest)
+                return True
+            return self.split_dataset(self._split_rates)
         else:
             return self.split_dataset(self._split_rates)
 
     def get_dataset_split(self):
         return self._total_dataset, self._split_rates
 
-    def load_split_info(self, dataset_df: pd.DataFrame) -> list[SplitLabelInfo]:
+    def load_split_info(self, split_manifest: SplitManifest) -> list[SplitLabelInfo]:
         with open(Path(self._dataset_info.dataset_dir) / "split" / "config.yaml", "r", encoding="utf8") as f:
             config_info = yaml.safe_load(f)
         classes = config_info.get("names", dict())
-        all_num = dataset_df.shape[0]
-        train_num = dataset_df.groupby("type").groups[DatasetType.TRAIN.value].size
-        val_num = dataset_df.groupby("type").groups[DatasetType.VAL.value].size
-        if DatasetType.TEST.value in dataset_df.groupby("type"):
-            test_num = dataset_df.groupby("type").groups[DatasetType.TEST.value].size
-        else:
-            test_num = 0
-        info = SplitLabelInfo(label="All images", all_num=all_num, train_num=train_num,
-                              val_num=val_num, test_num=test_num)
+        type_counts = split_manifest.type_counts
+        info = SplitLabelInfo(label="All images", all_num=len(split_manifest),
+                              train_num=type_counts[DatasetType.TRAIN.value],
+                              val_num=type_counts[DatasetType.VAL.value],
+                              test_num=type_counts[DatasetType.TEST.value])
         dataset_split_num_info = [info]
-        labels_map = dict()
-
-        for key, group in dataset_df.groupby("type").groups.items():
-            label_df = dataset_df.loc[group, "label_path"]
-            labels = []
-            for label_path in label_df:
-                with open(label_path, "r", encoding="utf8") as f:
-                    data = f.readlines()
-                    for line in data:
-                        label = line.split(" ")[0]
-                        labels.append(label)
-            labels_map[key] = Counter(labels)
-        df_counter = pd.DataFrame(labels_map).fillna(0).astype(int).sort_index()
+
+        # 标签统计来自标签索引，只有新增或修改过的标签文件才会被重新解析
+        label_index = LabelIndex(self._dataset_info.dataset_dir)
+        label_index.update()
+        df_counter = label_index.split_statistics(split_manifest.select(columns=["label_path", "type"]))
         df_sum = df_counter.sum().to_frame().T.reset_index(names="label")
         df_sum["label"] = -1
         df_counter = df_counter.reset_index(names="label")
@@ -110,17 +106,30 @@ class DatasetDetailWidgetBase(QWidget):
 
         return dataset_split_num_info
 
-    def _load_dataset(self, dataset_df: pd.DataFrame):
-        split_info = self.load_split_info(dataset_df)
+    def _load_dataset(self, split_manifest: SplitManifest):
+        split_info = self.load_split_info(split_manifest)
         self.labels_widget.update_table(self._split_rates, split_info)
-        self.draw_widget.update_dataset(dataset_df)
+        self.draw_widget.set_dataset_dir(self._dataset_info.dataset_dir)
+        self.draw_widget.update_dataset(split_manifest)
         self.load_dataset_finished.emit(self._total_dataset, self._split_rates)
 
     @Slot(list)
     def split_dataset(self, split_rates) -> bool:
+        if self._split_thread and self._split_thread.isRunning():
+            return False
         self._split_rates = split_rates
-        dataset_df = (DatasetSplit(self._dataset_info.model_type).
-                      split(self._dataset_info.dataset_dir, self._split_rates))
+        # 划分在后台线程中进行，界面只显示进度，弹窗在划分结束后关闭
+        self._split_df = None
+        self._split_thread = DatasetSplitThread(self._dataset_info.model_type, self._dataset_info.dataset_dir,
+                                                self._split_rates)
+        self._split_thread.split_progress_changed.connect(self._on_split_progress_changed)
+        self._split_thread.split_finished.connect(self._on_split_finished)
+        self._split_thread.start()
+        self._message_box = ProgressMessageBox(parent=window_manager.find_window("main_widget"))
+        self._message_box.exec()
+        self._split_thread.wait()
+        self._split_thread = None
+        dataset_df, self._split_df = self._split_df, None
         if dataset_df is None:
             error_msg = self.tr("Dataset import failed!Please check the dataset.")
             raise_error(self.tr("Dataset import failed!"), error_msg)
@@ -131,5 +140,18 @@ class DatasetDetailWidgetBase(QWidget):
         with db_session() as session:
             dataset = session.query(Dataset).filter_by(dataset_id=self._dataset_info.dataset_id).first()
             dataset.dataset_total = dataset_df.shape[0]
-        self._load_dataset(dataset_df)
+        self._load_dataset(load_split_dataset(Path(self._dataset_info.dataset_dir)))
         return True
+
+    @Slot(int, int)
+    def _on_split_progress_changed(self, finished: int, total: int):
+        if self._message_box:
+            self._message_box.set_max_value(total)
+            self._message_box.set_value(finished)
+
+    @Slot(object)
+    def _on_split_finished(self, dataset_df: pd.DataFrame | None):
+        self._split_df = dataset_df
+        if self._message_box:
+            self._message_box.close()
+            self._message_box = None
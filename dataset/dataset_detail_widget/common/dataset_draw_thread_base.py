@@ -1,35 +1,127 @@
-from pathlib import Path
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
 
 import pandas as pd
-from PySide6.QtCore import QThread, Signal
-from PySide6.QtGui import QPixmap, QColor
+from PySide6.QtCore import QObject, Signal, QSize, Qt
+from PySide6.QtGui import QImage, QColor
+from loguru import logger
 
-from common.utils.utils import generate_color_map
+from common.utils.utils import colors
+from .thumbnail_cache import ThumbnailCache
 
 
-class DatasetDrawThreadBase(QThread):
-    draw_one_image = Signal(str, QPixmap)
+class DatasetDrawThreadBase(QObject):
+    """
+    数据集预览的缩略图绘制器。
+    视图请求某一行时才把解码、标签绘制和缩放提交到线程池并行完成，结果通过信号按行号返回；
+    每次重新绘制都会递增generation，旧批次中尚未完成的任务会被直接丢弃。
+    """
+    # generation, row, thumbnail
+    draw_one_image = Signal(int, int, QImage)
 
     def __init__(self):
         super().__init__()
-        self.max_draw_num = 50
         self.draw_labels = False
         self.color_list: list[QColor] = []
         self.labels = []
         self.image_paths: pd.DataFrame = pd.DataFrame()
+        self.thumbnail_size = QSize(120, 120)
+        self.thumbnail_cache: ThumbnailCache | None = None
+        self._label_signature = ""
+        self._generation = 0
+        # 排队中的任务上限，快速滚动时先丢弃最早提交、已经滚出可见区域的请求
+        self.max_pending = 256
+        self._futures: OrderedDict[int, Future] = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1,
+                                            thread_name_prefix="dataset_draw")
+
+    @property
+    def generation(self) -> int:
+        return self._generation
 
     def set_dataset_path(self, dataset_paths: pd.DataFrame):
         self.image_paths = dataset_paths
 
     def set_dataset_label(self, labels):
         self.labels = list(labels)
-        self.color_list = generate_color_map(len(labels))
+        # 使用固定调色板，保证缓存的缩略图与新绘制的颜色一致
+        self.color_list = [QColor(*colors(i)) for i in range(len(self.labels))]
+        self._label_signature = hashlib.sha1("\n".join(map(str, self.labels)).encode("utf8")).hexdigest()
 
     def set_draw_labels_status(self, status: bool):
         self.draw_labels = status
 
-    def set_max_draw_nums(self, max_draw_num: int):
-        self.max_draw_num = max_draw_num
+    def set_thumbnail_size(self, size: QSize):
+        self.thumbnail_size = size
+
+    def set_thumbnail_cache(self, thumbnail_cache: ThumbnailCache | None):
+        self.thumbnail_cache = thumbnail_cache
+
+    def cancel(self):
+        """
+        作废当前批次，正在排队的任务不会再绘制，已发出的结果可通过generation识别并忽略
+        """
+        with self._lock:
+            self._generation += 1
+            for future in self._futures.values():
+                future.cancel()
+            self._futures.clear()
+
+    def request_thumbnail(self, row_index: int, row: dict):
+        with self._lock:
+            if row_index in self._futures:
+                return
+            self._futures[row_index] = self._executor.submit(self._render_thumbnail, self._generation, row_index,
+                                                             row, QSize(self.thumbnail_size), self.draw_labels)
+            while len(self._futures) > self.max_pending:
+                _, future = self._futures.popitem(last=False)
+                future.cancel()
 
-    def run(self):
+    @staticmethod
+    def load_image(image_path: str) -> QImage:
+        image = QImage(image_path)
+        # 灰度、索引色等格式无法绘制彩色标签，统一转换为32位格式
+        if image.format() not in (QImage.Format.Format_RGB32, QImage.Format.Format_ARGB32,
+                                  QImage.Format.Format_ARGB32_Premultiplied):
+            image = image.convertToFormat(QImage.Format.Format_ARGB32_Premultiplied)
+        return image
+
+    def draw_image(self, row: dict, draw_labels: bool) -> QImage:
+        """
+        读取原图并绘制标签，返回原始分辨率的图片，会在线程池中被并发调用
+        :param row: 数据集中的一行，至少包含image_path
+        :param draw_labels: 是否绘制标签
+        """
         raise NotImplementedError
+
+    def _render_thumbnail(self, generation: int, row_index: int, row: dict, size: QSize, draw_labels: bool):
+        if generation != self._generation:
+            return
+        try:
+            thumbnail = self._draw_thumbnail(row, size, draw_labels)
+        except Exception as e:
+            logger.error(f"draw image failed: {row['image_path']}, {e}")
+            thumbnail = QImage()
+        with self._lock:
+            if generation == self._generation:
+                self._futures.pop(row_index, None)
+        self.draw_one_image.emit(generation, row_index, thumbnail)
+
+    def _draw_thumbnail(self, row: dict, size: QSize, draw_labels: bool) -> QImage:
+        key = None
+        if self.thumbnail_cache is not None:
+            key = self.thumbnail_cache.make_key(row["image_path"], row.get("label_path"), size,
+                                                draw_labels, self._label_signature)
+            image = self.thumbnail_cache.get(key)
+            if image is not None:
+                return image
+        image = self.draw_image(row, draw_labels)
+        thumbnail = image.scaled(size, Qt.AspectRatioMode.KeepAspectRatio,
+                                 Qt.TransformationMode.SmoothTransformation)
+        if key is not None:
+            self.thumbnail_cache.put(key, thumbnail)
+        return thumbnail
@@ -1,13 +1,17 @@
 import enum
+from pathlib import Path
 
 import pandas as pd
-from PySide6.QtCore import Slot, Qt, QSize
-from PySide6.QtGui import QIcon, QPixmap, QCursor
-from PySide6.QtWidgets import QVBoxLayout, QHBoxLayout, QListView, QListWidgetItem, QApplication
-from qfluentwidgets import SimpleCardWidget, ComboBox, CheckBox, ListWidget
+from PySide6.QtCore import Slot, Qt, QSize, QModelIndex
+from PySide6.QtGui import QPixmap, QCursor
+from PySide6.QtWidgets import QVBoxLayout, QHBoxLayout, QListView
+from qfluentwidgets import SimpleCardWidget, ComboBox, CheckBox, ListView
 
 from common.component.image_tip_widget import ImageTip
 from .dataset_draw_thread_base import DatasetDrawThreadBase
+from .dataset_image_list_model import DatasetImageListModel, DatasetImageDelegate
+from .thumbnail_cache import ThumbnailCache
+from ...dataset_process.split_manifest import SplitManifest
 from ...types import DatasetType
 
 
@@ -20,12 +24,6 @@ class ImageItemSize(enum.Enum):
 class DatasetDrawWidgetBase(SimpleCardWidget):
     def __init__(self):
         super().__init__()
-        self.cmb_dataset_max_num = ComboBox()
-        self.cmb_dataset_max_num.addItems(["50", "100", "200", "500"])
-        self.cmb_dataset_max_num.setCurrentIndex(1)
-        self.cmb_dataset_max_num.setMinimumWidth(100)
-        self.cmb_dataset_max_num.setMaximumWidth(300)
-
         self.cmb_dataset_resolution = ComboBox()
         self.cmb_dataset_resolution.addItems([self.tr("small"), self.tr("medium"), self.tr("large")])
         self.cmb_dataset_resolution.setItemData(0, ImageItemSize.SMALL)
@@ -56,36 +54,41 @@ class DatasetDrawWidgetBase(SimpleCardWidget):
 
         self.dataset_show_option_hly = QHBoxLayout()
         self.dataset_show_option_hly.addStretch(1)
-        self.dataset_show_option_hly.addWidget(self.cmb_dataset_max_num)
         self.dataset_show_option_hly.addWidget(self.cmb_dataset_resolution)
         self.dataset_show_option_hly.addWidget(self.cmb_dataset_type)
         self.dataset_show_option_hly.addWidget(self.cmb_dataset_label)
         self.dataset_show_option_hly.addWidget(self.ckb_show_label)
 
-        self.lw_image = ListWidget()
-        self.lw_image.setFlow(QListView.Flow.LeftToRight)
+        self.lv_image = ListView()
+        self.lv_image.setFlow(QListView.Flow.LeftToRight)
         # 必须加
-        self.lw_image.setResizeMode(QListView.ResizeMode.Adjust)
+        self.lv_image.setResizeMode(QListView.ResizeMode.Adjust)
         # 禁用横向滚动条
-        self.lw_image.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.lv_image.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
 
-        self.lw_image.setSpacing(0)
-        self.lw_image.setViewMode(QListView.ViewMode.IconMode)
-        self.lw_image.setIconSize(QSize(120, 120))
+        self.lv_image.setSpacing(0)
+        self.lv_image.setViewMode(QListView.ViewMode.IconMode)
+        # 所有项尺寸一致，布局时不需要逐项计算
+        self.lv_image.setUniformItemSizes(True)
+        self.lv_image.setMouseTracking(True)
+        self.image_delegate = DatasetImageDelegate(self.lv_image)
+        self.lv_image.setItemDelegate(self.image_delegate)
 
         self.dataset_draw_thread: DatasetDrawThreadBase | None = None
 
         self.vly = QVBoxLayout(self)
         self.vly.addLayout(self.dataset_show_option_hly)
-        self.vly.addWidget(self.lw_image)
+        self.vly.addWidget(self.lv_image)
 
         self.set_dataset_draw_thread()
+        self.image_model = DatasetImageListModel(self.dataset_draw_thread, self)
+        self.lv_image.setModel(self.image_model)
 
         self._connect_signals_and_slots()
 
-        self._dataset_df: pd.DataFrame = pd.DataFrame()
+        self._split_manifest: SplitManifest | None = None
+        self._dataset_dir: Path = Path()
 
-        self.max_draw_num = int(self.cmb_dataset_max_num.currentText())
         self.image_resolution = ImageItemSize.MEDIUM
         self.dataset_type = DatasetType.TRAIN
         self.dataset_label = "all"
@@ -97,12 +100,19 @@ class DatasetDrawWidgetBase(SimpleCardWidget):
     def set_dataset_draw_thread(self):
         raise NotImplementedError
 
-    def init_dataset_labels(self, dataset_df: pd.DataFrame):
+    def init_dataset_labels(self, split_manifest: SplitManifest):
         raise NotImplementedError
 
-    def update_dataset(self, dataset_df: pd.DataFrame):
-        self._dataset_df = dataset_df
-        self.init_dataset_labels(dataset_df)
+    def set_dataset_dir(self, dataset_dir: Path | str):
+        self._dataset_dir = Path(dataset_dir)
+        cache_dir = self._dataset_dir / "thumbnail_cache"
+        thumbnail_cache = self.dataset_draw_thread.thumbnail_cache
+        if thumbnail_cache is None or thumbnail_cache.cache_dir != cache_dir:
+            self.dataset_draw_thread.set_thumbnail_cache(ThumbnailCache(cache_dir))
+
+    def update_dataset(self, split_manifest: SplitManifest):
+        self._split_manifest = split_manifest
+        self.init_dataset_labels(split_manifest)
         self._draw_images()
 
     #
@@ -110,47 +120,28 @@ class DatasetDrawWidgetBase(SimpleCardWidget):
         self.cmb_dataset_resolution.currentIndexChanged.connect(self._on_resolution_changed)
         self.cmb_dataset_type.currentIndexChanged.connect(self._on_dateset_type_changed)
         self.ckb_show_label.checkStateChanged.connect(self._on_show_label_status_changed)
-        self.cmb_dataset_max_num.currentTextChanged.connect(self._on_max_num_changed)
         self.cmb_dataset_label.currentTextChanged.connect(self._on_dataset_label_changed)
-        self.lw_image.itemDoubleClicked.connect(self._on_item_double_clicked)
-        self.dataset_draw_thread.draw_one_image.connect(self._on_draw_image)
-        self.dataset_draw_thread.finished.connect(self._on_draw_image_finished)
-
-    @Slot()
-    def _on_draw_image_finished(self):
-        self._enable_draw_image_option()
+        self.lv_image.doubleClicked.connect(self._on_item_double_clicked)
 
-    @Slot(QListWidgetItem)
-    def _on_item_double_clicked(self, item: QListWidgetItem):
-        pix: QPixmap = item.data(Qt.ItemDataRole.UserRole)
+    @Slot(QModelIndex)
+    def _on_item_double_clicked(self, index: QModelIndex):
+        # 列表中只保留缩略图，原图在需要时再绘制
+        pix = QPixmap.fromImage(self.dataset_draw_thread.draw_image(self.image_model.row_data(index.row()),
+                                                                    self.draw_labels))
         self.image_tip = ImageTip(pix, QCursor.pos())
         self.image_tip.showFlyout()
 
-    @Slot(str)
-    def _on_max_num_changed(self, text):
-        self.max_draw_num = int(text)
-        self._draw_images()
-
     @Slot(str)
     def _on_dataset_label_changed(self, text):
         self.dataset_label = text
         self._draw_images()
 
-    @Slot(str, QPixmap)
-    def _on_draw_image(self, filename: str, pix: QPixmap):
-        item = QListWidgetItem()
-        item.setIcon(QIcon(pix))
-        item.setText(filename)
-        item.setSizeHint(self.image_resolution.value)
-        item.setToolTip(filename)
-        item.setData(Qt.ItemDataRole.UserRole, pix)
-        self.lw_image.addItem(item)
-
     @Slot(int)
     def _on_resolution_changed(self, index):
         self.image_resolution = self.cmb_dataset_resolution.itemData(index)
-        self.lw_image.setIconSize(self.image_resolution.value)
-        self._draw_images()
+        self.image_delegate.set_item_size(self.image_resolution.value)
+        self.dataset_draw_thread.set_thumbnail_size(self.image_resolution.value)
+        self.image_model.reset_thumbnails()
 
     @Slot(int)
     def _on_dateset_type_changed(self, index):
@@ -160,27 +151,13 @@ class DatasetDrawWidgetBase(SimpleCardWidget):
     @Slot(Qt.CheckState)
     def _on_show_label_status_changed(self, status):
         self.draw_labels = Qt.CheckState.Checked == status
-        self._draw_images()
+        self.dataset_draw_thread.set_draw_labels_status(self.draw_labels)
+        self.image_model.reset_thumbnails()
 
     def _draw_images(self):
-        self._disable_draw_image_option()
-        self.lw_image.clear()
-        image_paths = self.get_current_condition_dataset()
-        self.dataset_draw_thread.set_max_draw_nums(self.max_draw_num)
-        self.dataset_draw_thread.set_dataset_path(image_paths)
+        if self._split_manifest is None:
+            return
         self.dataset_draw_thread.set_draw_labels_status(self.draw_labels)
-        self.dataset_draw_thread.start()
-
-    def _disable_draw_image_option(self):
-        self.cmb_dataset_max_num.setEnabled(False)
-        self.cmb_dataset_resolution.setEnabled(False)
-        self.cmb_dataset_type.setEnabled(False)
-        self.cmb_dataset_label.setEnabled(False)
-        self.ckb_show_label.setEnabled(False)
-
-    def _enable_draw_image_option(self):
-        self.cmb_dataset_max_num.setEnabled(True)
-        self.cmb_dataset_resolution.setEnabled(True)
-        self.cmb_dataset_type.setEnabled(True)
-        self.cmb_dataset_label.setEnabled(True)
-        self.ckb_show_label.setEnabled(True)
+        self.dataset_draw_thread.set_thumbnail_size(self.image_resolution.value)
+        # 只替换模型数据，缩略图由视图按可见行懒加载
+        self.image_model.set_dataset(self.get_current_condition_dataset())
@@ -0,0 +1,122 @@
+from collections import OrderedDict
+from pathlib import Path
+
+import pandas as pd
+from PySide6.QtCore import QAbstractListModel, QModelIndex, Qt, QSize, QRect, Slot
+from PySide6.QtGui import QPainter, QPixmap, QColor, QImage
+from PySide6.QtWidgets import QStyledItemDelegate, QStyleOptionViewItem, QStyle
+from qfluentwidgets import isDarkTheme, themeColor
+
+from .dataset_draw_thread_base import DatasetDrawThreadBase
+
+
+class DatasetImageListModel(QAbstractListModel):
+    """
+    数据集图片列表模型。
+    只持有过滤后的DataFrame，缩略图在视图第一次请求某一行时才提交绘制，
+    内存中只保留最近使用的一部分缩略图，内存占用与数据集大小无关。
+    """
+
+    def __init__(self, dataset_draw_thread: DatasetDrawThreadBase, parent=None):
+        super().__init__(parent)
+        self._dataset_draw_thread = dataset_draw_thread
+        self._dataset_df: pd.DataFrame = pd.DataFrame(columns=["image_path"])
+        self._thumbnails: OrderedDict[int, QPixmap] = OrderedDict()
+        self.max_thumbnails = 1000
+        self._dataset_draw_thread.draw_one_image.connect(self._on_thumbnail_ready)
+
+    def set_dataset(self, dataset_df: pd.DataFrame):
+        self.beginResetModel()
+        self._dataset_df = dataset_df.reset_index(drop=True)
+        self._reset_thumbnails()
+        self.endResetModel()
+
+    def reset_thumbnails(self):
+        """
+        绘制参数(尺寸、是否绘制标签)变化后丢弃已有缩略图，可见行会重新请求
+        """
+        self.beginResetModel()
+        self._reset_thumbnails()
+        self.endResetModel()
+
+    def _reset_thumbnails(self):
+        self._dataset_draw_thread.cancel()
+        self._thumbnails.clear()
+
+    def row_data(self, row: int) -> dict:
+        return self._dataset_df.iloc[row].to_dict()
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return self._dataset_df.shape[0]
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            return Path(self._dataset_df.at[row, "image_path"]).name
+        if role == Qt.ItemDataRole.DecorationRole:
+            pix = self._thumbnails.get(row)
+            if pix is not None:
+                self._thumbnails.move_to_end(row)
+                return pix
+            self._dataset_draw_thread.request_thumbnail(row, self.row_data(row))
+            return None
+        if role == Qt.ItemDataRole.UserRole:
+            return self.row_data(row)
+        return None
+
+    @Slot(int, int, QImage)
+    def _on_thumbnail_ready(self, generation: int, row: int, image: QImage):
+        if generation != self._dataset_draw_thread.generation or row >= self.rowCount():
+            return
+        # 绘制失败时保存空图，避免可见行反复请求
+        self._thumbnails[row] = QPixmap.fromImage(image)
+        while len(self._thumbnails) > self.max_thumbnails:
+            self._thumbnails.popitem(last=False)
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.DecorationRole])
+
+
+class DatasetImageDelegate(QStyledItemDelegate):
+    margin = 4
+
+    def __init__(self, parent=None):
+        super().__init__(parent=parent)
+        self.item_size = QSize(120, 120)
+
+    def set_item_size(self, size: QSize):
+        self.item_size = size
+
+    def sizeHint(self, option: QStyleOptionViewItem, index: QModelIndex) -> QSize:
+        # 不访问DecorationRole，尺寸计算不会触发缩略图绘制
+        return QSize(self.item_size.width() + 2 * self.margin,
+                     self.item_size.height() + option.fontMetrics.height() + 3 * self.margin)
+
+    def paint(self, painter: QPainter, option: QStyleOptionViewItem, index: QModelIndex) -> None:
+        painter.save()
+        painter.setRenderHints(QPainter.RenderHint.Antialiasing | QPainter.RenderHint.SmoothPixmapTransform)
+        if option.state & (QStyle.StateFlag.State_Selected | QStyle.StateFlag.State_MouseOver):
+            color = QColor(themeColor())
+            color.setAlpha(90 if option.state & QStyle.StateFlag.State_Selected else 40)
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(color)
+            painter.drawRoundedRect(option.rect.adjusted(1, 1, -1, -1), 5, 5)
+
+        rect = option.rect.adjusted(self.margin, self.margin, -self.margin, -self.margin)
+        image_rect = QRect(rect.x(), rect.y(), rect.width(), self.item_size.height())
+        pix = index.data(Qt.ItemDataRole.DecorationRole)
+        if isinstance(pix, QPixmap) and not pix.isNull():
+            size = pix.size().scaled(image_rect.size(), Qt.AspectRatioMode.KeepAspectRatio)
+            target = QRect(0, 0, size.width(), size.height())
+            target.moveCenter(image_rect.center())
+            painter.drawPixmap(target, pix)
+
+        text_rect = QRect(rect.x(), image_rect.bottom() + self.margin, rect.width(), option.fontMetrics.height())
+        text = option.fontMetrics.elidedText(index.data(Qt.ItemDataRole.DisplayRole),
+                                             Qt.TextElideMode.ElideMiddle, rect.width())
+        painter.setPen(QColor(255, 255, 255, 197) if isDarkTheme() else QColor(0, 0, 0, 200))
+        painter.drawText(text_rect, Qt.AlignmentFlag.AlignCenter, text)
+        painter.restore()
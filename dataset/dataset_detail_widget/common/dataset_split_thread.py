@@ -0,0 +1,32 @@
+from pathlib import Path
+
+from PySide6.QtCore import QThread, Signal
+from loguru import logger
+
+from common.component.model_type_widget import ModelType
+from ...dataset_process.dataset_split import DatasetSplit
+
+
+class DatasetSplitThread(QThread):
+    split_progress_changed = Signal(int, int)
+    # 划分结果DataFrame，划分失败时为None
+    split_finished = Signal(object)
+
+    def __init__(self, model_type: ModelType, dataset_dir: Path | str, split_rates: list):
+        super().__init__()
+        self._model_type = model_type
+        self._dataset_dir = Path(dataset_dir)
+        self._split_rates = split_rates
+
+    def _on_split_progress(self, finished: int, total: int):
+        self.split_progress_changed.emit(finished, total)
+
+    def run(self):
+        try:
+            dataset_df = DatasetSplit(self._model_type).split(self._dataset_dir, self._split_rates,
+                                                              self._on_split_progress)
+        except Exception as e:
+            # 异常同样要通知界面，否则进度弹窗无法关闭
+            logger.exception(f"split dataset failed: {e}")
+            dataset_df = None
+        self.split_finished.emit(dataset_df)
@@ -8,7 +8,6 @@ from common.database.db_helper import db_session
 from common.component.tag_widget import TextTagWidget
 from models.models import Dataset
 from .dataset_split_widget import DatasetSplitWidget
-from ...dataset_process.dataset_split import DatasetSplit
 from ...types import DatasetInfo
 
 
@@ -46,13 +45,10 @@ class DatasetHeaderWidget(SimpleCardWidget):
     @Slot(list)
     def _on_split_clicked(self, split_rates):
         self._split_rates = split_rates
-        # 更新拆分比例
-        dataset_df = (DatasetSplit(self._dataset_info.model_type)
-                      .split(self._dataset_info.dataset_dir, self._split_rates))
+        # 更新拆分比例，实际拆分由内容组件完成，避免重复拆分
         with db_session() as session:
             dataset = session.query(Dataset).filter_by(dataset_id=self._dataset_info.dataset_id).first()
             dataset.split_rate = "_".join([str(rate) for rate in split_rates])
-            dataset.dataset_total = dataset_df.shape[0]
         self.split_dataset_clicked.emit(self._split_rates)
 
     def set_header_info(self, dataset_info: DatasetInfo):
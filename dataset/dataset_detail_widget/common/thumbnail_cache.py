@@ -0,0 +1,114 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from PySide6.QtCore import QSize
+from PySide6.QtGui import QImage
+from loguru import logger
+
+
+class ThumbnailCache:
+    """
+    数据集预览缩略图的磁盘缓存。
+    以(图片路径, 图片修改时间, 标签文件修改时间, 缩略图尺寸, 是否绘制标签)做内容寻址，
+    缓存文件存放在数据集目录下，总大小超过上限时按最近最少使用(LRU)的顺序淘汰。
+    """
+    suffix = ".jpg"
+
+    def __init__(self, cache_dir: Path | str, max_bytes: int = 512 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        # key -> 文件大小，按访问先后排序，最后一个为最近访问
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._load_index()
+
+    def _load_index(self):
+        files = []
+        for file in self.cache_dir.glob("*" + self.suffix):
+            stat = file.stat()
+            files.append((stat.st_mtime_ns, file.stem, stat.st_size))
+        # 文件修改时间在命中时会被刷新，重启后据此恢复LRU顺序
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_bytes += size
+        self._evict()
+
+    @staticmethod
+    def make_key(image_path: str, label_path: str | None, size: QSize, draw_labels: bool,
+                 label_signature: str = "") -> str:
+        """
+        生成缩略图的缓存键。
+        :param image_path: 原图路径
+        :param label_path: 标签文件路径，分类数据集没有标签文件时传None
+        :param size: 缩略图尺寸
+        :param draw_labels: 是否在缩略图上绘制标签
+        :param label_signature: 类别名称签名，类别变化时缓存失效
+        :return: 缓存键(sha1十六进制字符串)
+        """
+        image_mtime = os.stat(image_path).st_mtime_ns
+        label_mtime = os.stat(label_path).st_mtime_ns if label_path else 0
+        raw = (f"{Path(image_path).as_posix()}|{image_mtime}|{label_mtime}|"
+               f"{size.width()}x{size.height()}|{int(draw_labels)}|{label_signature}")
+        return hashlib.sha1(raw.encode("utf8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / (key + self.suffix)
+
+    def get(self, key: str) -> QImage | None:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+        path = self._path(key)
+        image = QImage(path.as_posix())
+        if image.isNull():
+            self.remove(key)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return image
+
+    def put(self, key: str, image: QImage):
+        path = self._path(key)
+        tmp_path = path.with_name(f"{key}.{threading.get_ident()}.tmp")
+        # 先写临时文件再原子替换，避免中途退出留下半截缓存
+        if not image.save(tmp_path.as_posix(), "JPG", 90):
+            logger.warning(f"save thumbnail cache failed: {path}")
+            tmp_path.unlink(missing_ok=True)
+            return
+        os.replace(tmp_path, path)
+        size = path.stat().st_size
+        with self._lock:
+            self._total_bytes += size - self._entries.get(key, 0)
+            self._entries[key] = size
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def remove(self, key: str):
+        with self._lock:
+            size = self._entries.pop(key, None)
+            if size is not None:
+                self._total_bytes -= size
+        self._path(key).unlink(missing_ok=True)
+
+    def clear(self):
+        with self._lock:
+            keys = list(self._entries.keys())
+            self._entries.clear()
+            self._total_bytes = 0
+        for key in keys:
+            self._path(key).unlink(missing_ok=True)
+
+    def _evict(self):
+        # 调用方需持有锁
+        while self._total_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self._path(key).unlink(missing_ok=True)
@@ -0,0 +1,43 @@
+from pathlib import Path
+
+from PySide6.QtCore import QThread, Signal
+from loguru import logger
+
+from common.component.model_type_widget import ModelType
+from common.utils.utils import copy_tree
+from ..dataset_process.dataset_check import DatasetCheck
+from ..dataset_process.label_index import LabelIndex
+
+
+class DatasetImportThread(QThread):
+    import_progress_changed = Signal(int, int)
+    import_finished = Signal(bool)
+
+    def __init__(self, model_type: ModelType, src_dir: Path | str, dataset_dir: Path | str):
+        super().__init__()
+        self._model_type = model_type
+        self._src_dir = Path(src_dir)
+        self._dataset_dir = Path(dataset_dir)
+
+    def _on_check_progress(self, finished: int, total: int):
+        self.import_progress_changed.emit(finished, total)
+
+    def run(self):
+        try:
+            success = self._import()
+        except Exception as e:
+            # 图片无法读取、权限不足或磁盘已满等异常同样要通知界面，否则进度弹窗无法关闭
+            logger.exception(f"import dataset failed: {e}")
+            success = False
+        self.import_finished.emit(success)
+
+    def _import(self) -> bool:
+        # 校验结果缓存放在数据集目录下，重新导入时只校验变化过的文件
+        manifest_path = self._dataset_dir / "check_manifest.json"
+        if not DatasetCheck(self._model_type).check(self._src_dir, manifest_path, self._on_check_progress):
+            return False
+        copy_tree(self._src_dir, self._dataset_dir / "src")
+        if self._model_type != ModelType.CLASSIFY:
+            # 导入时一次性建立标签索引，打开数据集时只需增量同步
+            LabelIndex(self._dataset_dir).update()
+        return True
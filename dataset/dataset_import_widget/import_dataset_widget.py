@@ -1,4 +1,3 @@
-from pathlib import Path
 from loguru import logger
 from PySide6.QtCore import Qt, Signal, Slot
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QFormLayout, QHBoxLayout
@@ -7,11 +6,12 @@ from qfluentwidgets import BodyLabel, SubtitleLabel, PrimaryPushButton, \
 
 from common.component.custom_icon import CustomFluentIcon
 from common.component.file_select_widget import FileSelectWidget
+from common.component.progress_message_box import ProgressMessageBox
 from common.core.event_manager import signal_bridge
+from common.core.window_manager import window_manager
 from common.component.tag_widget import TextTagWidget
 from common.utils.raise_info_bar import raise_error
-from common.utils.utils import copy_tree
-from ..dataset_process.dataset_check import DatasetCheck
+from .dataset_import_thread import DatasetImportThread
 from dataset.dataset_import_widget.dataset_format_doc_widget import DatasetFormatDocWidget
 
 from dataset.dataset_list_widget.new_dataset_dialog import DatasetInfo
@@ -61,6 +61,8 @@ class ImportDatasetWidget(QWidget):
         self.hly_content.addWidget(self.dataset_format_doc_widget)
         self._selected_dataset_dir = ""
         self._dataset_info = DatasetInfo()
+        self._import_thread: DatasetImportThread | None = None
+        self._message_box: ProgressMessageBox | None = None
         self._connect_signals_and_slots()
 
     def _connect_signals_and_slots(self):
@@ -72,27 +74,43 @@ class ImportDatasetWidget(QWidget):
         self._selected_dataset_dir = file_path
 
     def _on_import_clicked(self):
-        if self._import_data():
-            signal_bridge.import_dataset_finished.emit(self.lbl_dataset_id.text(), DatasetStatus.CHECKED.value)
-            self.check_and_import_finished.emit(self._dataset_info)
-        else:
-            signal_bridge.import_dataset_finished.emit(self.lbl_dataset_id.text(), DatasetStatus.CHECK_FAILED.value)
-
-    def _import_data(self):
         if not self._selected_dataset_dir:
             error_msg = self.tr("The directory does not exist! Please select a dataset directory!")
             raise_error(self.tr("The directory does not exist!"), error_msg)
             logger.error(error_msg)
-            return False
-        if not DatasetCheck(self._dataset_info.model_type).check(self._selected_dataset_dir):
+            signal_bridge.import_dataset_finished.emit(self.lbl_dataset_id.text(), DatasetStatus.CHECK_FAILED.value)
+            return
+        # 校验和复制在后台线程中进行，界面只显示进度
+        self.btn_import.setEnabled(False)
+        self._import_thread = DatasetImportThread(self._dataset_info.model_type, self._selected_dataset_dir,
+                                                  self._dataset_info.dataset_dir)
+        self._import_thread.import_progress_changed.connect(self._on_import_progress_changed)
+        self._import_thread.import_finished.connect(self._on_import_finished)
+        self._import_thread.start()
+        self._message_box = ProgressMessageBox(parent=window_manager.find_window("main_widget"))
+        self._message_box.exec()
+
+    @Slot(int, int)
+    def _on_import_progress_changed(self, finished: int, total: int):
+        if self._message_box:
+            self._message_box.set_max_value(total)
+            self._message_box.set_value(finished)
+
+    @Slot(bool)
+    def _on_import_finished(self, success: bool):
+        self.btn_import.setEnabled(True)
+        if self._message_box:
+            self._message_box.close()
+            self._message_box = None
+        if success:
+            signal_bridge.import_dataset_finished.emit(self.lbl_dataset_id.text(), DatasetStatus.CHECKED.value)
+            # 跳转拆分界面并且显示数据
+            self.check_and_import_finished.emit(self._dataset_info)
+        else:
             error_msg = self.tr("Please check your dataset according to documentation at right!")
             raise_error(self.tr("Dataset format error!"), error_msg)
             logger.error(error_msg)
-            return False
-        else:
-            copy_tree(self._selected_dataset_dir, Path(self._dataset_info.dataset_dir) / "src")
-            # 跳转拆分界面并且显示数据
-            return True
+            signal_bridge.import_dataset_finished.emit(self.lbl_dataset_id.text(), DatasetStatus.CHECK_FAILED.value)
 
     def set_dataset_info(self, dataset_info: DatasetInfo):
         self._dataset_info = dataset_info
@@ -5,20 +5,18 @@ from loguru import logger
 
 from PySide6.QtCore import Signal, Slot
 from PySide6.QtGui import Qt, QColor
-from PySide6.QtWidgets import QVBoxLayout, QHBoxLayout, QHeaderView, \
-    QTableWidgetItem, QWidget, QAbstractItemView, QFormLayout
-from qfluentwidgets import FluentIcon, CaptionLabel, TableWidget, PrimaryPushButton, PopupTeachingTip, \
-    TeachingTipTailPosition, BodyLabel, ComboBox
+from PySide6.QtWidgets import QVBoxLayout, QHBoxLayout, QHeaderView, QWidget, QAbstractItemView, QFormLayout
+from qfluentwidgets import FluentIcon, TableView, PrimaryPushButton, BodyLabel, ComboBox
 from sqlalchemy import asc, desc
-from sqlalchemy.orm import Query
+from sqlalchemy.orm import Query, Session
 
 from common.component.custom_icon import CustomFluentIcon
+from common.component.paged_table_model import PagedTableModel
+from common.component.table_delegates import TagItemDelegate, OperationItemDelegate, OperationButton
 from common.core.event_manager import signal_bridge
 from common.database.db_helper import db_session
-from common.component.delete_ensure_widget import CustomFlyoutView
-from common.component.fill_tool_button import FillToolButton
+from common.component.delete_ensure_widget import show_delete_ensure_flyout
 from common.component.model_type_widget import ModelType
-from common.component.tag_widget import TextTagWidget
 from common.utils.raise_info_bar import raise_warning
 from common.utils.utils import format_datatime, open_directory
 from dataset.dataset_list_widget.new_dataset_dialog import NewDatasetDialog, DatasetInfo
@@ -27,102 +25,78 @@ from models.models import Dataset, TrainTask
 from settings import cfg
 
 
-class OperationWidget(QWidget):
-    dataset_imported = Signal(str)
-    dataset_deleted = Signal(str)
-    dataset_detail = Signal(str)
-    open_dataset_dir = Signal(str)
-
-    def __init__(self, dataset_id: str):
-        super().__init__()
-        self.hly_content = QHBoxLayout(self)
-        self.btn_import = FillToolButton(CustomFluentIcon.IMPORT1)
-        self.btn_view = FillToolButton(CustomFluentIcon.DETAIL1)
-        self.btn_delete = FillToolButton(FluentIcon.DELETE.icon(color=QColor("#E61919")))
-        self.btn_open = FillToolButton(FluentIcon.FOLDER)
-
-        self.hly_content.addStretch(1)
-        self.hly_content.addWidget(self.btn_import)
-        self.hly_content.addWidget(self.btn_view)
-        self.hly_content.addWidget(CaptionLabel("|", self))
-        self.hly_content.addWidget(self.btn_delete)
-        self.hly_content.addWidget(CaptionLabel("|", self))
-        self.hly_content.addWidget(self.btn_open)
-        self.hly_content.addStretch(1)
-
-        self._connect_signals_and_slots()
-
-        self.dataset_id = dataset_id
-        self._init_btn_status()
-
-    def _init_btn_status(self):
-        with db_session(auto_commit_exit=True) as session:
-            dataset: Dataset = session.query(Dataset).filter_by(dataset_id=self.dataset_id).first()
-            if dataset.dataset_status == DatasetStatus.CHECKED.value:
-                self.set_checked_status(True)
-            else:
-                self.set_checked_status(False)
-
-    def set_checked_status(self, check_status: bool):
-        if check_status:
-            self.btn_import.setVisible(False)
-            self.btn_view.setVisible(True)
-        else:
-            self.btn_import.setVisible(True)
-            self.btn_view.setVisible(False)
-
-    def _connect_signals_and_slots(self):
-        self.btn_delete.clicked.connect(self._on_delete_clicked)
-        self.btn_view.clicked.connect(self._on_view_clicked)
-        self.btn_open.clicked.connect(self._on_open_clicked)
-        self.btn_import.clicked.connect(self._on_import_clicked)
-
-    def _on_view_clicked(self):
-        self.dataset_detail.emit(self.dataset_id)
-
-    def _on_open_clicked(self):
-        self.open_dataset_dir.emit(self.dataset_id)
-
-    def _on_import_clicked(self):
-        self.dataset_imported.emit(self.dataset_id)
-
-    def _on_delete_clicked(self):
-        self.view = CustomFlyoutView(content=self.tr("Are you sure to delete this dataset?"))
-        self.popup_tip = PopupTeachingTip.make(
-            target=self.btn_delete,
-            view=self.view,
-            tailPosition=TeachingTipTailPosition.BOTTOM,
-            duration=-1,
-            parent=self
-        )
-        self.view.accept_status.connect(self._on_ensure_delete_item)
-
-    @Slot(bool)
-    def _on_ensure_delete_item(self, accepted):
-        if accepted:
-            self.dataset_deleted.emit(self.dataset_id)
-        self.popup_tip.close()
-
-
-class DatasetTableWidget(TableWidget):
+COLUMN_DATASET_ID = 0
+COLUMN_DATASET_NAME = 1
+COLUMN_MODEL_TYPE = 2
+COLUMN_CREATE_TIME = 3
+COLUMN_DATASET_STATUS = 4
+COLUMN_OPERATION = 5
+
+OPERATION_IMPORT = "import"
+OPERATION_VIEW = "view"
+OPERATION_DELETE = "delete"
+OPERATION_OPEN = "open"
+
+
+class DatasetTableModel(PagedTableModel):
+    key_field = "dataset_id"
+
+    def build_query(self, session: Session) -> Query:
+        return session.query(Dataset.dataset_id, Dataset.dataset_name, Dataset.model_type,
+                             Dataset.create_time, Dataset.dataset_status)
+
+    def cell_data(self, record: dict, column: int, role: int):
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == COLUMN_DATASET_ID:
+                return record["dataset_id"]
+            if column == COLUMN_DATASET_NAME:
+                return record["dataset_name"]
+            if column == COLUMN_CREATE_TIME:
+                return self.format_time(record["create_time"])
+        elif role == self.ValueRole:
+            if column == COLUMN_MODEL_TYPE:
+                model_type = ModelType(record["model_type"])
+                return model_type.name, *model_type.color
+            if column == COLUMN_DATASET_STATUS:
+                dataset_status = DatasetStatus(record["dataset_status"])
+                return dataset_status.name, *dataset_status.color
+            if column == COLUMN_OPERATION:
+                if record["dataset_status"] == DatasetStatus.CHECKED.value:
+                    return OPERATION_VIEW, OPERATION_DELETE, OPERATION_OPEN
+                return OPERATION_IMPORT, OPERATION_DELETE, OPERATION_OPEN
+        return None
+
+
+class DatasetTableView(TableView):
     def __init__(self):
         super().__init__()
         self.verticalHeader().hide()
+        # 固定行高，视图不需要逐行计算尺寸
+        self.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.verticalHeader().setDefaultSectionSize(44)
         self.setBorderRadius(8)
         self.setBorderVisible(True)
-        self.setColumnCount(6)
-        self.setRowCount(24)
         self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
-        self.setHorizontalHeaderLabels([
+        self.dataset_model = DatasetTableModel([
             self.tr("Dataset ID"), self.tr("Dataset name"), self.tr("Model type"),
             self.tr("Create time"), self.tr("Dataset Status"), self.tr("Operation")
-        ])
-        self.setColumnWidth(0, 100)
-        self.setColumnWidth(2, 100)
-        self.setColumnWidth(4, 100)
-        self.setColumnWidth(5, 160)
-        self.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
-        self.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeMode.Stretch)
+        ], self)
+        self.setModel(self.dataset_model)
+        self.operation_delegate = OperationItemDelegate([
+            OperationButton(OPERATION_IMPORT, CustomFluentIcon.IMPORT1),
+            OperationButton(OPERATION_VIEW, CustomFluentIcon.DETAIL1),
+            OperationButton(OPERATION_DELETE, FluentIcon.DELETE.icon(color=QColor("#E61919"))),
+            OperationButton(OPERATION_OPEN, FluentIcon.FOLDER),
+        ], self)
+        self.setItemDelegateForColumn(COLUMN_MODEL_TYPE, TagItemDelegate(self))
+        self.setItemDelegateForColumn(COLUMN_DATASET_STATUS, TagItemDelegate(self))
+        self.setItemDelegateForColumn(COLUMN_OPERATION, self.operation_delegate)
+        self.setColumnWidth(COLUMN_DATASET_ID, 100)
+        self.setColumnWidth(COLUMN_MODEL_TYPE, 120)
+        self.setColumnWidth(COLUMN_CREATE_TIME, 156)
+        self.setColumnWidth(COLUMN_DATASET_STATUS, 120)
+        self.setColumnWidth(COLUMN_OPERATION, 160)
+        self.horizontalHeader().setSectionResizeMode(COLUMN_DATASET_NAME, QHeaderView.ResizeMode.Stretch)
 
 
 class DatasetListWidget(QWidget):
@@ -164,12 +138,11 @@ class DatasetListWidget(QWidget):
         self.hly_btn.addStretch(1)
         self.hly_btn.addLayout(self.fly_type)
         self.hly_btn.addLayout(self.fly_sort)
-        self.tb_dataset = DatasetTableWidget()
+        self.tb_dataset = DatasetTableView()
         self.vly.addLayout(self.hly_btn)
         self.vly.addWidget(self.tb_dataset)
         self._connect_signals_and_slots()
 
-        self.item_dataset_id_map = dict()
         self._load_dataset_data()
 
     def _connect_signals_and_slots(self):
@@ -178,25 +151,14 @@ class DatasetListWidget(QWidget):
         self.cmb_sort.currentIndexChanged.connect(self._load_dataset_data)
         self.cmb_type.currentIndexChanged.connect(self._load_dataset_data)
         signal_bridge.import_dataset_finished.connect(self._on_import_dataset_finished)
+        self.tb_dataset.operation_delegate.button_clicked.connect(self._on_operation_clicked)
 
     def _on_theme_changed(self):
-        # 局部更新优化性能
-        # for row in range(self.tb_dataset.rowCount()):
-        #     item_model_type = self.tb_dataset.cellWidget(row, 2)
-        #     if isinstance(item_model_type, TextTagWidget):
-        #         model_type = ModelType.__members__.get(item_model_type.text(), None)
-        #         if model_type:
-        #             item_model_type.set_color(*model_type.color)
-        #
-        #     item_dataset_status = self.tb_dataset.cellWidget(row, 4)
-        #     if isinstance(item_dataset_status, TextTagWidget):
-        #         dataset_status = DatasetStatus.__members__.get(item_dataset_status.text(), None)
-        #         if dataset_status:
-        #             item_dataset_status.set_color(*dataset_status.color)
-        self._load_dataset_data()
+        # 委托绘制时读取当前主题，只需重绘
+        self.tb_dataset.viewport().update()
 
     def _load_dataset_data(self):
-        self.tb_dataset.clearContents()
+        """筛选和排序在数据库中完成，只读取第一页，滚动到底部时再读取后续页"""
         field = Dataset.dataset_name
         order = asc
         if self.cmb_sort.currentIndex() == 0:
@@ -212,38 +174,26 @@ class DatasetListWidget(QWidget):
             field = Dataset.dataset_name
             order = desc
 
-        with db_session(auto_commit_exit=True) as session:
-            if self.cmb_type.currentIndex() == 0:
-                query: Query = session.query(Dataset)
-            else:
-                query: Query = session.query(Dataset).filter_by(model_type=self.cmb_type.currentIndex() - 1)
-            datasets: list[Dataset] = query.order_by(order(field)).all()
-            for i, dataset in enumerate(datasets):
-                item0 = QTableWidgetItem(dataset.dataset_id)
-                item1 = QTableWidgetItem(dataset.dataset_name)
-                item2 = TextTagWidget(ModelType(dataset.model_type).name, *ModelType(dataset.model_type).color)
-
-                item3 = QTableWidgetItem(format_datatime(dataset.create_time))
-                item4 = TextTagWidget(DatasetStatus(dataset.dataset_status).name,
-                                      *DatasetStatus(dataset.dataset_status).color)
-                item5 = OperationWidget(dataset.dataset_id)
-
-                item5.dataset_deleted.connect(self._on_delete_dataset)
-                item5.dataset_detail.connect(self._on_view_dataset)
-                item5.open_dataset_dir.connect(self._on_open_dataset_dir)
-                item5.dataset_imported.connect(self._on_import_dataset)
-
-                item0.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                item1.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                item3.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-
-                self.tb_dataset.setItem(i, 0, item0)
-                self.tb_dataset.setItem(i, 1, item1)
-                self.tb_dataset.setCellWidget(i, 2, item2)
-                self.tb_dataset.setItem(i, 3, item3)
-                self.tb_dataset.setCellWidget(i, 4, item4)
-                self.tb_dataset.setCellWidget(i, 5, item5)
-                self.item_dataset_id_map[dataset.dataset_id] = item0
+        model = self.tb_dataset.dataset_model
+        if self.cmb_type.currentIndex() == 0:
+            model.set_filters()
+        else:
+            model.set_filters(Dataset.model_type == self.cmb_type.currentIndex() - 1)
+        # 加上主键保证分页时顺序稳定
+        model.set_order_by(order(field), order(Dataset.id))
+        model.refresh()
+
+    @Slot(str, object)
+    def _on_operation_clicked(self, operation: str, dataset_id: str):
+        if operation == OPERATION_IMPORT:
+            self._on_import_dataset(dataset_id)
+        elif operation == OPERATION_VIEW:
+            self._on_view_dataset(dataset_id)
+        elif operation == OPERATION_OPEN:
+            self._on_open_dataset_dir(dataset_id)
+        elif operation == OPERATION_DELETE:
+            show_delete_ensure_flyout(self.tr("Are you sure to delete this dataset?"), self.window(),
+                                      lambda: self._on_delete_dataset(dataset_id))
 
     def _on_create_dataset_clicked(self):
         self.new_dataset_dialog = NewDatasetDialog(self)
@@ -273,22 +223,11 @@ class DatasetListWidget(QWidget):
 
     @Slot(str, int)
     def _on_import_dataset_finished(self, dataset_id: str, status: int):
-        # 部分区域刷新
-        # item = self.item_dataset_id_map.get(dataset_id, None)
-        # if item:
-        #     row_index = self.tb_dataset.row(item)
-        #     tag = self.tb_dataset.cellWidget(row_index, 4)
-        #     op = self.tb_dataset.cellWidget(row_index, 5)
-        #     if isinstance(tag, TextTagWidget):
-        #         tag.set_text(status.name)
-        #         tag.set_color(status.color)
-        #     if isinstance(op, OperationWidget):
-        #         op.set_checked_status(True)
         with db_session() as session:
             dataset: Dataset = session.query(Dataset).filter_by(dataset_id=dataset_id).first()
             dataset.dataset_status = status
-        # 全量数据刷新，如果此处存在性能瓶颈，请使用部分区域刷新
-        self._load_dataset_data()
+        # 只刷新该行，状态标签和操作按钮由委托重新绘制
+        self.tb_dataset.dataset_model.update_row(dataset_id, dataset_status=status)
 
     @Slot(str)
     def _on_delete_dataset(self, dataset_id):
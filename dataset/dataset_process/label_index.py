@@ -0,0 +1,166 @@
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+from loguru import logger
+
+
+def _parse_label_file(label_path: str, image_path: str | None) -> tuple[Counter, int, int, int]:
+    counter = Counter()
+    bad_lines = 0
+    with open(label_path, "r", encoding="utf8", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                class_id = int(float(line.split(" ", 1)[0]))
+            except (ValueError, OverflowError):
+                # 单行格式错误只跳过该行，不影响整个数据集的统计
+                bad_lines += 1
+                continue
+            if class_id < 0:
+                bad_lines += 1
+                continue
+            counter[class_id] += 1
+    if bad_lines:
+        logger.warning(f"skip {bad_lines} malformed lines in {label_path}")
+    width = height = 0
+    if image_path:
+        try:
+            # 只读取文件头，不解码图片
+            with Image.open(image_path) as img:
+                width, height = img.size
+        except (OSError, SyntaxError):
+            pass
+    return counter, sum(counter.values()), width, height
+
+
+class LabelIndex:
+    """
+    数据集标签统计索引。
+    以列存形式保存每个标签文件的(大小, 修改时间)、目标数量、图片尺寸以及稀疏的类别直方图，
+    保存为数据集目录下的label_index.npz；标签文件变化时只重新解析变化的文件。
+    """
+    version = 1
+
+    def __init__(self, dataset_dir: Path | str):
+        dataset_dir = Path(dataset_dir)
+        self.index_path = dataset_dir / "label_index.npz"
+        self.images_dir = dataset_dir / "src" / "images"
+        self.labels_dir = dataset_dir / "src" / "labels"
+        self.names = np.array([], dtype=str)
+        self.label_sizes = np.array([], dtype=np.int64)
+        self.label_mtimes = np.array([], dtype=np.int64)
+        self.box_counts = np.array([], dtype=np.int32)
+        self.image_widths = np.array([], dtype=np.int32)
+        self.image_heights = np.array([], dtype=np.int32)
+        # 稀疏直方图(COO)，hist_image为names中的行号
+        self.hist_image = np.array([], dtype=np.int32)
+        self.hist_class = np.array([], dtype=np.int32)
+        self.hist_count = np.array([], dtype=np.int32)
+        self._load()
+
+    def _load(self):
+        if not self.index_path.exists():
+            return
+        try:
+            with np.load(self.index_path, allow_pickle=False) as data:
+                if int(data["version"]) != self.version:
+                    return
+                for key in ("names", "label_sizes", "label_mtimes", "box_counts", "image_widths",
+                            "image_heights", "hist_image", "hist_class", "hist_count"):
+                    setattr(self, key, data[key])
+        except (OSError, ValueError, KeyError):
+            logger.warning(f"标签索引文件损坏，将重新构建: {self.index_path}")
+
+    def save(self):
+        tmp_path = self.index_path.with_name(self.index_path.stem + ".tmp.npz")
+        np.savez(tmp_path, version=np.array(self.version), names=self.names, label_sizes=self.label_sizes,
+                 label_mtimes=self.label_mtimes, box_counts=self.box_counts, image_widths=self.image_widths,
+                 image_heights=self.image_heights, hist_image=self.hist_image, hist_class=self.hist_class,
+                 hist_count=self.hist_count)
+        os.replace(tmp_path, self.index_path)
+
+    def update(self) -> bool:
+        """
+        与src/labels目录同步，只解析新增或修改过的标签文件
+        :return: 索引是否发生变化
+        """
+        labels = dict()
+        for entry in os.scandir(self.labels_dir):
+            if entry.is_file() and entry.name.endswith(".txt"):
+                stat = entry.stat()
+                labels[entry.name[:-4]] = (stat.st_size, stat.st_mtime_ns)
+        old_rows = {name: row for row, name in enumerate(self.names.tolist())}
+        keep_rows, changed = [], []
+        for name, (size, mtime) in labels.items():
+            row = old_rows.get(name)
+            if row is not None and self.label_sizes[row] == size and self.label_mtimes[row] == mtime:
+                keep_rows.append(row)
+            else:
+                changed.append(name)
+        if not changed and len(keep_rows) == len(old_rows):
+            return False
+
+        images = dict()
+        if changed and self.images_dir.exists():
+            for entry in os.scandir(self.images_dir):
+                images[entry.name.rsplit(".", 1)[0]] = entry.path
+        with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) + 4)) as executor:
+            parsed = list(executor.map(_parse_label_file,
+                                       [(self.labels_dir / f"{name}.txt").as_posix() for name in changed],
+                                       [images.get(name) for name in changed]))
+
+        keep_rows = np.array(keep_rows, dtype=np.int64)
+        # 旧行号 -> 新行号，保留的行排在前面
+        row_map = np.full(len(self.names), -1, dtype=np.int64)
+        row_map[keep_rows] = np.arange(len(keep_rows))
+        keep_hist = row_map[self.hist_image] >= 0 if len(self.hist_image) else np.array([], dtype=bool)
+
+        new_image, new_class, new_count = [], [], []
+        for offset, (counter, _, _, _) in enumerate(parsed):
+            for class_id, count in counter.items():
+                new_image.append(len(keep_rows) + offset)
+                new_class.append(class_id)
+                new_count.append(count)
+
+        self.names = np.concatenate([self.names[keep_rows], np.array(changed, dtype=str)]).astype(str)
+        self.label_sizes = np.concatenate([self.label_sizes[keep_rows],
+                                           np.array([labels[name][0] for name in changed], dtype=np.int64)])
+        self.label_mtimes = np.concatenate([self.label_mtimes[keep_rows],
+                                            np.array([labels[name][1] for name in changed], dtype=np.int64)])
+        self.box_counts = np.concatenate([self.box_counts[keep_rows],
+                                          np.array([item[1] for item in parsed], dtype=np.int32)])
+        self.image_widths = np.concatenate([self.image_widths[keep_rows],
+                                            np.array([item[2] for item in parsed], dtype=np.int32)])
+        self.image_heights = np.concatenate([self.image_heights[keep_rows],
+                                             np.array([item[3] for item in parsed], dtype=np.int32)])
+        self.hist_image = np.concatenate([row_map[self.hist_image[keep_hist]],
+                                          np.array(new_image, dtype=np.int64)]).astype(np.int32)
+        self.hist_class = np.concatenate([self.hist_class[keep_hist], np.array(new_class, dtype=np.int32)])
+        self.hist_count = np.concatenate([self.hist_count[keep_hist], np.array(new_count, dtype=np.int32)])
+        self.save()
+        return True
+
+    def split_statistics(self, dataset_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        按数据集类型汇总每个类别的目标数量
+        :param dataset_df: 拆分后的数据集，需包含label_path和type列
+        :return: 行为类别id，列为train/val/test的DataFrame
+        """
+        stems = dataset_df["label_path"].astype(str).str.replace("\\", "/").str.rsplit("/", n=1).str[-1].str[:-4]
+        rows = pd.Index(self.names).get_indexer(stems)
+        valid = rows >= 0
+        image_types = np.full(len(self.names), "", dtype=object)
+        image_types[rows[valid]] = dataset_df["type"].to_numpy()[valid]
+        hist_df = pd.DataFrame({"label": self.hist_class, "type": image_types[self.hist_image],
+                                "count": self.hist_count})
+        hist_df = hist_df[hist_df["type"] != ""]
+        split_types = ["train", "val", "test"]
+        return (hist_df.pivot_table(index="label", columns="type", values="count", aggfunc="sum", fill_value=0)
+                .reindex(columns=split_types, fill_value=0).astype(int).sort_index())
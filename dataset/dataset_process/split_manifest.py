@@ -0,0 +1,122 @@
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+
+class SplitManifest:
+    """
+    数据集拆分清单。
+    每一列单独保存为.npy文件，路径以utf8字节串形式相对数据集目录保存，数据集目录移动后依然有效；
+    加载时以内存映射方式打开，按数据集类型、类别筛选时只物化命中的行。
+    """
+    version = 1
+    split_types = ("train", "val", "test")
+    path_columns = ("image_path", "label_path")
+
+    def __init__(self, dataset_dir: Path | str):
+        self.dataset_dir = Path(dataset_dir)
+        self.manifest_dir = self.dataset_dir / "split_manifest"
+        self.columns: dict[str, np.ndarray] = dict()
+        self.type_counts: dict[str, int] = {split_type: 0 for split_type in self.split_types}
+
+    def __len__(self) -> int:
+        return sum(self.type_counts.values())
+
+    @classmethod
+    def create(cls, dataset_dir: Path | str, dataset_df: pd.DataFrame) -> "SplitManifest":
+        """
+        将拆分结果写入清单，先写到临时目录再整体替换
+        :param dataset_dir: 数据集目录
+        :param dataset_df: 拆分结果，包含image_path、type，以及label_path或label
+        :return: 已加载的清单
+        """
+        manifest = cls(dataset_dir)
+        prefix = manifest.dataset_dir.resolve().as_posix() + "/"
+        tmp_dir = manifest.manifest_dir.with_name(manifest.manifest_dir.name + ".tmp")
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir)
+        tmp_dir.mkdir(parents=True)
+
+        types = pd.Categorical(dataset_df["type"], categories=cls.split_types).codes.astype(np.uint8)
+        np.save(tmp_dir / "type.npy", types)
+        columns = ["type"]
+        for column in dataset_df.columns:
+            if column == "type":
+                continue
+            values = dataset_df[column].astype(str)
+            if column in cls.path_columns:
+                values = values.str.replace("\\", "/").str.removeprefix(prefix)
+            np.save(tmp_dir / f"{column}.npy", np.char.encode(values.to_numpy(dtype=str), "utf8"))
+            columns.append(column)
+        counts = np.bincount(types, minlength=len(cls.split_types))
+        meta = {
+            "version": cls.version,
+            "columns": columns,
+            "type_counts": {split_type: int(counts[i]) for i, split_type in enumerate(cls.split_types)},
+        }
+        with open(tmp_dir / "meta.json", "w", encoding="utf8") as f:
+            json.dump(meta, f)
+        if manifest.manifest_dir.exists():
+            shutil.rmtree(manifest.manifest_dir)
+        os.replace(tmp_dir, manifest.manifest_dir)
+        manifest.load()
+        return manifest
+
+    def load(self) -> bool:
+        meta_path = self.manifest_dir / "meta.json"
+        if not meta_path.exists():
+            return False
+        try:
+            with open(meta_path, "r", encoding="utf8") as f:
+                meta = json.load(f)
+            if meta.get("version") != self.version:
+                logger.warning(f"拆分清单版本不匹配: {meta.get('version')}")
+                return False
+            self.columns = {column: np.load(self.manifest_dir / f"{column}.npy", mmap_mode="r", allow_pickle=False)
+                            for column in meta["columns"]}
+            self.type_counts = meta["type_counts"]
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"拆分清单损坏: {self.manifest_dir}, {e}")
+            return False
+        return True
+
+    def labels(self) -> list[str]:
+        """
+        分类数据集的全部类别
+        """
+        if "label" not in self.columns:
+            return []
+        return np.char.decode(np.unique(self.columns["label"]), "utf8").tolist()
+
+    def select(self, split_type: str | None = None, label: str | None = None,
+               columns: list[str] | None = None) -> pd.DataFrame:
+        """
+        按条件筛选清单，只有命中的行才会被读取并转换为DataFrame
+        :param split_type: train/val/test，None或all表示全部
+        :param label: 分类数据集的类别，None或all表示全部
+        :param columns: 需要的列，默认全部
+        :return: 路径为绝对路径的DataFrame
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if split_type not in (None, "all"):
+            mask &= self.columns["type"] == self.split_types.index(split_type)
+        if label not in (None, "all") and "label" in self.columns:
+            mask &= self.columns["label"] == label.encode("utf8")
+        rows = np.flatnonzero(mask)
+        prefix = self.dataset_dir.resolve().as_posix() + "/"
+        data = dict()
+        for column in columns or self.columns.keys():
+            values = self.columns[column][rows]
+            if column == "type":
+                data[column] = np.array(self.split_types, dtype=object)[values]
+                continue
+            values = pd.Series(np.char.decode(values, "utf8"), dtype=object)
+            if column in self.path_columns:
+                values = values.where(values.str.match(r"^(/|[A-Za-z]:/)"), prefix + values)
+            data[column] = values.to_numpy()
+        return pd.DataFrame(data)
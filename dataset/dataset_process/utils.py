@@ -1,23 +1,157 @@
+import json
+import os
 import pickle
-import random
 import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from pathlib import Path
+from typing import Callable
+
+import numpy as np
 from loguru import logger
 import pandas as pd
 import yaml
 
 from common.utils.utils import is_empty, is_image
+from .split_manifest import SplitManifest
+
+ProgressCallback = Callable[[int, int], None]
+
+
+def load_split_dataset(dataset_dir: Path) -> SplitManifest | None:
+    manifest = SplitManifest(dataset_dir)
+    if manifest.load():
+        return manifest
+    # 兼容旧版本保存的split_cache，读取一次后转换为拆分清单
+    legacy_path = dataset_dir / "split_cache"
+    if not legacy_path.exists():
+        return None
+    with open(legacy_path, "rb") as f:
+        dataset_df = pickle.load(f)
+    manifest = SplitManifest.create(dataset_dir, dataset_df)
+    legacy_path.unlink()
+    return manifest
+
+
+def _reflink(src: Path, dst: Path) -> bool:
+    # 仅Linux(btrfs/xfs等)支持FICLONE，其它平台直接返回False
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        import fcntl
+        with open(src, "rb") as fs, open(dst, "wb") as fd:
+            fcntl.ioctl(fd.fileno(), 0x40049409, fs.fileno())  # FICLONE
+        return True
+    except (OSError, ImportError):
+        dst.unlink(missing_ok=True)
+        return False
+
+
+def link_or_copy(src: Path | str, dst: Path | str):
+    """
+    以尽量不占用额外空间的方式把文件放到目标位置。
+    依次尝试硬链接、reflink、符号链接，文件系统都不支持时才真正复制。
+    :param src: 源文件
+    :param dst: 目标文件路径(不是目录)
+    """
+    src, dst = Path(src), Path(dst)
+    try:
+        os.link(src, dst)
+        return
+    except OSError:
+        pass
+    if _reflink(src, dst):
+        return
+    try:
+        os.symlink(src.resolve(), dst)
+        return
+    except OSError:
+        pass
+    shutil.copy2(src, dst)
+
+
+def _load_check_manifest(manifest_path: Path | None) -> dict:
+    if manifest_path is None or not manifest_path.exists():
+        return dict()
+    try:
+        with open(manifest_path, "r", encoding="utf8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        logger.warning(f"校验缓存文件损坏，将重新校验全部图片: {manifest_path}")
+        return dict()
+
+
+def _save_check_manifest(manifest_path: Path | None, manifest: dict):
+    if manifest_path is None:
+        return
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = manifest_path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, manifest_path)
+
+
+def verify_images(image_paths: list[Path], manifest_path: Path | None = None,
+                  progress_callback: ProgressCallback | None = None) -> list[bool]:
+    """
+    校验图片是否完整。
+    每个文件的校验结果按(文件大小, 修改时间)记录在manifest中，再次导入时只校验发生变化的文件，
+    需要校验的图片在进程池中并行处理。
+    :param image_paths: 需要校验的图片路径
+    :param manifest_path: 校验结果缓存文件，为None时不使用缓存
+    :param progress_callback: 进度回调(已完成数量, 总数量)，在调用线程中执行
+    :return: 与image_paths一一对应的校验结果
+    """
+    manifest = _load_check_manifest(manifest_path)
+    total = len(image_paths)
+    results = [False] * total
+    pending = []
+    for index, image_path in enumerate(image_paths):
+        key = Path(os.path.abspath(image_path)).as_posix()
+        stat = os.stat(image_path)
+        cached = manifest.get(key)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            results[index] = cached[2]
+        else:
+            pending.append((index, key, stat.st_size, stat.st_mtime_ns))
 
+    finished = total - len(pending)
+    if progress_callback:
+        progress_callback(finished, total)
+    if not pending:
+        return results
 
-def load_split_dataset(dataset_dir: Path):
-    dataset_df = pickle.load(open(dataset_dir / "split_cache", "rb"))
-    return dataset_df
+    keys = [item[1] for item in pending]
+    step = max(total // 100, 1)
+    # 文件较少时进程启动开销大于收益，直接在当前线程校验
+    if len(pending) < 64:
+        verified = map(is_image, keys)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor()
+        verified = executor.map(is_image, keys, chunksize=64)
+    try:
+        for (index, key, size, mtime), ok in zip(pending, verified):
+            results[index] = ok
+            manifest[key] = [size, mtime, ok]
+            finished += 1
+            if progress_callback and (finished % step == 0 or finished == total):
+                progress_callback(finished, total)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    _save_check_manifest(manifest_path, manifest)
+    return results
 
 
-def classify_dataset_check(dataset_dir: Path | str):
+def classify_dataset_check(dataset_dir: Path | str, manifest_path: Path | None = None,
+                           progress_callback: ProgressCallback | None = None):
+    if isinstance(dataset_dir, str):
+        dataset_dir = Path(dataset_dir)
     exist_one_type = False
     if is_empty(dataset_dir):
         return False
+    image_files = []
     for item in dataset_dir.iterdir():
         if item.is_dir():
             exist_one_type = True
@@ -25,16 +159,18 @@ def classify_dataset_check(dataset_dir: Path | str):
                 return False
             for file in item.iterdir():
                 if file.is_file():
-                    if not is_image(file):
-                        return False
+                    image_files.append(file)
                 else:
                     return False
         else:
             continue
-    return exist_one_type
+    if not exist_one_type:
+        return False
+    return all(verify_images(image_files, manifest_path, progress_callback))
 
 
-def coco_dataset_check(dataset_dir: Path | str):
+def coco_dataset_check(dataset_dir: Path | str, manifest_path: Path | None = None,
+                       progress_callback: ProgressCallback | None = None):
     if isinstance(dataset_dir, str):
         dataset_dir = Path(dataset_dir)
 
@@ -64,140 +200,153 @@ def coco_dataset_check(dataset_dir: Path | str):
         logger.error("[labels]目录为空")
         return False
 
-    labels = []
+    labels = set()
     for item in labels_path.iterdir():
         if not item.is_file() or item.suffix != ".txt":
             logger.error(f"源数据集[labels]路径中，存在非txt文件或路径{item.name}")
             return False
-        labels.append(item.stem)
+        labels.add(item.stem)
+    image_files = []
     for item in images_path.iterdir():
-        if not item.is_file() or not is_image(item):
+        if not item.is_file():
             logger.error(f"源数据集[images]路径中，存在非图片的文件或路径{item.name}")
             return False
         if item.stem not in labels:
             logger.error(f"labels目录下没有对应的label，{item.name}")
             return False
+        image_files.append(item)
+    for item, ok in zip(image_files, verify_images(image_files, manifest_path, progress_callback)):
+        if not ok:
+            logger.error(f"源数据集[images]路径中，存在非图片的文件或路径{item.name}")
+            return False
     return True
 
 
-def classify_dataset_split(dataset_dir: Path | str, split_rates: list | tuple) -> pd.DataFrame | None:
+def bulk_link_or_copy(src_paths: list, dst_paths: list, progress_callback: ProgressCallback | None = None):
+    """
+    使用线程池批量执行link_or_copy，文件系统IO可以并发进行。
+    :param src_paths: 源文件列表
+    :param dst_paths: 目标文件列表，与src_paths一一对应
+    :param progress_callback: 进度回调(已完成数量, 总数量)，在调用线程中执行
+    """
+    total = len(src_paths)
+    step = max(total // 100, 1)
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) + 4)) as executor:
+        for finished, _ in enumerate(executor.map(link_or_copy, src_paths, dst_paths), 1):
+            if progress_callback and (finished % step == 0 or finished == total):
+                progress_callback(finished, total)
+
+
+def _split_types(dataset_num: int, split_rates: list | tuple) -> np.ndarray:
+    # 按比例生成与打乱后顺序对应的数据集类型，train在前，其次val，剩余为test
+    train_num = round(dataset_num * split_rates[0] / 100)
+    val_num = min(round(dataset_num * split_rates[1] / 100), dataset_num - train_num)
+    test_num = dataset_num - train_num - val_num
+    return np.repeat(np.array(["train", "val", "test"], dtype=object), [train_num, val_num, test_num])
+
+
+def _sort_by_split_type(dataset_df: pd.DataFrame) -> pd.DataFrame:
+    order = {"train": 0, "val": 1, "test": 2}
+    return (dataset_df.sort_values("type", key=lambda x: x.map(order), kind="stable")
+            .reset_index(drop=True))
+
+
+def classify_dataset_split(dataset_dir: Path | str, split_rates: list | tuple,
+                           progress_callback: ProgressCallback | None = None) -> pd.DataFrame | None:
     if isinstance(dataset_dir, str):
         dataset_dir = Path(dataset_dir)
 
-    dataset_map = dict()
-    label_list = []
-    for item in (dataset_dir / "src").iterdir():
+    src_dir = (dataset_dir / "src").resolve()
+    records = []
+    for item in os.scandir(src_dir):
         if item.is_dir():
             if item.name == "split":
                 continue
-            images = list(map(lambda x: x.resolve().as_posix(), item.iterdir()))
-            dataset_map[item.name] = images
-            label_list.append(item.name)
-
-    train_dataset_list = []
-    val_dataset_list = []
-    test_dataset_list = []
-
-    for key, item in dataset_map.items():
-        label_dataset_num = len(item)
-        train_num = round(label_dataset_num * split_rates[0] / 100)
-        val_num = round(label_dataset_num * split_rates[1] / 100)
-        test_num = label_dataset_num - train_num - val_num
-        label_dataset_index = list(range(len(item)))
-        random.shuffle(label_dataset_index)
-        cur_label_train_data = [[item[index], key] for index in label_dataset_index[:train_num]]
-        cur_label_val_data = [[item[index], key] for index in
-                              label_dataset_index[train_num:train_num + val_num]]
-        cur_label_test_data = [[item[index], key] for index in label_dataset_index[train_num + val_num:]]
-        train_dataset_list.extend(cur_label_train_data)
-        val_dataset_list.extend(cur_label_val_data)
-        test_dataset_list.extend(cur_label_test_data)
-
-    train_df = pd.DataFrame(train_dataset_list, index=None, columns=['image_path', 'label'])
-    train_df["type"] = ["train"] * len(train_dataset_list)
-    val_df = pd.DataFrame(val_dataset_list, index=None, columns=['image_path', 'label'])
-    val_df["type"] = ["val"] * len(val_dataset_list)
-    test_df = pd.DataFrame(test_dataset_list, index=None, columns=['image_path', 'label'])
-    test_df["type"] = ["test"] * len(test_dataset_list)
-    all_df = pd.concat([train_df, val_df, test_df]).reset_index(drop=True)
+            records.extend((f"{src_dir.as_posix()}/{item.name}/{file.name}", item.name)
+                           for file in os.scandir(item.path))
+    all_df = pd.DataFrame(records, columns=["image_path", "label"])
+    if all_df.empty:
+        return None
+
+    # 每个类别内部分别打乱，再按比例划分
+    split_dfs = []
+    for label, group in all_df.groupby("label", sort=False):
+        split_dfs.append(group.sample(frac=1).assign(type=_split_types(group.shape[0], split_rates)))
+    all_df = _sort_by_split_type(pd.concat(split_dfs))
+
     dst_dir = dataset_dir / "split"
     if dst_dir.exists():
         shutil.rmtree(dst_dir)
 
-    for key, group in all_df.groupby(["type", "label"]).groups.items():
-        split_dir = dst_dir / key[0] / key[1]
-        split_dir.mkdir(parents=True, exist_ok=True)
-        for index in group:
-            filename = all_df.loc[index, "image_path"]
-            all_df.loc[index, "image_path"] = (split_dir / Path(filename).name).resolve().as_posix()
-            shutil.copy(filename, split_dir)
-    pickle.dump(all_df, open(dataset_dir / "split_cache", "wb"))
+    for split_type, label in all_df[["type", "label"]].drop_duplicates().itertuples(index=False):
+        (dst_dir / split_type / label).mkdir(parents=True, exist_ok=True)
+    src_paths = all_df["image_path"]
+    all_df["image_path"] = (dst_dir.resolve().as_posix() + "/" + all_df["type"] + "/" + all_df["label"] + "/" +
+                            src_paths.str.rsplit("/", n=1).str[-1])
+    # 分类数据集必须保持目录结构，用链接代替复制
+    bulk_link_or_copy(src_paths.tolist(), all_df["image_path"].tolist(), progress_callback)
+    SplitManifest.create(dataset_dir, all_df)
     return all_df
 
 
-def coco_dataset_split(dataset_dir: Path | str, split_rates: list, is_pose: bool = False) -> pd.DataFrame | None:
+def coco_dataset_split(dataset_dir: Path | str, split_rates: list, is_pose: bool = False,
+                       progress_callback: ProgressCallback | None = None) -> pd.DataFrame | None:
     if isinstance(dataset_dir, str):
         dataset_dir = Path(dataset_dir)
     # ./scr/images/xxx.jpg
-    images_paths = list((dataset_dir / "src" / "images").iterdir())
-    # labels_paths = list((dataset_dir / "src" / "labels").iterdir())
+    images_dir = (dataset_dir / "src" / "images").resolve()
     # ./src/labels/xxx.txt
-    labels_paths = [x.parent.parent / "labels" / (x.stem + ".txt") for x in images_paths]
+    labels_dir = (dataset_dir / "src" / "labels").resolve()
+    image_names = pd.Series([item.name for item in os.scandir(images_dir)], dtype=object)
 
-    dataset_num = len(images_paths)
+    dataset_num = image_names.shape[0]
     train_num = round(dataset_num * split_rates[0] / 100)
     val_num = round(dataset_num * split_rates[1] / 100)
     if train_num == 0 or val_num == 0:
         return None
-    dataset_index = list(range(dataset_num))
-    random.shuffle(dataset_index)
-
-    train_data_list = [images_paths[index] for index in dataset_index[:train_num]]
-    val_data_list = [images_paths[index] for index in dataset_index[train_num:train_num + val_num]]
-    test_data_list = [images_paths[index] for index in dataset_index[train_num + val_num:]]
 
-    train_label_list = [labels_paths[index] for index in dataset_index[:train_num]]
-    val_label_list = [labels_paths[index] for index in dataset_index[train_num:train_num + val_num]]
-    test_label_list = [labels_paths[index] for index in dataset_index[train_num + val_num:]]
-
-    train_df = pd.DataFrame({"image_path": train_data_list, "label_path": train_label_list}, index=None)
-    train_df["type"] = ["train"] * len(train_data_list)
-    val_df = pd.DataFrame({"image_path": val_data_list, "label_path": val_label_list}, index=None)
-    val_df["type"] = ["val"] * len(val_data_list)
-    test_df = pd.DataFrame({"image_path": test_data_list, "label_path": test_label_list}, index=None)
-    test_df["type"] = ["test"] * len(test_data_list)
-    all_df = pd.concat([train_df, val_df, test_df]).reset_index(drop=True)
+    image_names = image_names.iloc[np.random.permutation(dataset_num)].reset_index(drop=True)
+    all_df = pd.DataFrame({
+        "image_path": images_dir.as_posix() + "/" + image_names,
+        "label_path": labels_dir.as_posix() + "/" + image_names.str.rsplit(".", n=1).str[0] + ".txt",
+        "type": _split_types(dataset_num, split_rates),
+    })
 
     dst_dir = dataset_dir / "split"
     if dst_dir.exists():
         shutil.rmtree(dst_dir)
     dst_dir.mkdir(parents=True, exist_ok=True)
 
-    for key, group in all_df.groupby("type").groups.items():
-        split_images_dir = dst_dir / "images" / str(key)
-        split_labels_dir = dst_dir / "labels" / str(key)
-        split_images_dir.mkdir(parents=True, exist_ok=True)
-        split_labels_dir.mkdir(parents=True, exist_ok=True)
-        for index in group:
-            image_path = all_df.loc[index, "image_path"]
-            label_path = all_df.loc[index, "label_path"]
-            all_df.loc[index, "image_path"] = (split_images_dir / Path(image_path).name).resolve().as_posix()
-            all_df.loc[index, "label_path"] = (split_labels_dir / Path(label_path).name).resolve().as_posix()
-            shutil.copy(image_path, split_images_dir)
-            shutil.copy(label_path, split_labels_dir)
-    pickle.dump(all_df, open(dataset_dir / "split_cache", "wb"))
-    save_config_yaml(dataset_dir, dst_dir, is_pose)
+    # 不再复制图片和标签，只写出ultralytics支持的图片列表文件，标签按images->labels规则定位到src目录
+    # 列表中写相对于列表文件所在目录的"./"路径，数据集目录整体移动后划分仍然有效
+    relative_paths = "./../src/images/" + image_names
+    split_types = []
+    for split_type in ("train", "val", "test"):
+        image_list = relative_paths[all_df["type"] == split_type]
+        if image_list.empty:
+            continue
+        split_types.append(split_type)
+        with open(dst_dir / f"{split_type}.txt", "w", encoding="utf8") as f:
+            f.write("".join(image_list + "\n"))
+    SplitManifest.create(dataset_dir, all_df)
+    save_config_yaml(dataset_dir, dst_dir, is_pose, split_types)
+    if progress_callback:
+        progress_callback(dataset_num, dataset_num)
     return all_df
 
 
-def save_config_yaml(dataset_dir: Path, dst_dir: Path, is_pose: bool = False):
+def save_config_yaml(dataset_dir: Path, dst_dir: Path, is_pose: bool = False,
+                     split_types: tuple | list = ("train", "val", "test")):
+    """
+    写出训练用的config.yaml
+    不写path，ultralytics会以yaml所在目录作为数据集根目录，数据集目录移动后无需重新划分
+    :param split_types: 有图片的划分类型，没有测试集时不写test
+    """
     dst_yaml_path = dst_dir / "config.yaml"
     dataset_config = dict()
     with open(dst_yaml_path, 'w', encoding="utf8") as file:
-        dataset_config.update({"path": dst_dir.resolve().as_posix()})
-        dataset_config.update({"train": "images/train"})
-        dataset_config.update({"val": "images/val"})
-        dataset_config.update({"test": "images/test"})
+        for split_type in split_types:
+            dataset_config.update({split_type: f"{split_type}.txt"})
         if is_pose:
             dataset_config.update({"kpt_shape": [17, 3],
                                    "flip_idx": [0, 2, 1, 4, 3, 6, 5, 8, 7, 10, 9, 12, 11, 14, 13, 16, 15]})
@@ -0,0 +1,84 @@
+"""
+数据集划分的性能测试。
+生成合成的检测和分类数据集（默认各50000张图片），分别计时coco_dataset_split和classify_dataset_split。
+划分只读取目录和文件名，不解码图片，合成图片使用很小的占位内容即可。
+
+用法: python example/benchmark_dataset_split.py --num 50000 --repeat 3
+"""
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, Path(__file__).resolve().parents[1].as_posix())
+
+from dataset.dataset_process.utils import coco_dataset_split, classify_dataset_split
+
+# 最小的JPEG文件头和结束标记
+_PLACEHOLDER_IMAGE = b"\xff\xd8\xff\xe0" + b"\x00" * 16 + b"\xff\xd9"
+
+
+def make_coco_dataset(dataset_dir: Path, num: int, num_classes: int = 10):
+    """
+    生成 src/images、src/labels 和 src/classes.txt
+    """
+    images_dir = dataset_dir / "src" / "images"
+    labels_dir = dataset_dir / "src" / "labels"
+    images_dir.mkdir(parents=True)
+    labels_dir.mkdir(parents=True)
+    for i in range(num):
+        (images_dir / f"{i:08d}.jpg").write_bytes(_PLACEHOLDER_IMAGE)
+        (labels_dir / f"{i:08d}.txt").write_text(f"{i % num_classes} 0.5 0.5 0.2 0.2\n", encoding="utf8")
+    (dataset_dir / "src" / "classes.txt").write_text(
+        "".join(f"class{c}\n" for c in range(num_classes)), encoding="utf8")
+
+
+def make_classify_dataset(dataset_dir: Path, num: int, num_classes: int = 10):
+    """
+    生成 src/<类别>/xxx.jpg
+    """
+    for c in range(num_classes):
+        (dataset_dir / "src" / f"class{c}").mkdir(parents=True)
+    for i in range(num):
+        (dataset_dir / "src" / f"class{i % num_classes}" / f"{i:08d}.jpg").write_bytes(_PLACEHOLDER_IMAGE)
+
+
+def benchmark(name: str, split_func, dataset_dir: Path, repeat: int):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = split_func(dataset_dir)
+        times.append(time.perf_counter() - start)
+        if result is None:
+            raise RuntimeError(f"{name}: split returned None")
+    print(f"{name:<24} images: {result.shape[0]:<8} best: {min(times):.3f}s  mean: {sum(times) / len(times):.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark dataset split on a synthetic dataset")
+    parser.add_argument("--num", type=int, default=50000, help="number of synthetic images")
+    parser.add_argument("--repeat", type=int, default=3, help="number of timed runs")
+    parser.add_argument("--dir", type=str, default=None, help="working directory, defaults to a temporary directory")
+    args = parser.parse_args()
+
+    work_dir = Path(tempfile.mkdtemp(prefix="split_benchmark_", dir=args.dir))
+    try:
+        coco_dir = work_dir / "coco"
+        classify_dir = work_dir / "classify"
+        start = time.perf_counter()
+        make_coco_dataset(coco_dir, args.num)
+        make_classify_dataset(classify_dir, args.num)
+        print(f"synthetic datasets created in {time.perf_counter() - start:.1f}s: {work_dir}")
+
+        split_rates = [70, 20, 10]
+        benchmark("coco_dataset_split", lambda d: coco_dataset_split(d, split_rates), coco_dir, args.repeat)
+        benchmark("classify_dataset_split", lambda d: classify_dataset_split(d, split_rates), classify_dir,
+                  args.repeat)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
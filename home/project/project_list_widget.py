@@ -1,3 +1,4 @@
+import math
 import os
 import shutil
 
@@ -6,7 +7,7 @@ from PySide6.QtWidgets import (QVBoxLayout, QHBoxLayout, QFormLayout)
 from qfluentwidgets import BodyLabel, PrimaryPushButton, FluentIcon, \
     FlowLayout, ComboBox, InfoBar, InfoBarPosition
 from sqlalchemy import desc, asc
-from sqlalchemy.orm import Query
+from sqlalchemy.orm import Query, Session
 
 from common.component.custom_scroll_widget import CustomScrollWidget
 from common.core.window_manager import window_manager
@@ -69,14 +70,15 @@ class ProjectListWidget(ContentWidgetBase):
 
         self.vly.addLayout(self.hly_btn)
         self.vly.addWidget(self.scroll_area)
-        pager = PipsPager()
-        pager.setPageNumber(15)
-        pager.setVisibleNumber(8)
+        self.pager = PipsPager()
+        self.pager.setPageSize(15)
+        self.pager.setPageNumber(1)
+        self.pager.setVisibleNumber(8)
 
         # 始终显示前进和后退按钮
-        pager.setNextButtonDisplayMode(PipsScrollButtonDisplayMode.ALWAYS)
-        pager.setPreviousButtonDisplayMode(PipsScrollButtonDisplayMode.ALWAYS)
-        self.vly.addWidget(pager)
+        self.pager.setNextButtonDisplayMode(PipsScrollButtonDisplayMode.ALWAYS)
+        self.pager.setPreviousButtonDisplayMode(PipsScrollButtonDisplayMode.ALWAYS)
+        self.vly.addWidget(self.pager)
 
         self.update_widget()
         self._connect_signals_and_slot()
@@ -86,6 +88,8 @@ class ProjectListWidget(ContentWidgetBase):
         self.btn_create_project.clicked.connect(self._on_clicked_create_project)
         self.cmb_sort.currentIndexChanged.connect(self._on_sorting_changed)
         self.cmb_type.currentIndexChanged.connect(self._on_sorting_changed)
+        self.pager.currentIndexChanged.connect(self._load_page)
+        self.pager.pageSizeChanged.connect(self._on_sorting_changed)
 
     def _on_theme_changed(self):
         for i in range(self.layout.count()):
@@ -106,9 +110,9 @@ class ProjectListWidget(ContentWidgetBase):
 
     @Slot(int)
     def _on_sorting_changed(self, index):
-        self.update_widget()
+        self.update_widget(0)
 
-    def update_widget(self):
+    def _project_query(self, session: Session) -> Query:
         field = Project.project_name
         order = asc
         if self.cmb_sort.currentIndex() == 0:
@@ -124,15 +128,37 @@ class ProjectListWidget(ContentWidgetBase):
             field = Project.project_name
             order = desc
 
+        if self.cmb_type.currentIndex() == 0:
+            query: Query = session.query(Project)
+        else:
+            query: Query = session.query(Project).filter(Project.model_type == self.cmb_type.currentIndex() - 1)
+        # 加上主键保证分页时顺序稳定
+        return query.order_by(order(field), order(Project.id))
+
+    def update_widget(self, page: int | None = None):
+        """
+        在数据库中计数并重新分页，只创建当前页的项目卡片
+        :param page: 显示的页，默认保持当前页
+        """
+        with db_session(auto_commit_exit=False) as session:
+            total = self._project_query(session).order_by(None).count()
+        page_number = max(1, math.ceil(total / self.pager.pageSize()))
+        if page is None:
+            page = self.pager.currentIndex()
+        page = min(max(page, 0), page_number - 1)
+        self.pager.blockSignals(True)
+        if self.pager.getPageNumber() != page_number:
+            self.pager.setPageNumber(page_number)
+        self.pager.setCurrentIndex(page)
+        self.pager.blockSignals(False)
+        self._load_page(page)
+
+    @Slot(int)
+    def _load_page(self, page: int):
         self._clear_project_layout()
-        with db_session() as session:
-            if self.cmb_type.currentIndex() == 0:
-                query: Query = session.query(Project)
-            else:
-                query: Query = session.query(Project).filter(Project.model_type == self.cmb_type.currentIndex() - 1)
-            result: list[Project] = query.order_by(order(field)).all()
-            # 转成json
-            # json_result = json.dumps([user.__dict__ for user in result], default=str)
+        page_size = self.pager.pageSize()
+        with db_session(auto_commit_exit=False) as session:
+            result: list[Project] = self._project_query(session).offset(page * page_size).limit(page_size).all()
             for row in result:
                 project_info = ProjectInfo()
                 project_info.project_name = row.project_name
@@ -171,8 +197,6 @@ class ProjectListWidget(ContentWidgetBase):
 
     @Slot(ProjectInfo)
     def _on_add_new_project(self, project_info: ProjectInfo):
-        self._add_new_project(project_info)
-
         # 创建一个目录
         new_project_row = Project(
             project_name=project_info.project_name,
@@ -186,6 +210,8 @@ class ProjectListWidget(ContentWidgetBase):
         with db_session(True) as session:
             session.add(new_project_row)
         os.makedirs(project_info.project_dir, exist_ok=True)
+        # 按当前排序重新读取当前页
+        self.update_widget()
 
     @Slot(str)
     def _on_view_project_detail(self, project_info):
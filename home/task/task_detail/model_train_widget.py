@@ -1,42 +1,26 @@
 import pickle
+from collections import deque
 from pathlib import Path
-from typing import Optional
 
+import numpy as np
 import pyqtgraph as pg
 import yaml
-from PySide6.QtCore import Slot, QCoreApplication, Signal
+from PySide6.QtCore import Slot, QCoreApplication, Signal, QTimer
 from PySide6.QtGui import QFont, QColor, Qt
 from PySide6.QtWidgets import (QVBoxLayout, QWidget, QHBoxLayout, QSizePolicy)
-from loguru import logger
 from pyqtgraph import PlotItem
 from qfluentwidgets import PushButton, PrimaryPushButton, FluentIcon, \
-    TextEdit, isDarkTheme, InfoBar, InfoBarPosition
+    TextEdit, isDarkTheme, InfoBar, InfoBarPosition, CompactSpinBox, BodyLabel
 
 from common.component.collapsible_widget import CollapsibleWidgetItem
 from common.component.custom_process_bar import CustomProcessBar
-from common.database.db_helper import db_session
-from common.utils.utils import log_warning, log_error
-from models.models import TrainTask
+from common.utils.utils import log_warning, log_error, log_info
 from settings import cfg
 from ..task_thread.model_train_thread import ModelTrainThread
+from ..task_thread.train_scheduler import TrainJobScheduler
 from ...types import TrainTaskInfo, TrainTaskStatus
 
 
-class ModelTrainThreadMap:
-    def __init__(self):
-        self._max_map_len = 5
-        self._thread_map: dict[str, ModelTrainThread] = dict()
-
-    def update_thread(self, thread_map: dict[str, ModelTrainThread]):
-        self._thread_map.update(thread_map)
-
-    def get_thread_map(self) -> dict[str, ModelTrainThread]:
-        return self._thread_map
-
-    def get_thread_by_task_id(self, task_id) -> Optional[ModelTrainThread]:
-        return self._thread_map.get(task_id, None)
-
-
 class GraphicsLayoutWidget(pg.GraphicsLayoutWidget):
 
     def __init__(self, *args, **kwargs):
@@ -65,6 +49,49 @@ class GraphicsLayoutWidget(pg.GraphicsLayoutWidget):
         super().clear()
 
 
+class LiveCurve:
+    """
+    训练过程中实时更新的曲线。
+    数据只追加到按倍数扩容的numpy数组中，由定时器批量刷新到界面；
+    绘制时只裁剪可见区间，并按视图像素宽度做峰值(min/max)降采样，刷新代价与迭代次数基本无关。
+    """
+
+    def __init__(self, plot_item: PlotItem, name: str, values: list):
+        self._data = np.empty(max(1024, 2 * len(values)), dtype=np.float64)
+        self._size = 0
+        self._dirty = False
+        self._curve = plot_item.plot(name=name)
+        self._curve.setDownsampling(auto=True, method="peak")
+        self._curve.setClipToView(True)
+        self.extend(values)
+        self.refresh()
+
+    def extend(self, values: list | float):
+        values = np.asarray(values, dtype=np.float64).reshape(-1)
+        size = self._size + values.shape[0]
+        if size > self._data.shape[0]:
+            data = np.empty(max(size, 2 * self._data.shape[0]), dtype=np.float64)
+            data[:self._size] = self._data[:self._size]
+            self._data = data
+        self._data[self._size:size] = values
+        self._size = size
+        self._dirty = True
+
+    def append_at(self, index: int, value: float):
+        """
+        追加训练线程发送的增量数据点
+        :param index: 数据点在序列中的下标，小于当前长度说明初始化时已包含该点，直接丢弃
+        """
+        if index >= self._size:
+            self.extend(value)
+
+    def refresh(self):
+        if not self._dirty:
+            return
+        self._dirty = False
+        self._curve.setData(self._data[:self._size])
+
+
 class RichTextLogWidget(TextEdit):
     def __init__(self, save_file_path: Path | None = None, parent=None):
         super().__init__(parent=parent)
@@ -88,6 +115,7 @@ class RichTextLogWidget(TextEdit):
 class ModelTrainWidget(CollapsibleWidgetItem):
     is_training_signal = Signal(bool, str)
     next_step_clicked = Signal(TrainTaskInfo)
+    max_log_lines = 2000
 
     def __init__(self, parent=None):
         super(ModelTrainWidget, self).__init__(self.tr("▌Model training"), parent=parent)
@@ -105,19 +133,30 @@ class ModelTrainWidget(CollapsibleWidgetItem):
         self.btn_start_train.setFixedWidth(120)
         self.btn_stop_train.setFixedWidth(120)
         self.btn_next_step.setFixedWidth(120)
+        # 优先级越高越先从训练队列中启动
+        self.lbl_priority = BodyLabel(self.tr("Priority"))
+        self.spb_priority = CompactSpinBox()
+        self.spb_priority.setRange(-10, 10)
+        self.spb_priority.setValue(0)
         self.psb_train = CustomProcessBar()
         self.psb_train.set_value(0)
         self.hly_btn = QHBoxLayout()
         self.hly_btn.addWidget(self.btn_start_train)
         self.hly_btn.addWidget(self.btn_stop_train)
+        self.hly_btn.addWidget(self.lbl_priority)
+        self.hly_btn.addWidget(self.spb_priority)
         self.hly_btn.addWidget(self.btn_next_step)
         self.hly_btn.addWidget(self.psb_train)
 
         pg.setConfigOptions(antialias=True)
         self.pg_widget = GraphicsLayoutWidget(show=False)
         self.pg_widget.setFixedHeight(600)
-        self._loss_plots = dict()
-        self._metric_plots = dict()
+        self._loss_plots: dict[str, LiveCurve] = dict()
+        self._metric_plots: dict[str, LiveCurve] = dict()
+        # 数据点随信号追加，界面最多每100ms刷新一次
+        self._plot_refresh_timer = QTimer(self)
+        self._plot_refresh_timer.setInterval(100)
+        self._plot_refresh_timer.timeout.connect(self._refresh_plots)
 
         self.ted_train_log = RichTextLogWidget()
         font = QFont("Courier")  # "Courier" 是常见的等宽字体
@@ -127,12 +166,13 @@ class ModelTrainWidget(CollapsibleWidgetItem):
         self.ted_train_log.setFont(font)
         self.ted_train_log.setReadOnly(True)
         self.ted_train_log.setMinimumHeight(450)
+        # 只显示最近的日志，超出的行会从顶部移除
+        self.ted_train_log.document().setMaximumBlockCount(self.max_log_lines)
 
         self.vly.addLayout(self.hly_btn)
         self.vly.addWidget(self.pg_widget)
         self.vly.addWidget(self.ted_train_log)
 
-        self._connect_signals_and_slot()
         self._train_parameter: dict = dict()
         self._train_config_file_path: Path | None = None
         self._last_model = ""
@@ -140,13 +180,17 @@ class ModelTrainWidget(CollapsibleWidgetItem):
         # 继续训练还是重新训练
         self._is_retrain = True
 
-        self._task_thread_map = ModelTrainThreadMap()
+        self._scheduler = TrainJobScheduler(self)
         self._current_thread: ModelTrainThread | None = None
+        self._connect_signals_and_slot()
+        self._scheduler.restore()
 
     def _connect_signals_and_slot(self):
         self.btn_start_train.clicked.connect(self._on_start_train_clicked)
         self.btn_stop_train.clicked.connect(self._on_stop_train_clicked)
         self.btn_next_step.clicked.connect(self._on_next_step_clicked)
+        self._scheduler.job_thread_created.connect(self._on_job_thread_created)
+        self._scheduler.job_removed.connect(self._on_job_removed)
 
     def set_task_info(self, task_info: TrainTaskInfo):
         self._task_info = task_info
@@ -162,7 +206,8 @@ class ModelTrainWidget(CollapsibleWidgetItem):
             self.psb_train.set_max_value(self._train_parameter["epochs"])
             log_file_path = self._task_info.task_dir / "train.log"
             if log_file_path.exists():
-                self.ted_train_log.setPlainText(open(log_file_path, "r", encoding="utf8").read())
+                with open(log_file_path, "r", encoding="utf8") as f:
+                    self.ted_train_log.setPlainText("".join(deque(f, maxlen=self.max_log_lines)))
                 v_scroll_bar = self.ted_train_log.verticalScrollBar()
                 v_scroll_bar.setValue(v_scroll_bar.maximum())
             # 加载训练历史数据
@@ -178,9 +223,8 @@ class ModelTrainWidget(CollapsibleWidgetItem):
         if task_info.task_status == TrainTaskStatus.TRAINING:
             self.btn_start_train.setEnabled(False)
             self.btn_stop_train.setEnabled(True)
-            if self._task_info.task_id in self._task_thread_map.get_thread_map():
-                self._current_thread = self._task_thread_map.get_thread_by_task_id(self._task_info.task_id)
-            else:
+            self._current_thread = self._scheduler.get_thread_by_task_id(self._task_info.task_id)
+            if self._current_thread is None:
                 log_error("status is training but not find the train thread")
                 return
             self.ted_train_log.clear()
@@ -189,6 +233,7 @@ class ModelTrainWidget(CollapsibleWidgetItem):
             loss_data = self._current_thread.get_loss_data()
             metric_data = self._current_thread.get_metric_data()
             self.load_graph(loss_data, metric_data)
+            self._plot_refresh_timer.start()
         else:
             self._current_thread = None
 
@@ -199,9 +244,12 @@ class ModelTrainWidget(CollapsibleWidgetItem):
         if task_info.task_status == TrainTaskStatus.TRN_FINISHED:
             self.btn_start_train.setText(self.tr("Retrain"))
             self.btn_next_step.setVisible(True)
+        if task_info.task_status != TrainTaskStatus.TRAINING and self._scheduler.is_queued(task_info.task_id):
+            self._disable_btn_to_train_status()
+            self.ted_train_log.append(log_info(self.tr("waiting in the training queue")))
 
-    def _initial_model_thread(self) -> Optional[ModelTrainThread]:
-        model_thread = ModelTrainThread(self._train_parameter)
+    @Slot(str, object)
+    def _on_job_thread_created(self, task_id: str, model_thread: ModelTrainThread):
         model_thread.train_start_signal.connect(self.on_handle_train_start)
         model_thread.train_epoch_end.connect(self.on_handle_epoch_end)
         model_thread.model_train_end.connect(self.on_handle_train_end)
@@ -209,11 +257,18 @@ class ModelTrainWidget(CollapsibleWidgetItem):
         model_thread.log_changed_signal.connect(self._on_log_changed)
         model_thread.loss_changed_signal.connect(self._on_loss_changed)
         model_thread.metric_changed_signal.connect(self._on_metric_changed)
-        model_thread.finished.connect(model_thread.deleteLater)
-        if model_thread.init_model_trainer(self._task_info):
-            return model_thread
-        else:
-            return None
+        if self._task_info and self._task_info.task_id == task_id:
+            # 排队中的任务被调度启动时，界面切换到该任务的训练线程
+            self._current_thread = model_thread
+            self._task_info.task_status = TrainTaskStatus.TRAINING
+            self._disable_btn_to_train_status()
+            self.btn_next_step.setVisible(False)
+
+    @Slot(str)
+    def _on_job_removed(self, task_id: str):
+        if self._task_info and self._task_info.task_id == task_id:
+            self._current_thread = None
+            self._enable_btn_to_train_status()
 
     def _enable_btn_to_train_status(self):
         self.btn_start_train.setEnabled(True)
@@ -225,35 +280,16 @@ class ModelTrainWidget(CollapsibleWidgetItem):
 
     def start_train(self):
         self.set_task_info(self._task_info)
-        # if self._task_info.task_status == TaskStatus.TRAINING:
-        #     if self._task_info.task_id in self._task_thread_map.get_thread_map():
-        #         self._current_thread = self._task_thread_map.get_thread_by_task_id(self._task_info.task_id)
-        #     else:
-        #         log_error("status is training but not find the train thread")
-        #         return
-        # else:
-        if self._task_info.task_status != TrainTaskStatus.TRAINING:
-            if self._is_retrain:
-                self.ted_train_log.clear()
-                self.psb_train.set_value(0)
-                self.pg_widget.clear()
-            else:
-                pass
-                # current_epoch = self._current_thread.get_current_epoch()
-                # self.psb_train.set_value(current_epoch)
-            task_thread = self._initial_model_thread()
-            if task_thread:
-                self._task_thread_map.update_thread({self._task_info.task_id: task_thread})
-                self._current_thread = self._task_thread_map.get_thread_by_task_id(self._task_info.task_id)
-
+        if self._task_info.task_status == TrainTaskStatus.TRAINING or self._scheduler.is_queued(
+                self._task_info.task_id):
+            return
+        if self._is_retrain:
+            self.ted_train_log.clear()
+            self.psb_train.set_value(0)
+            self.pg_widget.clear()
         self._disable_btn_to_train_status()
-        self._current_thread.start()
-        self._task_info.task_status = TrainTaskStatus.TRAINING
-        with db_session() as session:
-            task: TrainTask = session.query(TrainTask).filter_by(task_id=self._task_info.task_id).first()
-            task.task_status = self._task_info.task_status.value
-        if self._task_info.task_status != TrainTaskStatus.TRN_FINISHED:
-            self.btn_next_step.setVisible(False)
+        if not self._scheduler.enqueue(self._task_info.task_id, self.spb_priority.value()):
+            self.ted_train_log.append(log_info(self.tr("waiting in the training queue")))
 
     @Slot(str)
     def _on_log_changed(self, message: str):
@@ -265,15 +301,24 @@ class ModelTrainWidget(CollapsibleWidgetItem):
     def _on_loss_changed(self, loss_data: dict):
         if self.sender() != self._current_thread:
             return
-        for key, value in loss_data.items():
-            self._loss_plots[key].plot(value, name=key)
+        for key, (index, value) in loss_data.items():
+            if key in self._loss_plots:
+                self._loss_plots[key].append_at(index, value)
 
     @Slot(dict)
     def _on_metric_changed(self, metric_data: dict):
         if self.sender() != self._current_thread:
             return
-        for key, value in metric_data.items():
-            self._metric_plots[key].plot(value, name=key)
+        for key, (index, value) in metric_data.items():
+            if key in self._metric_plots:
+                self._metric_plots[key].append_at(index, value)
+
+    @Slot()
+    def _refresh_plots(self):
+        for curve in self._loss_plots.values():
+            curve.refresh()
+        for curve in self._metric_plots.values():
+            curve.refresh()
 
     @Slot()
     def _on_start_train_clicked(self):
@@ -281,22 +326,25 @@ class ModelTrainWidget(CollapsibleWidgetItem):
 
     @Slot()
     def _on_stop_train_clicked(self):
-        self._current_thread.stop_train()
-        self._current_thread.quit()
-        self._current_thread.wait()
+        if self._current_thread is None:
+            # 还在排队，直接移出队列
+            self._scheduler.cancel(self._task_info.task_id)
+            self.ted_train_log.append(log_warning(self.tr("removed from the training queue")))
+            return
+        if self._current_thread.is_stopping():
+            self._scheduler.cancel(self._task_info.task_id)
+            self.ted_train_log.append(log_warning(self.tr("model training is force stopped by user")))
+            return
+        self._scheduler.cancel(self._task_info.task_id)
         # 立即刷新界面
         QCoreApplication.processEvents()
 
         self.ted_train_log.append(
-            log_warning(self.tr("model training stopped by user, click start training to resume training process")))
+            log_warning(self.tr("model training will stop after the current validation and checkpoint saving, "
+                                "click stop again to force stop, click start training to resume training process")))
 
     def stop_all_training_task(self):
-        for task_thread in self._task_thread_map.get_thread_map().values():
-            if task_thread.isRunning():
-                logger.info(f"stop training task: {task_thread.get_task_info().task_id}")
-                task_thread.stop_train()
-                task_thread.quit()
-                task_thread.wait()
+        self._scheduler.shutdown()
 
     @Slot()
     def _on_next_step_clicked(self):
@@ -304,25 +352,27 @@ class ModelTrainWidget(CollapsibleWidgetItem):
 
     def load_graph(self, loss_data: dict, metric_data: dict):
         self.pg_widget.clear()
+        self._loss_plots.clear()
+        self._metric_plots.clear()
         for key, value in loss_data.items():
-            self._loss_plots[key] = self.pg_widget.addPlot(title=key)
-            self._loss_plots[key].showGrid(x=True, y=True)
-            self._loss_plots[key].showAxes(True, showValues=(True, False, False, True))
-            self._loss_plots[key].setSizePolicy(QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Preferred)
-            self._loss_plots[key].plot(loss_data[key], name=key)
+            self._loss_plots[key] = LiveCurve(self._add_plot(key), key, value)
         self.pg_widget.nextRow()
         for key, value in metric_data.items():
-            self._metric_plots[key] = self.pg_widget.addPlot(title=key)
-            self._metric_plots[key].showGrid(x=True, y=True)
-            self._metric_plots[key].showAxes(True, showValues=(True, False, False, True))
-            self._metric_plots[key].setSizePolicy(QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Preferred)
-            self._metric_plots[key].plot(metric_data[key], name=key)
+            self._metric_plots[key] = LiveCurve(self._add_plot(key), key, value)
+
+    def _add_plot(self, title: str) -> PlotItem:
+        plot_item = self.pg_widget.addPlot(title=title)
+        plot_item.showGrid(x=True, y=True)
+        plot_item.showAxes(True, showValues=(True, False, False, True))
+        plot_item.setSizePolicy(QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Preferred)
+        return plot_item
 
     @Slot(dict)
     def on_handle_train_start(self, loss_data: dict, metric_data: dict):
         if self.sender() != self._current_thread:
             return
         self.load_graph(loss_data, metric_data)
+        self._plot_refresh_timer.start()
         self.is_training_signal.emit(True, self._task_info.task_id)
 
     @Slot(int, str)
@@ -335,6 +385,8 @@ class ModelTrainWidget(CollapsibleWidgetItem):
     @Slot(TrainTaskInfo)
     def on_handle_train_end(self, task_info: TrainTaskInfo):
         if self.sender() == self._current_thread:
+            self._plot_refresh_timer.stop()
+            self._refresh_plots()
             self._enable_btn_to_train_status()
             if task_info.task_status == TrainTaskStatus.TRN_FINISHED:
                 self.btn_start_train.setText(self.tr("ReTrain"))
@@ -349,6 +401,7 @@ class ModelTrainWidget(CollapsibleWidgetItem):
     @Slot(str)
     def _on_model_train_failed(self, error_info: str):
         if self.sender() == self._current_thread:
+            self._plot_refresh_timer.stop()
             self.ted_train_log.append(log_error(error_info))
             self._enable_btn_to_train_status()
             self._task_info.task_status = TrainTaskStatus.TRN_FAILED
@@ -5,23 +5,23 @@ from pathlib import Path
 
 from PySide6.QtCore import Signal, Slot
 from PySide6.QtGui import Qt, QColor
-from PySide6.QtWidgets import QVBoxLayout, QHBoxLayout, QHeaderView, \
-    QTableWidgetItem, QWidget
+from PySide6.QtWidgets import QVBoxLayout, QHBoxLayout, QHeaderView, QAbstractItemView
 from loguru import logger
-from qfluentwidgets import FluentIcon, CaptionLabel, TableWidget, PrimaryPushButton, \
-    PopupTeachingTip, TeachingTipTailPosition
+from qfluentwidgets import FluentIcon, TableView, PrimaryPushButton
+from sqlalchemy.orm import Query, Session
 
 from common.core.event_manager import signal_bridge
 from common.component.custom_icon import CustomFluentIcon
-from common.component.custom_process_bar import CustomProcessBar
+from common.component.paged_table_model import PagedTableModel
+from common.component.table_delegates import TagItemDelegate, ProgressItemDelegate, OperationItemDelegate, \
+    OperationButton
 from common.database.db_helper import db_session
 from common.database.train_task_helper import db_get_project_id
-from common.component.delete_ensure_widget import CustomFlyoutView
-from common.component.fill_tool_button import FillToolButton
-from common.component.tag_widget import TextTagWidget
-from common.utils.utils import format_datatime, open_directory
+from common.component.delete_ensure_widget import show_delete_ensure_flyout
+from common.utils.utils import open_directory
 from common.core.content_widget_base import ContentWidgetBase
-from models.models import TrainTask, Project
+from common.core.model_registry import model_registry
+from models.models import TrainTask, Project, TrainJob
 from ..types import TrainTaskStatus
 
 COLUMN_TASK_ID = 0
@@ -34,82 +34,79 @@ COLUMN_ELAPSED = 6
 COLUMN_OPERATION = 7
 
 
-class OperationWidget(QWidget):
-    task_deleted = Signal(str)
-    task_detail = Signal(str)
-    open_task_dir = Signal(str)
-
-    def __init__(self, task_id: str):
-        super().__init__()
-        self.hly_content = QHBoxLayout(self)
-        self.btn_view = FillToolButton(CustomFluentIcon.DETAIL1)
-        self.btn_delete = FillToolButton(FluentIcon.DELETE)
-        self.btn_delete.set_background_color(QColor("#E61919"))
-        self.btn_delete.set_icon_color(QColor(0, 0, 0))
-        self.btn_open = FillToolButton(FluentIcon.FOLDER)
-
-        self.hly_content.addStretch(1)
-        self.hly_content.addWidget(self.btn_view)
-        self.hly_content.addWidget(CaptionLabel("|", self))
-        self.hly_content.addWidget(self.btn_delete)
-        self.hly_content.addWidget(CaptionLabel("|", self))
-        self.hly_content.addWidget(self.btn_open)
-        self.hly_content.addStretch(1)
-
-        self._connect_signals_and_slots()
-
-        self.task_id = task_id
-
-    def _connect_signals_and_slots(self):
-        self.btn_delete.clicked.connect(self._on_delete_clicked)
-        self.btn_view.clicked.connect(self._on_view_clicked)
-        self.btn_open.clicked.connect(self._on_open_clicked)
-
-    def _on_view_clicked(self):
-        self.task_detail.emit(self.task_id)
-
-    def _on_open_clicked(self):
-        self.open_task_dir.emit(self.task_id)
-
-    def _on_delete_clicked(self):
-        self.view = CustomFlyoutView(content=self.tr("Are you sure to delete this task?"))
-        self.popup_tip = PopupTeachingTip.make(
-            target=self.btn_delete,
-            view=self.view,
-            tailPosition=TeachingTipTailPosition.BOTTOM,
-            duration=-1,
-            parent=self
-        )
-        self.view.accept_status.connect(self._on_ensure_delete_item)
-
-    @Slot(bool)
-    def _on_ensure_delete_item(self, accepted):
-        if accepted:
-            self.task_deleted.emit(self.task_id)
-        self.popup_tip.close()
-
-
-class TaskTableWidget(TableWidget):
+OPERATION_VIEW = "view"
+OPERATION_DELETE = "delete"
+OPERATION_OPEN = "open"
+
+
+class TaskTableModel(PagedTableModel):
+    key_field = "task_id"
+
+    def build_query(self, session: Session) -> Query:
+        return (session.query(TrainTask.task_id, Project.project_name, TrainTask.task_status, TrainTask.epoch,
+                              TrainTask.epochs, TrainTask.start_time, TrainTask.end_time, TrainTask.elapsed)
+                .outerjoin(Project, TrainTask.project_id == Project.project_id))
+
+    def cell_data(self, record: dict, column: int, role: int):
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == COLUMN_TASK_ID:
+                return record["task_id"]
+            if column == COLUMN_PROJECT_NAME:
+                return record["project_name"]
+            if column == COLUMN_START_TIME:
+                return self.format_time(record["start_time"])
+            if column == COLUMN_END_TIME:
+                return self.format_time(record["end_time"])
+            if column == COLUMN_ELAPSED:
+                return record["elapsed"] or ""
+        elif role == self.ValueRole:
+            task_status = TrainTaskStatus(record["task_status"])
+            if column == COLUMN_TASK_STATUS:
+                return task_status.name, *task_status.color
+            if column == COLUMN_PROGRESS_BAR:
+                if task_status == TrainTaskStatus.TRN_PAUSE:
+                    state = ProgressItemDelegate.PAUSED
+                elif task_status == TrainTaskStatus.TRN_FAILED:
+                    state = ProgressItemDelegate.ERROR
+                else:
+                    state = ProgressItemDelegate.NORMAL
+                return record["epoch"] or 0, record["epochs"] or 0, state
+            if column == COLUMN_OPERATION:
+                return OPERATION_VIEW, OPERATION_DELETE, OPERATION_OPEN
+        return None
+
+
+class TaskTableView(TableView):
     def __init__(self):
         super().__init__()
         self.verticalHeader().hide()
+        # 固定行高，视图不需要逐行计算尺寸
+        self.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.verticalHeader().setDefaultSectionSize(44)
         self.setBorderRadius(8)
         self.setBorderVisible(True)
-        self.setColumnCount(8)
-        self.setRowCount(24)
-        # self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
-        self.setHorizontalHeaderLabels([
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.task_model = TaskTableModel([
             self.tr('Task ID'), self.tr('Project name'), self.tr('Task status'), self.tr("Train progress"),
             self.tr('Start time'), self.tr('End time'), self.tr("Elapsed"), self.tr("Operation")
-        ])
+        ], self)
+        self.setModel(self.task_model)
+        self.operation_delegate = OperationItemDelegate([
+            OperationButton(OPERATION_VIEW, CustomFluentIcon.DETAIL1),
+            OperationButton(OPERATION_DELETE, FluentIcon.DELETE, QColor("#E61919")),
+            OperationButton(OPERATION_OPEN, FluentIcon.FOLDER),
+        ], self)
+        self.setItemDelegateForColumn(COLUMN_TASK_STATUS, TagItemDelegate(self))
+        self.setItemDelegateForColumn(COLUMN_PROGRESS_BAR, ProgressItemDelegate(self))
+        self.setItemDelegateForColumn(COLUMN_OPERATION, self.operation_delegate)
         self.setColumnWidth(COLUMN_TASK_ID, 130)
-        self.horizontalHeader().setSectionResizeMode(COLUMN_PROJECT_NAME, QHeaderView.ResizeMode.ResizeToContents)
-        self.setColumnWidth(COLUMN_TASK_STATUS, 100)
+        self.setColumnWidth(COLUMN_PROJECT_NAME, 160)
+        self.setColumnWidth(COLUMN_TASK_STATUS, 120)
         self.horizontalHeader().setSectionResizeMode(COLUMN_PROGRESS_BAR, QHeaderView.ResizeMode.Stretch)
         self.setColumnWidth(COLUMN_START_TIME, 156)
         self.setColumnWidth(COLUMN_END_TIME, 156)
         self.setColumnWidth(COLUMN_ELAPSED, 100)
-        self.setColumnWidth(COLUMN_OPERATION, 120)
+        self.setColumnWidth(COLUMN_OPERATION, 140)
 
 
 class TaskListWidget(ContentWidgetBase):
@@ -124,62 +121,27 @@ class TaskListWidget(ContentWidgetBase):
         self.btn_create_task = PrimaryPushButton(FluentIcon.ADD, self.tr("Create task"))
         self.hly_btn.addWidget(self.btn_create_task)
         self.hly_btn.addStretch(1)
-        self.tb_task = TaskTableWidget()
+        self.tb_task = TaskTableView()
         self.vly.addLayout(self.hly_btn)
         self.vly.addWidget(self.tb_task)
         self._current_project_id = ""
         self._connect_signals_and_slots()
-        self._task_id_to_row_index = dict()
 
     def _connect_signals_and_slots(self):
         self.btn_create_task.clicked.connect(self._on_create_task)
         signal_bridge.train_status_changed.connect(self._on_train_status_changed)
+        self.tb_task.operation_delegate.button_clicked.connect(self._on_operation_clicked)
 
     def set_data(self, project_id: str):
         self._current_project_id = project_id
         self.update_widget()
 
     def update_widget(self):
-        self.tb_task.clearContents()
-        with db_session(auto_commit_exit=True) as session:
-            tasks: list[TrainTask] = session.query(TrainTask).filter_by(project_id=self._current_project_id).all()
-            self.tb_task.setRowCount(len(tasks))
-            for row_index, task in enumerate(tasks):
-                self._task_id_to_row_index[task.task_id] = row_index
-
-                item0 = QTableWidgetItem(task.task_id)
-                item1 = QTableWidgetItem(task.project.project_name)
-                item2 = TextTagWidget(TrainTaskStatus(task.task_status).name, *TrainTaskStatus(task.task_status).color)
-                item3 = CustomProcessBar()
-                item4 = QTableWidgetItem(format_datatime(task.start_time))
-                item5 = QTableWidgetItem(format_datatime(task.end_time))
-                item6 = QTableWidgetItem(task.elapsed)
-                item7 = OperationWidget(task.task_id)
-
-                item7.task_deleted.connect(self._on_delete_task)
-                item7.task_detail.connect(self._on_view_task)
-                item7.open_task_dir.connect(self._on_open_task_dir)
-
-                item0.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                item1.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                item4.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-
-                self.tb_task.setItem(row_index, COLUMN_TASK_ID, item0)
-                self.tb_task.setItem(row_index, COLUMN_PROJECT_NAME, item1)
-                self.tb_task.setCellWidget(row_index, COLUMN_TASK_STATUS, item2)
-                self.tb_task.setCellWidget(row_index, COLUMN_PROGRESS_BAR, item3)
-                self.tb_task.setItem(row_index, COLUMN_START_TIME, item4)
-                self.tb_task.setItem(row_index, COLUMN_END_TIME, item5)
-                self.tb_task.setItem(row_index, COLUMN_ELAPSED, item6)
-                self.tb_task.setCellWidget(row_index, COLUMN_OPERATION, item7)
-                item3.set_max_value(task.epochs)
-                item3.set_value(task.epoch)
-                if task.task_status == TrainTaskStatus.TRN_PAUSE.value:
-                    item3.set_pause(True)
-                elif task.task_status == TrainTaskStatus.TRN_FAILED.value:
-                    item3.set_error(True)
-                elif task.task_status == TrainTaskStatus.TRN_FINISHED.value:
-                    item3.resume()
+        """只读取第一页，滚动到底部时再读取后续页"""
+        model = self.tb_task.task_model
+        model.set_filters(TrainTask.project_id == self._current_project_id)
+        model.set_order_by(TrainTask.id)
+        model.refresh()
 
     @Slot(str, int, int, str, str, str, int)
     def _on_train_status_changed(self, task_id: str, epoch: int, epochs: int, start_time: str, end_time: str,
@@ -187,40 +149,24 @@ class TaskListWidget(ContentWidgetBase):
         project_id = db_get_project_id(task_id)
         if project_id != self._current_project_id:
             return
-        row_index = self._task_id_to_row_index.get(task_id)
-        if row_index is None:
-            logger.warning(f"task_id: {task_id} not found in table")
-            return
-        item_task_status = self.tb_task.cellWidget(row_index, COLUMN_TASK_STATUS)
-        item_start_time = self.tb_task.item(row_index, COLUMN_START_TIME)
-        item_end_time = self.tb_task.item(row_index, COLUMN_END_TIME)
-        item_elapsed = self.tb_task.item(row_index, COLUMN_ELAPSED)
-        item_bar = self.tb_task.cellWidget(row_index, COLUMN_PROGRESS_BAR)
-
-        if isinstance(item_bar, CustomProcessBar) and isinstance(item_task_status, TextTagWidget):
-            if task_status == TrainTaskStatus.TRAINING.value:
-                item_bar.set_max_value(epochs)
-                item_bar.set_value(epoch)
-                item_task_status.set_text(TrainTaskStatus.TRAINING.name)
-                item_task_status.set_color(*TrainTaskStatus.TRAINING.color)
-                item_start_time.setText(start_time)
-                item_end_time.setText("")
-                item_elapsed.setText("")
-            elif task_status == TrainTaskStatus.TRN_PAUSE.value:
-                item_task_status.set_text(TrainTaskStatus.TRN_PAUSE.name)
-                item_task_status.set_color(*TrainTaskStatus.TRN_PAUSE.color)
-                item_bar.set_pause(True)
-            elif task_status == TrainTaskStatus.TRN_FAILED.value:
-                item_task_status.set_text(TrainTaskStatus.TRN_FAILED.name)
-                item_task_status.set_color(*TrainTaskStatus.TRN_FAILED.color)
-                item_bar.set_error(True)
-            elif task_status == TrainTaskStatus.TRN_FINISHED.value:
-                item_task_status.set_text(TrainTaskStatus.TRN_FINISHED.name)
-                item_task_status.set_color(*TrainTaskStatus.TRN_FINISHED.color)
-                item_bar.resume()
-                item_end_time.setText(end_time)
-                item_elapsed.setText(elapsed)
-            self.update()
+        if task_status == TrainTaskStatus.TRAINING.value:
+            values = dict(epoch=epoch, epochs=epochs, start_time=start_time, end_time="", elapsed="")
+        elif task_status == TrainTaskStatus.TRN_FINISHED.value:
+            values = dict(end_time=end_time, elapsed=elapsed)
+        else:
+            values = dict()
+        # 只更新该行，未加载的行滚动到时会从数据库读取最新状态
+        self.tb_task.task_model.update_row(task_id, task_status=task_status, **values)
+
+    @Slot(str, object)
+    def _on_operation_clicked(self, operation: str, task_id: str):
+        if operation == OPERATION_VIEW:
+            self._on_view_task(task_id)
+        elif operation == OPERATION_OPEN:
+            self._on_open_task_dir(task_id)
+        elif operation == OPERATION_DELETE:
+            show_delete_ensure_flyout(self.tr("Are you sure to delete this task?"), self.window(),
+                                      lambda: self._on_delete_task(task_id))
 
     def get_task_id(self, project_dir: Path) -> str:
         task_id = f"T{self._current_project_id[1:]}{0:06d}"
@@ -234,7 +180,9 @@ class TaskListWidget(ContentWidgetBase):
         with db_session() as session:
             task = session.query(TrainTask).filter_by(task_id=task_id).first()
             directory = Path(task.project.project_dir) / task_id
+            session.query(TrainJob).filter_by(task_id=task_id).delete()
             session.delete(task)
+        model_registry.release(directory)
         try:
             shutil.rmtree(directory)
         except Exception as e:
@@ -2,7 +2,7 @@ from pathlib import Path
 
 from PySide6.QtCore import Signal, QThread
 
-from ultralytics import YOLO
+from common.core.model_registry import model_registry
 from ultralytics.engine.results import Results
 
 
@@ -12,7 +12,6 @@ class ModelPredictorThread(QThread):
 
     def __init__(self, model_path: Path):
         super().__init__()
-        self._predictor: YOLO | None = None
         self._model_path = model_path
         self._image_path: Path | None = None
         self._kwargs = dict()
@@ -24,15 +23,11 @@ class ModelPredictorThread(QThread):
         self._kwargs = kwargs
 
     def run(self):
-        try:
-            self._predictor = YOLO(self._model_path)
-        except FileNotFoundError as e:
-            error_msg = str(e)
-            self.model_predict_failed.emit(error_msg)
+        if not self._image_path:
             return
-        if self._predictor and self._image_path:
-            try:
-                results = self._predictor.predict(self._image_path, **self._kwargs)
-                self.model_predict_end.emit(results[0])
-            except Exception as e:
-                self.model_predict_failed.emit(str(e))
+        try:
+            # 模型从进程内缓存获取，只有第一次预测需要加载权重和预热
+            results = model_registry.predict(self._model_path, self._image_path, **self._kwargs)
+            self.model_predict_end.emit(results[0])
+        except Exception as e:
+            self.model_predict_failed.emit(str(e))
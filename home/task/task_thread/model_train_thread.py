@@ -1,5 +1,9 @@
+import multiprocessing
+import os
 import pickle
 import time
+from collections import deque
+from multiprocessing.process import BaseProcess
 from datetime import datetime
 from pathlib import Path
 
@@ -10,39 +14,76 @@ from loguru import logger
 from common.core.event_manager import signal_bridge
 from common.database.train_task_helper import db_update_task_epoch_info, db_update_task_finished, db_update_task_pause, \
     db_update_task_started, db_update_task_failed
-from common.component.model_type_widget import ModelType
 from common.utils.utils import log_info, format_datatime
-from ultralytics.engine.trainer import BaseTrainer
-from ultralytics.models.yolo.classify import ClassificationTrainer
-from ultralytics.models.yolo.detect import DetectionTrainer
-from ultralytics.models.yolo.obb import OBBTrainer
-from ultralytics.models.yolo.pose import PoseTrainer
-from ultralytics.models.yolo.segment import SegmentationTrainer
+from .model_train_worker import TRAINERS, TrainCommand, TrainEvent, run_train_worker
 from ...types import TrainTaskInfo, TrainTaskStatus
 
 
 class CustomLogs(QObject):
+    """
+    训练日志。
+    内存中只保留最近max_lines行供界面显示；日志文件逐行追加，超过max_bytes时轮转为.1、.2...，
+    最多保留backup_count个历史文件；batch进度行按status_interval合并，每个间隔只输出一行。
+    """
     log_changed = Signal(str)
 
-    def __init__(self):
+    def __init__(self, max_lines: int = 2000, max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5,
+                 status_interval: float = 1.0):
         super().__init__()
-        self._logs = []
+        self._logs: deque[str] = deque(maxlen=max_lines)
+        self._max_bytes = max_bytes
+        self._backup_count = backup_count
+        self._status_interval = status_interval
+        self._last_status_time = 0.0
+        self._file_path: Path | None = None
+        self._file = None
+
+    def open_file(self, file_path: Path, mode="a"):
+        self.close_file()
+        self._file_path = file_path
+        # 行缓冲，每行写入后即落盘，异常退出也不会丢失之前的日志
+        self._file = open(file_path, mode=mode, encoding="utf8", buffering=1)
+
+    def close_file(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def _rotate(self):
+        self.close_file()
+        for index in range(self._backup_count - 1, 0, -1):
+            src = self._file_path.with_name(f"{self._file_path.name}.{index}")
+            if src.exists():
+                os.replace(src, self._file_path.with_name(f"{self._file_path.name}.{index + 1}"))
+        os.replace(self._file_path, self._file_path.with_name(f"{self._file_path.name}.1"))
+        self._file = open(self._file_path, mode="a", encoding="utf8", buffering=1)
 
     def append(self, message: str):
         self._logs.append(message)
+        if self._file:
+            self._file.write(message + "\n")
+            if self._backup_count > 0 and self._file.tell() > self._max_bytes:
+                self._rotate()
         self.log_changed.emit(message)
 
-    def get_log_lines(self):
-        return self._logs
+    def append_status(self, message: str, force: bool = False):
+        """
+        追加进度行，距上一次进度行不足status_interval时丢弃
+        :param message: 进度信息
+        :param force: 是否强制输出，用于每个epoch的最后一个batch
+        """
+        now = time.monotonic()
+        if not force and now - self._last_status_time < self._status_interval:
+            return
+        self._last_status_time = now
+        self.append(message)
 
-    def save_to_file(self, file_path: Path, mode="w"):
-        with open(file_path, mode=mode, encoding="utf8") as f:
-            logs = "\n".join(self._logs)
-            f.write(logs)
+    def get_log_lines(self):
+        return list(self._logs)
 
     def load_log_from_text(self, file_path: Path):
         with open(file_path, encoding="utf8") as f:
-            self._logs = f.readlines()
+            self._logs = deque((line.rstrip("\n") for line in f), maxlen=self._logs.maxlen)
 
     def clear(self):
         self._logs.clear()
@@ -50,6 +91,8 @@ class CustomLogs(QObject):
 
 class CustomPlotData(QObject):
     plot_data_changed = Signal(dict)
+    # 只包含本次新增的数据点，{名称: (数据点在序列中的下标, 数值)}
+    plot_data_appended = Signal(dict)
 
     def __init__(self):
         super().__init__()
@@ -84,9 +127,13 @@ class CustomPlotData(QObject):
         # self.plot_data_changed.emit(self._plot_data)
 
     def append(self, data_dict: dict[str, float]):
+        delta = dict()
         for key, value in data_dict.items():
-            self._plot_data[key].append(data_dict[key])
-        self.plot_data_changed.emit(self._plot_data)
+            value = float(value)
+            # 界面可能在增量送达前已从完整数据初始化曲线，根据下标丢弃重复的数据点
+            delta[key] = (len(self._plot_data[key]), value)
+            self._plot_data[key].append(value)
+        self.plot_data_appended.emit(delta)
 
     def save_to_file(self, file_path: Path, mode="wb"):
         with open(file_path, mode=mode) as f:
@@ -99,21 +146,33 @@ class CustomPlotData(QObject):
 
 
 class ModelTrainThread(QThread):
+    """
+    训练任务在界面进程中的代理。
+    训练在独立的子进程中执行，子进程通过管道发送训练事件，本线程接收事件后更新日志、曲线和数据库，
+    对外保持原有的信号；停止训练时先通知子进程在下一个batch中断，超时后直接结束子进程。
+    """
     train_start_signal = Signal(dict, dict)
     train_epoch_end = Signal(int)
     model_train_end = Signal(TrainTaskInfo)
     model_train_failed = Signal(str)
 
     log_changed_signal = Signal(str)
+    # 只发送新增的数据点{名称: (下标, 数值)}，完整数据通过get_loss_data/get_metric_data获取
     loss_changed_signal = Signal(dict)
     metric_changed_signal = Signal(dict)
 
+    # 发出停止命令后等待子进程自行结束的时间(秒)，验证和保存模型期间不会响应停止命令，需要留出足够时间；
+    # 再次停止时立即强制结束
+    stop_timeout = 10 * 60
+
     def __init__(self, train_parameters: dict):
         super().__init__()
-        self.trainer: BaseTrainer | None = None
+        self._process: BaseProcess | None = None
         self._train_parameters = train_parameters
         self._stop = False
+        self._kill = False
         self._metric_num = 0
+        self._current_epoch = 0
         self._task_info: TrainTaskInfo | None = None
         self._loss_data = CustomPlotData()
         self._metric_data = CustomPlotData()
@@ -127,61 +186,45 @@ class ModelTrainThread(QThread):
 
     def _connect_signals_and_slots(self):
         self._logs.log_changed.connect(lambda msg: self.log_changed_signal.emit(msg))
-        self._loss_data.plot_data_changed.connect(lambda loss: self.loss_changed_signal.emit(loss))
-        self._metric_data.plot_data_changed.connect(lambda metric: self.metric_changed_signal.emit(metric))
+        self._loss_data.plot_data_appended.connect(lambda loss: self.loss_changed_signal.emit(loss))
+        self._metric_data.plot_data_appended.connect(lambda metric: self.metric_changed_signal.emit(metric))
 
     def init_model_trainer(self, task_info: TrainTaskInfo) -> bool:
-        try:
-            if task_info.model_type == ModelType.CLASSIFY:
-                self.trainer = ClassificationTrainer(overrides=self._train_parameters)
-            elif task_info.model_type == ModelType.DETECT:
-                self.trainer = DetectionTrainer(overrides=self._train_parameters)
-            elif task_info.model_type == ModelType.SEGMENT:
-                self.trainer = SegmentationTrainer(overrides=self._train_parameters)
-            elif task_info.model_type == ModelType.POSE:
-                self.trainer = PoseTrainer(overrides=self._train_parameters)
-            elif task_info.model_type == ModelType.OBB:
-                self.trainer = OBBTrainer(overrides=self._train_parameters)
-            else:
-                logger.error(f"unsupported model type {task_info.model_type}")
-                return False
-            self.trainer.add_callback("on_train_start", self._on_train_start)
-            self.trainer.add_callback("on_train_batch_start", self._on_train_batch_start)
-            self.trainer.add_callback("on_train_batch_end", self._on_train_batch_end)
-            self.trainer.add_callback("on_train_epoch_start", self._on_train_epoch_start)
-            self.trainer.add_callback("on_train_epoch_end", self._on_train_epoch_end)
-            self.trainer.add_callback("on_fit_epoch_end", self._on_fit_epoch_end)
-            self.trainer.add_callback("on_train_end", self._on_train_end)
-
-            self._task_info = task_info
-            self._train_loss_path = task_info.task_dir / "train_loss"
-            self._train_metric_path = task_info.task_dir / "train_metric"
-            self._train_log_path = task_info.task_dir / "train.log"
-
-            if self._train_log_path.exists() and self._train_parameters["resume"]:
-                self._logs.load_log_from_text(self._train_log_path)
-            else:
-                self._logs.clear()
-
-            if self._train_loss_path.exists() and self._train_parameters["resume"]:
-                loss_data = pickle.load(open(self._train_loss_path, "rb"))
-                self._loss_data.set_plot_data(loss_data)
-            else:
-                self._loss_data.clear_data()
-            if self._train_metric_path.exists() and self._train_parameters["resume"]:
-                metric_data = pickle.load(open(self._train_metric_path, "rb"))
-                self._metric_data.set_plot_data(metric_data)
-            else:
-                self._metric_data.clear_data()
-
-            return True
-        except FileNotFoundError as e:
+        if task_info.model_type not in TRAINERS:
+            logger.error(f"unsupported model type {task_info.model_type}")
+            return False
+        resume = self._train_parameters.get("resume")
+        if isinstance(resume, str) and resume and not Path(resume).exists():
             error_msg = self.tr(
                 "Resume checkpoint not found. Please pass a valid checkpoint to resume from,i.e model=path/to/last.pt")
             self.model_train_failed.emit(error_msg)
             self._logs.append(error_msg)
             return False
 
+        self._task_info = task_info
+        self._train_loss_path = task_info.task_dir / "train_loss"
+        self._train_metric_path = task_info.task_dir / "train_metric"
+        self._train_log_path = task_info.task_dir / "train.log"
+
+        if self._train_log_path.exists() and self._train_parameters["resume"]:
+            self._logs.load_log_from_text(self._train_log_path)
+            self._logs.open_file(self._train_log_path, mode="a")
+        else:
+            self._logs.clear()
+            self._logs.open_file(self._train_log_path, mode="w")
+
+        if self._train_loss_path.exists() and self._train_parameters["resume"]:
+            loss_data = pickle.load(open(self._train_loss_path, "rb"))
+            self._loss_data.set_plot_data(loss_data)
+        else:
+            self._loss_data.clear_data()
+        if self._train_metric_path.exists() and self._train_parameters["resume"]:
+            metric_data = pickle.load(open(self._train_metric_path, "rb"))
+            self._metric_data.set_plot_data(metric_data)
+        else:
+            self._metric_data.clear_data()
+        return True
+
     def get_task_info(self) -> TrainTaskInfo:
         return self._task_info
 
@@ -204,38 +247,34 @@ class ModelTrainThread(QThread):
         return self._task_info.task_id
 
     def get_current_epoch(self) -> int:
-        if self.trainer:
-            return self.trainer.epoch
-        return 0
+        return self._current_epoch
 
-    def _on_train_start(self, trainer):
+    def _on_train_start(self, data: dict):
         self._start_time = time.time()
-        epochs = trainer.epochs
-        metrics = trainer.metrics
-        loss_names = trainer.loss_names
+        epochs = data["epochs"]
         if self._loss_data.is_empty():
-            self._loss_data.init_plot_data(loss_names)
+            self._loss_data.init_plot_data(data["loss_names"])
         if self._metric_data.is_empty():
-            self._metric_data.init_plot_data(metrics)
+            self._metric_data.init_plot_data(data["metrics"])
         self.train_start_signal.emit(self._loss_data.raw_data(), self._metric_data.raw_data())
         signal_bridge.train_status_changed.emit(self._task_info.task_id, 0, epochs, format_datatime(
             datetime.fromtimestamp(self._start_time)), None, None, TrainTaskStatus.TRAINING.value)
         db_update_task_started(self._task_info.task_id, datetime.fromtimestamp(self._start_time))
 
-    def _on_train_epoch_start(self, trainer):
-        loss_names = trainer.loss_names
-        info = f"{log_info(f' Epoch = {str(trainer.epoch + 1)}')}\n"
+    def _on_train_epoch_start(self, data: dict):
+        self._current_epoch = data["epoch"]
+        info = f"{log_info(f' Epoch = {str(self._current_epoch + 1)}')}\n"
         info += f"{'Epoch' :<10}"
-        for loss_name in loss_names:
+        for loss_name in data["loss_names"]:
             info += f"{loss_name:<10}"
         info += f"\n{'=' * 75}"
         self._logs.append(info)
 
-    def _on_train_epoch_end(self, trainer):
+    def _on_train_epoch_end(self, data: dict):
         # epoch 从0 开始
-        self._last_model = trainer.last.resolve().as_posix()
-        epoch = trainer.epoch + 1
-        epochs = trainer.epochs
+        self._last_model = data["last"]
+        epoch = data["epoch"] + 1
+        epochs = data["epochs"]
         self.train_epoch_end.emit(epoch)
 
         signal_bridge.train_status_changed.emit(self._task_info.task_id, epoch, epochs, format_datatime(
@@ -243,18 +282,19 @@ class ModelTrainThread(QThread):
 
         db_update_task_epoch_info(self._task_info.task_id, epoch, epochs)
 
-    def _on_fit_epoch_end(self, trainer):
-        metrics = trainer.metrics
+    def _on_fit_epoch_end(self, data: dict):
+        metrics = data["metrics"]
+        epoch, epochs = data["epoch"], data["epochs"]
         self._metric_num += 1
         metrics_info = f"{self.tr('val result: ')}\n"
         metrics_info += f"{'Epoch':<10}"
-        if self._metric_num > trainer.epoch + 1:
+        if self._metric_num > epoch + 1:
             metrics_info = f"{self.tr('test result: ')}\n"
         for metric_name in metrics.keys():
             metric_name = metric_name.split("/")[1]
             metrics_info += f"{metric_name:<15}"
-        if self._metric_num == trainer.epoch + 1:
-            epoch_format = f"\n{trainer.epoch + 1}/{trainer.epochs}"
+        if self._metric_num == epoch + 1:
+            epoch_format = f"\n{epoch + 1}/{epochs}"
             metrics_info += f"{epoch_format:<10}"
         else:
             metrics_info += "\n"
@@ -268,15 +308,10 @@ class ModelTrainThread(QThread):
 
         self._loss_data.save_to_file(self._train_loss_path)
         self._metric_data.save_to_file(self._train_metric_path)
-        self._logs.save_to_file(self._train_log_path)
-
-    def _on_train_batch_start(self, trainer):
-        trainer.interrupt = self._stop
 
-    def _on_train_batch_end(self, trainer):
-        batch_info_dict = trainer.pdic
-        cur_batch = batch_info_dict["n"] + 1
-        total_batch = batch_info_dict["total"]
+    def _on_train_batch_end(self, data: dict):
+        cur_batch = data["n"] + 1
+        total_batch = data["total"]
         progress_percent = cur_batch / total_batch
         progress_bar_length = 30
         bar = '█' * int(progress_bar_length * progress_percent) + '-' * (
@@ -285,34 +320,30 @@ class ModelTrainThread(QThread):
         # 生成进度条文本（这里使用简单的文本表示，你可以根据需要自定义）
         r_align = f"{progress_percent * 100:.2f}%".rjust(8)
         progress_bar_text = f"{r_align} |{bar}| {cur_batch}/{total_batch} "
-        epoch_format = f"{trainer.epoch + 1}/{trainer.epochs}"
+        epoch, epochs = data["epoch"], data["epochs"]
+        epoch_format = f"{epoch + 1}/{epochs}"
         batch_info = f"{epoch_format:<10}"
-        loss_items = trainer.loss_items.cpu().numpy()
-        if loss_items.ndim == 0:
-            loss_item_value = f"{loss_items:.4f}"
+        loss_items = data["loss_items"]
+        if not isinstance(loss_items, list):
+            loss_items = [loss_items]
+        for loss_item in loss_items:
+            loss_item_value = f"{loss_item:.4f}"
             batch_info += f"{loss_item_value:<10}"
-        else:
-            for loss_item in loss_items:
-                loss_item_value = f"{loss_item:.4f}"
-                batch_info += f"{loss_item_value:<10}"
         batch_info += f"{progress_bar_text}"
-        loss_names = trainer.loss_names
-        if loss_items.ndim == 0:
-            result_dict = {loss_names[0]: loss_items}
-        else:
-            result_dict = {k: v for k, v in zip(loss_names, loss_items)}
+        result_dict = {k: v for k, v in zip(data["loss_names"], loss_items)}
         self._loss_data.append(result_dict)
-        self._logs.append(batch_info)
+        self._logs.append_status(batch_info, force=cur_batch == total_batch)
 
-    def _on_train_end(self, trainer):
-        current_epoch = trainer.epoch + 1
+    def _on_train_end(self, data: dict | None):
+        # 子进程被强制结束时没有train_end事件，data为None，按中途停止处理
+        current_epoch = data["epoch"] + 1 if data else self._current_epoch + 1
         end_time = time.time()
-        elapsed_time = end_time - self._start_time
+        elapsed_time = end_time - (self._start_time or end_time)
         if elapsed_time > 3600:
             elapsed_time = f"{elapsed_time / 3600:.2f}h "
         else:
             elapsed_time = f"{elapsed_time / 60:.2f}min"
-        if current_epoch == self._train_parameters["epochs"] and not self._stop:
+        if data and current_epoch == self._train_parameters["epochs"] and not self._stop:
             self._train_parameters["resume"] = ""
             self._task_info.task_status = TrainTaskStatus.TRN_FINISHED
             self._logs.append(log_info(f"{self.tr('train finished')} epoch = {current_epoch}"))
@@ -333,17 +364,88 @@ class ModelTrainThread(QThread):
                                                 format_datatime(datetime.fromtimestamp(end_time)), elapsed_time,
                                                 self._task_info.task_status.value)
 
+    def _on_train_error(self, data: dict):
+        logger.error(data["traceback"])
+        self.model_train_failed.emit(data["message"])
+        self._logs.append(data["message"])
+        signal_bridge.train_status_changed.emit(self._task_info.task_id, None, None, None, None, None,
+                                                TrainTaskStatus.TRN_FAILED.value)
+        db_update_task_failed(self._task_info.task_id)
+
+    def _dispatch_event(self, event: str, data: dict) -> bool:
+        """
+        :return: 是否为结束事件
+        """
+        if event == TrainEvent.BATCH_END:
+            self._on_train_batch_end(data)
+        elif event == TrainEvent.EPOCH_START:
+            self._on_train_epoch_start(data)
+        elif event == TrainEvent.EPOCH_END:
+            self._on_train_epoch_end(data)
+        elif event == TrainEvent.FIT_EPOCH_END:
+            self._on_fit_epoch_end(data)
+        elif event == TrainEvent.TRAIN_START:
+            self._on_train_start(data)
+        elif event == TrainEvent.TRAIN_END:
+            self._on_train_end(data)
+            return True
+        elif event == TrainEvent.ERROR:
+            self._on_train_error(data)
+            return True
+        return False
+
     def run(self):
-        if self.trainer:
-            # try:
-                self.trainer.train()
-            # except Exception as e:
-            #     self.model_train_failed.emit(str(e))
-            #     signal_bridge.train_status_changed.emit(self._task_info.task_id, None, None, None, None, None,
-            #                                             TrainTaskStatus.TRN_FAILED.value)
-            #     db_update_task_failed(self._task_info.task_id)
+        if not self._task_info:
+            return
+        self._stop = False
+        self._kill = False
+        context = multiprocessing.get_context("spawn")
+        conn, child_conn = context.Pipe()
+        self._process = context.Process(target=run_train_worker, name=f"train-{self._task_info.task_id}",
+                                        args=(self._task_info.model_type.value, self._train_parameters, child_conn))
+        self._process.start()
+        child_conn.close()
+        finished = False
+        stop_sent_time = None
+        try:
+            while True:
+                if self._stop and stop_sent_time is None:
+                    stop_sent_time = time.monotonic()
+                    try:
+                        conn.send(TrainCommand.STOP)
+                    except (BrokenPipeError, OSError):
+                        pass
+                if self._kill:
+                    logger.warning(f"train process is force stopped: {self._task_info.task_id}")
+                    self._process.kill()
+                    break
+                if stop_sent_time is not None and time.monotonic() - stop_sent_time > self.stop_timeout:
+                    logger.warning(f"train process does not exit in time, kill it: {self._task_info.task_id}")
+                    self._process.kill()
+                    break
+                if not conn.poll(0.1):
+                    continue
+                try:
+                    event, data = conn.recv()
+                except EOFError:
+                    break
+                finished = self._dispatch_event(event, data) or finished
+        finally:
+            self._process.join()
+            conn.close()
+            if not finished:
+                self._on_train_end(None)
+            self._logs.close_file()
 
     @Slot()
     def stop_train(self):
-        """在外部强制关闭线程？"""
+        """
+        通知子进程在下一个batch停止训练，子进程会先完成正在进行的验证和模型保存；
+        已经发出过停止命令时强制结束子进程，当前epoch的进度会丢失
+        """
+        if self._stop:
+            self._kill = True
         self._stop = True
+
+    def is_stopping(self) -> bool:
+        return self._stop
@@ -0,0 +1,102 @@
+import traceback
+from multiprocessing.connection import Connection
+
+from common.component.model_type_widget import ModelType
+from ultralytics.models.yolo.classify import ClassificationTrainer
+from ultralytics.models.yolo.detect import DetectionTrainer
+from ultralytics.models.yolo.obb import OBBTrainer
+from ultralytics.models.yolo.pose import PoseTrainer
+from ultralytics.models.yolo.segment import SegmentationTrainer
+
+TRAINERS = {
+    ModelType.CLASSIFY: ClassificationTrainer,
+    ModelType.DETECT: DetectionTrainer,
+    ModelType.SEGMENT: SegmentationTrainer,
+    ModelType.POSE: PoseTrainer,
+    ModelType.OBB: OBBTrainer,
+}
+
+
+class TrainEvent:
+    """
+    训练子进程发往界面进程的事件类型，事件格式为(事件类型, 数据字典)
+    """
+    TRAIN_START = "train_start"
+    EPOCH_START = "epoch_start"
+    BATCH_END = "batch_end"
+    EPOCH_END = "epoch_end"
+    FIT_EPOCH_END = "fit_epoch_end"
+    TRAIN_END = "train_end"
+    ERROR = "error"
+
+
+class TrainCommand:
+    """
+    界面进程发往训练子进程的命令
+    """
+    STOP = "stop"
+
+
+def _send(conn: Connection, event: str, data: dict):
+    try:
+        conn.send((event, data))
+    except (BrokenPipeError, OSError):
+        # 界面进程已经退出，训练照常进行到被终止
+        pass
+
+
+def _loss_items(trainer) -> float | list[float]:
+    return trainer.loss_items.cpu().numpy().tolist()
+
+
+def run_train_worker(model_type: int, train_parameters: dict, conn: Connection):
+    """
+    训练子进程入口，训练过程中的回调被转换为事件通过管道发送，收到STOP命令后在下一个batch中断训练
+    :param model_type: ModelType的值
+    :param train_parameters: 训练参数
+    :param conn: 与界面进程通信的管道
+    """
+    def on_train_start(trainer):
+        _send(conn, TrainEvent.TRAIN_START, {"epochs": trainer.epochs, "loss_names": list(trainer.loss_names),
+                                             "metrics": list(trainer.metrics)})
+
+    def on_train_epoch_start(trainer):
+        _send(conn, TrainEvent.EPOCH_START, {"epoch": trainer.epoch, "loss_names": list(trainer.loss_names)})
+
+    def on_train_batch_start(trainer):
+        while conn.poll():
+            if conn.recv() == TrainCommand.STOP:
+                trainer.interrupt = True
+
+    def on_train_batch_end(trainer):
+        _send(conn, TrainEvent.BATCH_END, {"epoch": trainer.epoch, "epochs": trainer.epochs,
+                                           "n": trainer.pdic["n"], "total": trainer.pdic["total"],
+                                           "loss_names": list(trainer.loss_names),
+                                           "loss_items": _loss_items(trainer)})
+
+    def on_train_epoch_end(trainer):
+        _send(conn, TrainEvent.EPOCH_END, {"epoch": trainer.epoch, "epochs": trainer.epochs,
+                                           "last": trainer.last.resolve().as_posix()})
+
+    def on_fit_epoch_end(trainer):
+        _send(conn, TrainEvent.FIT_EPOCH_END, {"epoch": trainer.epoch, "epochs": trainer.epochs,
+                                               "metrics": {k: float(v) for k, v in trainer.metrics.items()}})
+
+    def on_train_end(trainer):
+        _send(conn, TrainEvent.TRAIN_END, {"epoch": trainer.epoch, "interrupted": trainer.interrupt})
+
+    try:
+        trainer = TRAINERS[ModelType(model_type)](overrides=train_parameters)
+        trainer.add_callback("on_train_start", on_train_start)
+        trainer.add_callback("on_train_batch_start", on_train_batch_start)
+        trainer.add_callback("on_train_batch_end", on_train_batch_end)
+        trainer.add_callback("on_train_epoch_start", on_train_epoch_start)
+        trainer.add_callback("on_train_epoch_end", on_train_epoch_end)
+        trainer.add_callback("on_fit_epoch_end", on_fit_epoch_end)
+        trainer.add_callback("on_train_end", on_train_end)
+        trainer.train()
+    except Exception as e:
+        _send(conn, TrainEvent.ERROR, {"type": type(e).__name__, "message": str(e),
+                                       "traceback": traceback.format_exc()})
+    finally:
+        conn.close()
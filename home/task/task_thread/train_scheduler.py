@@ -0,0 +1,187 @@
+import os
+from collections import Counter
+from pathlib import Path
+
+import torch
+import yaml
+from PySide6.QtCore import QObject, Signal, Slot
+from loguru import logger
+
+from common.database.train_job_helper import db_enqueue_train_job, db_get_queued_train_jobs, \
+    db_is_train_job_queued, db_remove_train_job, db_requeue_interrupted_train_jobs, db_update_train_job_status
+from common.database.train_task_helper import db_get_train_task_info, db_update_task_status
+from settings import cfg
+from .model_train_thread import ModelTrainThread
+from ...types import TrainJobStatus, TrainTaskStatus
+
+
+def _parse_devices(device) -> tuple[str, ...]:
+    """
+    将训练参数中的device转换为占用的设备列表，未指定时与训练器一致，有GPU时使用第0块GPU
+    """
+    if device is None or str(device).strip() in ("", "None"):
+        return ("0",) if torch.cuda.is_available() else ("cpu",)
+    devices = str(device).lower().replace("cuda:", "").replace(" ", "")
+    return tuple(d for d in devices.split(",") if d) or ("cpu",)
+
+
+class _RunningJob:
+    def __init__(self, thread: ModelTrainThread, devices: tuple[str, ...], cpu_cost: int):
+        self.thread = thread
+        self.devices = devices
+        self.cpu_cost = cpu_cost
+
+
+class TrainJobScheduler(QObject):
+    """
+    训练任务调度器。
+    训练队列保存在数据库中，按优先级从高到低、入队时间从早到晚依次检查，
+    设备和CPU核数满足限制时启动训练，任务结束后自动启动后续任务；
+    程序重启后，排队中和被中断的任务从train_config.yaml中保存的resume断点继续训练。
+    """
+    # 训练线程创建后、启动前发出，用于连接界面信号
+    job_thread_created = Signal(str, object)
+    # 排队中的任务被取消或无法启动
+    job_removed = Signal(str)
+
+    # 程序退出时等待训练进程自行停止的时间(毫秒)
+    shutdown_timeout_ms = 30 * 1000
+
+    def __init__(self, parent=None):
+        super().__init__(parent=parent)
+        self._running_jobs: dict[str, _RunningJob] = dict()
+        self._shutting_down = False
+        self._cpu_count = os.cpu_count() or 1
+
+    def restore(self):
+        """恢复上次退出时的训练队列"""
+        task_ids = db_requeue_interrupted_train_jobs()
+        if task_ids:
+            logger.info(f"requeue interrupted training tasks: {task_ids}")
+        for task_id in task_ids:
+            self._resume_from_last_checkpoint(task_id)
+        if cfg.get(cfg.resume_train_queue):
+            self.schedule()
+
+    @staticmethod
+    def _resume_from_last_checkpoint(task_id: str):
+        """
+        程序异常退出时训练线程来不及把断点写入train_config.yaml，存在last.pt时从该断点继续训练，而不是从头开始
+        """
+        task_info = db_get_train_task_info(task_id)
+        config_path = task_info.task_dir / "train_config.yaml" if task_info else None
+        if config_path is None or not config_path.exists():
+            return
+        with open(config_path, "r", encoding="utf8") as f:
+            train_parameters = yaml.safe_load(f)
+        save_dir = train_parameters.get("save_dir") or task_info.task_dir
+        last_model = Path(save_dir) / "weights" / "last.pt"
+        if not last_model.exists() or train_parameters.get("resume") == last_model.resolve().as_posix():
+            return
+        train_parameters["resume"] = last_model.resolve().as_posix()
+        with open(config_path, "w", encoding="utf8") as f:
+            yaml.dump(train_parameters, f, default_flow_style=False, allow_unicode=True, sort_keys=False)
+        logger.info(f"resume interrupted training task {task_id} from {last_model}")
+
+    def get_thread_by_task_id(self, task_id: str) -> ModelTrainThread | None:
+        job = self._running_jobs.get(task_id)
+        return job.thread if job else None
+
+    def is_queued(self, task_id: str) -> bool:
+        return task_id not in self._running_jobs and db_is_train_job_queued(task_id)
+
+    def enqueue(self, task_id: str, priority: int = 0) -> bool:
+        """
+        加入训练队列并尝试调度
+        :return: 是否已经开始训练
+        """
+        if task_id in self._running_jobs:
+            return True
+        db_enqueue_train_job(task_id, priority)
+        self.schedule()
+        return task_id in self._running_jobs
+
+    def cancel(self, task_id: str):
+        """
+        停止运行中的训练或移出队列，不等待训练线程结束，线程结束后由_on_job_finished移出队列并调度后续任务；
+        对正在停止的任务再次调用时强制结束训练进程
+        """
+        job = self._running_jobs.get(task_id)
+        if job is None:
+            db_remove_train_job(task_id)
+            self.job_removed.emit(task_id)
+            return
+        job.thread.stop_train()
+
+    def shutdown(self):
+        """程序退出时停止全部训练，任务保留在队列中，下次启动时继续"""
+        self._shutting_down = True
+        for task_id, job in list(self._running_jobs.items()):
+            if job.thread.isRunning():
+                logger.info(f"stop training task: {task_id}")
+                job.thread.stop_train()
+                # 程序退出时不长时间等待，超时后强制结束，任务下次启动时从last.pt继续
+                if not job.thread.wait(self.shutdown_timeout_ms):
+                    job.thread.stop_train()
+                    job.thread.wait()
+
+    def _can_start(self, devices: tuple[str, ...], cpu_cost: int) -> bool:
+        if not self._running_jobs:
+            # 没有运行中的任务时，资源需求超过上限的任务也允许单独运行
+            return True
+        used_devices = Counter(d for job in self._running_jobs.values() for d in job.devices)
+        for device in devices:
+            limit = cfg.get(cfg.cpu_train_jobs) if device == "cpu" else cfg.get(cfg.train_jobs_per_device)
+            if used_devices[device] >= limit:
+                return False
+        used_cpu = sum(job.cpu_cost for job in self._running_jobs.values())
+        return used_cpu + cpu_cost <= self._cpu_count
+
+    def schedule(self):
+        """按优先级启动资源允许的排队任务，资源不足的任务不阻塞后面需求更小的任务"""
+        if self._shutting_down:
+            return
+        for task_id, _ in db_get_queued_train_jobs():
+            if task_id in self._running_jobs:
+                continue
+            task_info = db_get_train_task_info(task_id)
+            config_path = task_info.task_dir / "train_config.yaml" if task_info else None
+            if config_path is None or not config_path.exists():
+                logger.warning(f"remove invalid training job: {task_id}")
+                db_remove_train_job(task_id)
+                self.job_removed.emit(task_id)
+                continue
+            with open(config_path, "r", encoding="utf8") as f:
+                train_parameters = yaml.safe_load(f)
+            devices = _parse_devices(train_parameters.get("device"))
+            # 主进程加上数据加载进程
+            cpu_cost = 1 + int(train_parameters.get("workers") or 0)
+            if not self._can_start(devices, cpu_cost):
+                continue
+            self._start_job(task_info, train_parameters, devices, cpu_cost)
+
+    def _start_job(self, task_info, train_parameters: dict, devices: tuple[str, ...], cpu_cost: int):
+        task_id = task_info.task_id
+        thread = ModelTrainThread(train_parameters)
+        self.job_thread_created.emit(task_id, thread)
+        if not thread.init_model_trainer(task_info):
+            db_remove_train_job(task_id)
+            self.job_removed.emit(task_id)
+            thread.deleteLater()
+            return
+        thread.finished.connect(lambda: self._on_job_finished(task_id))
+        thread.finished.connect(thread.deleteLater)
+        self._running_jobs[task_id] = _RunningJob(thread, devices, cpu_cost)
+        db_update_train_job_status(task_id, TrainJobStatus.RUNNING)
+        db_update_task_status(task_id, TrainTaskStatus.TRAINING)
+        logger.info(f"start training task: {task_id}, devices: {devices}")
+        thread.start()
+
+    @Slot()
+    def _on_job_finished(self, task_id: str):
+        self._running_jobs.pop(task_id, None)
+        if self._shutting_down:
+            # 保留为运行中，下次启动时重新排队
+            return
+        db_remove_train_job(task_id)
+        self.schedule()
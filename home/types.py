@@ -33,6 +33,11 @@ class TrainTaskStatus(Enum):
         return _color_map[self]
 
 
+class TrainJobStatus(Enum):
+    QUEUED = 0
+    RUNNING = 1
+
+
 class ProjectInfo:
     project_name: str
     project_id: str
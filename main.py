@@ -1,4 +1,5 @@
 # coding:utf-8
+import multiprocessing
 import os
 import sys
 
@@ -171,6 +172,8 @@ class Window(FluentWindow):
 
 
 if __name__ == '__main__':
+    # 训练在spawn子进程中执行，打包后需要支持子进程入口
+    multiprocessing.freeze_support()
     if cfg.get(cfg.dpi_scale) == "auto":
         QApplication.setHighDpiScaleFactorRoundingPolicy(
             Qt.HighDpiScaleFactorRoundingPolicy.PassThrough)
@@ -8,21 +8,21 @@ from common.database.db_helper import Base, engine
 projects_to_datasets = Table(
     "projects_to_datasets",
     Base.metadata,
-    Column("project_id", ForeignKey("tb_projects.id")),
-    Column("dataset_id", ForeignKey("tb_datasets.id")),
+    Column("project_id", ForeignKey("tb_projects.id"), index=True),
+    Column("dataset_id", ForeignKey("tb_datasets.id"), index=True),
 )
 
 
 class Dataset(Base):
     __tablename__ = "tb_datasets"
     id = Column(Integer, primary_key=True, autoincrement=True)
-    dataset_id = Column(String)
-    dataset_name = Column(String)
+    dataset_id = Column(String, index=True)
+    dataset_name = Column(String, index=True)
     model_type = Column(Integer)
     dataset_description = Column(String)
     dataset_status = Column(Integer)
     dataset_dir = Column(String)
-    create_time = Column(DateTime, default=datetime.now())
+    create_time = Column(DateTime, default=datetime.now(), index=True)
     split_rate = Column(String, default="70_20_10")
     dataset_total = Column(Integer, default=0)
     tasks = relationship("TrainTask", back_populates="dataset")
@@ -34,12 +34,12 @@ class Project(Base):
     __tablename__ = 'tb_projects'
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    project_name = Column(String)
-    project_id = Column(String)
+    project_name = Column(String, index=True)
+    project_id = Column(String, index=True)
     project_description = Column(String)
     model_type = Column(Integer)
     project_dir = Column(String)
-    create_time = Column(DateTime, default=datetime.now())
+    create_time = Column(DateTime, default=datetime.now(), index=True)
     tasks = relationship("TrainTask", back_populates="project", cascade="all, delete")
     datasets = relationship("Dataset", secondary=projects_to_datasets, back_populates="projects")
 
@@ -48,9 +48,9 @@ class TrainTask(Base):
     __tablename__ = "tb_train_tasks"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    task_id = Column(String)
-    project_id = Column(String, ForeignKey('tb_projects.project_id',ondelete="RESTRICT"))
-    dataset_id = Column(String, ForeignKey("tb_datasets.dataset_id"))
+    task_id = Column(String, index=True)
+    project_id = Column(String, ForeignKey('tb_projects.project_id',ondelete="RESTRICT"), index=True)
+    dataset_id = Column(String, ForeignKey("tb_datasets.dataset_id"), index=True)
     start_time = Column(DateTime)
     end_time = Column(DateTime)
     elapsed = Column(String)
@@ -62,11 +62,22 @@ class TrainTask(Base):
     dataset = relationship("Dataset", back_populates="tasks")
 
 
+class TrainJob(Base):
+    """训练队列，只保存排队中和运行中的任务，结束或取消后删除"""
+    __tablename__ = "tb_train_jobs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    task_id = Column(String, ForeignKey("tb_train_tasks.task_id"), unique=True)
+    priority = Column(Integer, default=0)
+    job_status = Column(Integer, default=0)
+    enqueue_time = Column(DateTime, default=datetime.now)
+
+
 class AnnotationTask(Base):
     __tablename__ = "tb_annotation_tasks"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    task_id = Column(String)
+    task_id = Column(String, index=True)
     task_name = Column(String)
     task_description = Column(String)
     model_type = Column(Integer)
@@ -82,3 +93,7 @@ class AnnotationTask(Base):
 
 
 Base.metadata.create_all(engine)
+# create_all不会为已存在的表补建索引，旧数据库在这里补上
+for _table in Base.metadata.sorted_tables:
+    for _index in _table.indexes:
+        _index.create(bind=engine, checkfirst=True)
@@ -3,7 +3,7 @@ from enum import Enum
 
 from PySide6.QtCore import QLocale
 from qfluentwidgets import qconfig, QConfig, ConfigItem, OptionsConfigItem, BoolValidator, \
-    OptionsValidator, FolderValidator, ConfigSerializer
+    OptionsValidator, FolderValidator, ConfigSerializer, RangeConfigItem, RangeValidator
 
 
 def is_win11():
@@ -36,6 +36,14 @@ class Config(QConfig):
     workspace_dir = ConfigItem(
         "model", "workspace_dir", "./", FolderValidator())
 
+    # train queue
+    train_jobs_per_device = RangeConfigItem(
+        "train", "train_jobs_per_device", 1, RangeValidator(1, 8))
+    cpu_train_jobs = RangeConfigItem(
+        "train", "cpu_train_jobs", 1, RangeValidator(1, 8))
+    resume_train_queue = ConfigItem(
+        "train", "resume_train_queue", True, BoolValidator())
+
     # main window
     enable_mica_effect = ConfigItem(
         "personalization", "enable_mica_effect", is_win11(), BoolValidator())
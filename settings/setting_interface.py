@@ -1,7 +1,7 @@
 from PySide6.QtWidgets import QFileDialog, QWidget, QVBoxLayout
 from qfluentwidgets import FluentIcon as FIco
 from qfluentwidgets import SettingCardGroup, SwitchSettingCard, OptionsSettingCard, PushSettingCard, \
-    ComboBoxSettingCard, InfoBar, CustomColorSettingCard, setTheme, setThemeColor
+    ComboBoxSettingCard, InfoBar, CustomColorSettingCard, setTheme, setThemeColor, RangeSettingCard
 
 from common.component.custom_scroll_widget import CustomScrollWidget
 from .config import cfg, is_win11
@@ -27,6 +27,30 @@ class SettingInterface(QWidget):
             parent=self.model_config_group
         )
 
+        # train queue
+        self.train_queue_group = SettingCardGroup(self.tr("Training queue"), self.scroll_area)
+        self.train_jobs_per_device_card = RangeSettingCard(
+            cfg.train_jobs_per_device,
+            FIco.SPEED_HIGH,
+            self.tr("Trainings per GPU"),
+            self.tr("Maximum number of trainings running on one GPU at the same time"),
+            parent=self.train_queue_group
+        )
+        self.cpu_train_jobs_card = RangeSettingCard(
+            cfg.cpu_train_jobs,
+            FIco.SPEED_MEDIUM,
+            self.tr("CPU trainings"),
+            self.tr("Maximum number of trainings running on the CPU at the same time"),
+            parent=self.train_queue_group
+        )
+        self.resume_train_queue_card = SwitchSettingCard(
+            FIco.SYNC,
+            self.tr("Resume training queue"),
+            self.tr("Continue queued and interrupted trainings after the application starts"),
+            configItem=cfg.resume_train_queue,
+            parent=self.train_queue_group
+        )
+
         # personalization
         self.personal_group = SettingCardGroup(self.tr('Personalization'), self.scroll_area)
         self.enable_mica_card = SwitchSettingCard(
@@ -87,6 +111,9 @@ class SettingInterface(QWidget):
 
 
         self.model_config_group.addSettingCard(self.workspace_dir_card)
+        self.train_queue_group.addSettingCard(self.train_jobs_per_device_card)
+        self.train_queue_group.addSettingCard(self.cpu_train_jobs_card)
+        self.train_queue_group.addSettingCard(self.resume_train_queue_card)
 
         self.personal_group.addSettingCard(self.enable_mica_card)
         self.personal_group.addSettingCard(self.theme_card)
@@ -98,6 +125,7 @@ class SettingInterface(QWidget):
         self.vly_config_card.setSpacing(28)
         self.vly_config_card.setContentsMargins(20, 10, 20, 0)
         self.vly_config_card.addWidget(self.model_config_group)
+        self.vly_config_card.addWidget(self.train_queue_group)
         self.vly_config_card.addWidget(self.personal_group)
         self.vly_config_card.addWidget(self.main_panel_group)
         self.scroll_area.setLayout(self.vly_config_card)
@@ -186,6 +186,7 @@ CFG_INT_KEYS = {  # integer-only arguments
     "close_mosaic",
     "mask_ratio",
     "max_det",
+    "ap_bins",
     "vid_stride",
     "line_width",
     "nbs",
@@ -1,9 +1,13 @@
 # Ultralytics YOLO 🚀, AGPL-3.0 license
 
 import glob
+import hashlib
 import math
 import os
 import random
+import struct
+import tempfile
+import weakref
 from copy import deepcopy
 from multiprocessing.pool import ThreadPool
 from pathlib import Path
@@ -18,6 +22,247 @@ from ultralytics.data.utils import FORMATS_HELP_MSG, HELP_URL, IMG_FORMATS
 from ultralytics.utils import DEFAULT_CFG, LOCAL_RANK, LOGGER, NUM_THREADS, TQDM
 
 
+class ImageArena:
+    """
+    Fixed-stride memory-mapped arena of resized images shared by all dataloader workers.
+
+    Every image owns one `imgsz x imgsz x 3` uint8 slot in a single file, placed on /dev/shm when it has room, so the
+    decoded dataset is held once in the OS page cache instead of once per worker process. Workers re-open the file by
+    path after unpickling and only the creating process removes it. The file name carries the creating pid, so arenas
+    left behind by killed or crashed trainings are removed when the next arena is created in the same directory.
+
+    Attributes:
+        file (str): Path of the arena file.
+        index (np.ndarray): (n, 5) int64 array of (offset, h0, w0, h, w) per image, h == 0 if not cached.
+    """
+
+    channels = 3
+    prefix = "ultralytics_arena_"
+
+    def __init__(self, n, imgsz, directory=None):
+        """Create an arena file with one slot per image."""
+        self.stride = self.slot_bytes(imgsz)
+        self.index = np.zeros((n, 5), dtype=np.int64)  # offset, h0, w0, h, w
+        self.index[:, 0] = np.arange(n, dtype=np.int64) * self.stride
+        self.sweep(directory)
+        fd, self.file = tempfile.mkstemp(prefix=f"{self.prefix}{os.getpid()}_", suffix=".bin", dir=directory)
+        os.close(fd)
+        self._data = np.memmap(self.file, dtype=np.uint8, mode="w+", shape=(max(n * self.stride, 1),))
+        weakref.finalize(self, self._remove, self.file, os.getpid())
+
+    @classmethod
+    def slot_bytes(cls, imgsz):
+        """Bytes of one slot, large enough for any image resized to imgsz."""
+        return imgsz * imgsz * cls.channels
+
+    @staticmethod
+    def directory(nbytes):
+        """Shared memory directory if it can hold nbytes, else the system temp directory."""
+        import shutil
+
+        if os.path.isdir("/dev/shm"):
+            ImageArena.sweep("/dev/shm")  # stale arenas would otherwise count against the free space
+        if os.path.isdir("/dev/shm") and shutil.disk_usage("/dev/shm").free > nbytes:
+            return "/dev/shm"
+        return tempfile.gettempdir()
+
+    @classmethod
+    def sweep(cls, directory=None):
+        """Remove arena files in directory whose creating process is no longer running."""
+        for f in Path(directory or tempfile.gettempdir()).glob(f"{cls.prefix}*.bin"):
+            pid = f.name[len(cls.prefix) :].split("_")[0]
+            if not pid.isdigit() or psutil.pid_exists(int(pid)):
+                continue
+            try:
+                f.unlink(missing_ok=True)
+                LOGGER.info(f"Removed stale image cache {f}")
+            except OSError:
+                pass
+
+    @staticmethod
+    def _remove(file, owner_pid):
+        """Remove the arena file, forked dataloader workers leave it to the creating process."""
+        if os.getpid() == owner_pid:
+            try:
+                Path(file).unlink(missing_ok=True)
+            except OSError as e:  # still mapped on Windows
+                LOGGER.warning(f"WARNING ⚠️ failed to remove image cache {file}: {e}")
+
+    @property
+    def data(self):
+        """Memory map of the arena, opened read-only on first use in dataloader workers."""
+        if self._data is None:
+            self._data = np.memmap(self.file, dtype=np.uint8, mode="r")
+        return self._data
+
+    def put(self, i, im, hw0):
+        """Write resized image 'i' into its slot, returns False if it does not fit."""
+        h, w = im.shape[:2]
+        if im.ndim != 3 or im.shape[2] != self.channels or im.dtype != np.uint8 or im.nbytes > self.stride:
+            return False
+        offset = self.index[i, 0]
+        self.data[offset : offset + im.nbytes] = im.reshape(-1)
+        self.index[i, 1:] = (*hw0, h, w)
+        return True
+
+    def get(self, i):
+        """Return (im, hw_original, hw_resized) of image 'i', or None if it is not cached."""
+        offset, h0, w0, h, w = self.index[i].tolist()
+        if h == 0:
+            return None
+        # copy, augmentations modify images in place and worker maps are read-only
+        im = np.array(self.data[offset : offset + h * w * self.channels]).reshape(h, w, self.channels)
+        return im, (h0, w0), (h, w)
+
+    def __getstate__(self):
+        """Pickle the path and index only, spawned workers map the file themselves."""
+        state = self.__dict__.copy()
+        state["_data"] = None
+        return state
+
+
+class ImageChunkCache:
+    """
+    Append-only disk cache of pre-resized, losslessly compressed images packed into a few large chunk files.
+
+    Images resized to imgsz are encoded as lossless WebP and appended to `chunk_XXXX.bin` files of at most `chunk_bytes`
+    each. An append-only index of fixed-size records maps a key of (path, size, mtime) to its location, so changed
+    images are simply appended again and the whole cache is invalidated by deleting its directory. Reads seek into the
+    chunk files by dataset index, every dataloader worker opens its own file handles.
+
+    Several processes may fill the same cache at once (concurrent training jobs, DDP ranks). Every writer creates its
+    own new chunk files exclusively, so recorded offsets are never shifted by another writer, and index records are
+    appended with one unbuffered write each. Every blob starts with its key, which is verified on read.
+
+    Attributes:
+        directory (Path): Cache directory holding `index.bin` and the chunk files.
+        locations (np.ndarray): (n, 7) int64 array of (chunk, offset, length, h0, w0, h, w) per image, chunk -1 if not
+            cached.
+    """
+
+    version = 2  # bumped when the chunk layout changes, selects a new cache directory
+    chunk_bytes = 1 << 30
+    record = struct.Struct("<16sIQIIIII")  # key, chunk, offset, length, h0, w0, h, w
+    encode_params = [cv2.IMWRITE_WEBP_QUALITY, 101]  # quality above 100 selects lossless WebP
+
+    def __init__(self, directory, im_files):
+        """Open or create the cache in directory and locate the cached images of im_files."""
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.keys = [self.file_key(f) for f in im_files]
+        self.locations = np.full((len(im_files), 7), -1, dtype=np.int64)
+        self._readers = {}
+        self._writer = None
+        self._writer_chunk = 0
+        self._index_writer = None
+        self._load_index()
+
+    @staticmethod
+    def file_key(f):
+        """Key of an image file, changes when the file is modified."""
+        try:
+            st = os.stat(f)
+            f = f"{f}:{st.st_size}:{st.st_mtime_ns}"
+        except OSError:
+            pass
+        return hashlib.md5(str(f).encode()).digest()
+
+    def chunk_file(self, chunk):
+        """Path of chunk file number chunk."""
+        return self.directory / f"chunk_{chunk:04d}.bin"
+
+    def _load_index(self):
+        """Read the index, ignoring a torn trailing record and records past the end of their chunk file."""
+        index_file = self.directory / "index.bin"
+        data = index_file.read_bytes() if index_file.exists() else b""
+        n = len(data) // self.record.size
+        records = {key: location for key, *location in self.record.iter_unpack(data[: n * self.record.size])}
+        chunk_sizes = {}
+        for i, key in enumerate(self.keys):
+            location = records.get(key)
+            if location is None:
+                continue
+            chunk, offset, length = location[:3]
+            if chunk not in chunk_sizes:
+                f = self.chunk_file(chunk)
+                chunk_sizes[chunk] = f.stat().st_size if f.exists() else 0
+            if offset + length <= chunk_sizes[chunk]:
+                self.locations[i] = location
+
+    def cached(self, i):
+        """Whether image 'i' is in the cache."""
+        return self.locations[i, 0] >= 0
+
+    def missing(self):
+        """Indices of images not in the cache."""
+        return np.flatnonzero(self.locations[:, 0] < 0)
+
+    def encode(self, im):
+        """Encode a resized BGR image, returns bytes or None if it can not be encoded."""
+        ok, buffer = cv2.imencode(".webp", im, self.encode_params)
+        return buffer.tobytes() if ok else None
+
+    def append(self, i, buffer, hw0, hw):
+        """Append the encoded image 'i' to the current chunk and record it in the index, call from one thread only."""
+        key = self.keys[i]
+        if self._index_writer is None:
+            # unbuffered, each record is a single O_APPEND write that other writers can not interleave with
+            self._index_writer = open(self.directory / "index.bin", "ab", buffering=0)
+        if self._writer is None or self._writer.tell() + len(key) + len(buffer) > self.chunk_bytes:
+            self._open_chunk()
+        offset = self._writer.tell()
+        self._writer.write(key + buffer)
+        location = (self._writer_chunk, offset, len(key) + len(buffer), *hw0, *hw)
+        # data is written before its index record so the index never points past the data
+        self._writer.flush()
+        self._index_writer.write(self.record.pack(key, *location))
+        self.locations[i] = location
+
+    def _open_chunk(self):
+        """Create a new chunk file owned by this writer, chunk files are never appended to by another writer."""
+        if self._writer is not None:
+            self._writer.close()
+        chunk = max((int(f.stem.split("_")[1]) + 1 for f in self.directory.glob("chunk_*.bin")), default=0)
+        while True:
+            try:
+                self._writer = open(self.chunk_file(chunk), "xb")
+                break
+            except FileExistsError:  # taken by a concurrent writer
+                chunk += 1
+        self._writer_chunk = chunk
+
+    def close_writer(self):
+        """Flush and close the files opened by append."""
+        for f in (self._writer, self._index_writer):
+            if f is not None:
+                f.close()
+        self._writer = self._index_writer = None
+
+    def get(self, i):
+        """Return (im, hw_original, hw_resized) of image 'i', or None if it is not cached or can not be decoded."""
+        chunk, offset, length, h0, w0, h, w = self.locations[i].tolist()
+        if chunk < 0:
+            return None
+        f = self._readers.get(chunk)
+        if f is None:
+            f = self._readers[chunk] = open(self.chunk_file(chunk), "rb")
+        f.seek(offset)
+        data = f.read(length)
+        key = self.keys[i]
+        if len(data) <= len(key) or data[: len(key)] != key:  # location does not hold this image
+            return None
+        im = cv2.imdecode(np.frombuffer(data, dtype=np.uint8, offset=len(key)), cv2.IMREAD_COLOR)
+        if im is None or im.shape[:2] != (h, w):
+            return None
+        return im, (h0, w0), (h, w)
+
+    def __getstate__(self):
+        """Pickle without open files, dataloader workers open their own."""
+        state = self.__dict__.copy()
+        state["_readers"], state["_writer"], state["_index_writer"] = {}, None, None
+        return state
+
+
 class BaseDataset(Dataset):
     """
     Base dataset class for loading and processing image data.
@@ -25,7 +270,8 @@ class BaseDataset(Dataset):
     Args:
         img_path (str): Path to the folder containing images.
         imgsz (int, optional): Image size. Defaults to 640.
-        cache (bool, optional): Cache images to RAM or disk during training. Defaults to False.
+        cache (bool | str, optional): Cache images to RAM ('ram'), disk ('disk') or a memory-mapped arena shared by all
+            dataloader workers ('mmap') during training. Defaults to False.
         augment (bool, optional): If True, data augmentation is applied. Defaults to True.
         hyp (dict, optional): Hyperparameters to apply data augmentation. Defaults to None.
         prefix (str, optional): Prefix to print in log messages. Defaults to ''.
@@ -42,7 +288,8 @@ class BaseDataset(Dataset):
         labels (list): List of label data dictionaries.
         ni (int): Number of images in the dataset.
         ims (list): List of loaded images.
-        npy_files (list): List of numpy file paths.
+        arena (ImageArena | None): Shared memory-mapped arena of resized images when cache='mmap'.
+        disk_cache (ImageChunkCache | None): Compressed chunked disk cache of resized images when cache='disk'.
         transforms (callable): Image transformation function.
     """
 
@@ -88,8 +335,9 @@ class BaseDataset(Dataset):
 
         # Cache images (options are cache = True, False, None, "ram", "disk")
         self.ims, self.im_hw0, self.im_hw = [None] * self.ni, [None] * self.ni, [None] * self.ni
-        self.npy_files = [Path(f).with_suffix(".npy") for f in self.im_files]
         self.cache = cache.lower() if isinstance(cache, str) else "ram" if cache is True else None
+        self.arena = None  # resized images shared by all dataloader workers, cache='mmap'
+        self.disk_cache = None  # compressed resized images in chunk files, cache='disk'
         if self.cache == "ram" and self.check_cache_ram():
             if hyp.deterministic:
                 LOGGER.warning(
@@ -99,6 +347,8 @@ class BaseDataset(Dataset):
             self.cache_images()
         elif self.cache == "disk" and self.check_cache_disk():
             self.cache_images()
+        elif self.cache == "mmap" and self.check_cache_mmap():
+            self.cache_images()
 
         # Transforms
         self.transforms = self.build_transforms(hyp=hyp)
@@ -113,10 +363,10 @@ class BaseDataset(Dataset):
                     f += glob.glob(str(p / "**" / "*.*"), recursive=True)
                     # F = list(p.rglob('*.*'))  # pathlib
                 elif p.is_file():  # file
-                    with open(p) as t:
+                    with open(p, encoding="utf-8") as t:
                         t = t.read().strip().splitlines()
                         parent = str(p.parent) + os.sep
-                        f += [x.replace("./", parent) if x.startswith("./") else x for x in t]  # local to global path
+                        f += [parent + x[2:] if x.startswith("./") else x for x in t]  # local to global path
                         # F += [p.parent / x.lstrip(os.sep) for x in t]  # local to global path (pathlib)
                 else:
                     raise FileNotFoundError(f"{self.prefix}{p} does not exist")
@@ -148,86 +398,147 @@ class BaseDataset(Dataset):
             if self.single_cls:
                 self.labels[i]["cls"][:, 0] = 0
 
+    def read_image(self, i, rect_mode=True):
+        """Reads image 'i' from the disk cache or reads and resizes the source image, returns (im, hw0, hw_resized)."""
+        if self.disk_cache is not None and rect_mode:
+            cached = self.disk_cache.get(i)
+            if cached is not None:
+                return cached
+        f = self.im_files[i]
+        im = cv2.imread(f)  # BGR
+        if im is None:
+            raise FileNotFoundError(f"Image Not Found {f}")
+
+        h0, w0 = im.shape[:2]  # orig hw
+        if rect_mode:  # resize long side to imgsz while maintaining aspect ratio
+            r = self.imgsz / max(h0, w0)  # ratio
+            if r != 1:  # if sizes are not equal
+                w, h = (min(math.ceil(w0 * r), self.imgsz), min(math.ceil(h0 * r), self.imgsz))
+                im = cv2.resize(im, (w, h), interpolation=cv2.INTER_LINEAR)
+        elif not (h0 == w0 == self.imgsz):  # resize by stretching image to square imgsz
+            im = cv2.resize(im, (self.imgsz, self.imgsz), interpolation=cv2.INTER_LINEAR)
+        return im, (h0, w0), im.shape[:2]
+
     def load_image(self, i, rect_mode=True):
         """Loads 1 image from dataset index 'i', returns (im, resized hw)."""
-        im, f, fn = self.ims[i], self.im_files[i], self.npy_files[i]
+        im = self.ims[i]
         if im is None:  # not cached in RAM
-            if fn.exists():  # load npy
-                try:
-                    im = np.load(fn)
-                except Exception as e:
-                    LOGGER.warning(f"{self.prefix}WARNING ⚠️ Removing corrupt *.npy image file {fn} due to: {e}")
-                    Path(fn).unlink(missing_ok=True)
-                    im = cv2.imread(f)  # BGR
-            else:  # read image
-                im = cv2.imread(f)  # BGR
-            if im is None:
-                raise FileNotFoundError(f"Image Not Found {f}")
-
-            h0, w0 = im.shape[:2]  # orig hw
-            if rect_mode:  # resize long side to imgsz while maintaining aspect ratio
-                r = self.imgsz / max(h0, w0)  # ratio
-                if r != 1:  # if sizes are not equal
-                    w, h = (min(math.ceil(w0 * r), self.imgsz), min(math.ceil(h0 * r), self.imgsz))
-                    im = cv2.resize(im, (w, h), interpolation=cv2.INTER_LINEAR)
-            elif not (h0 == w0 == self.imgsz):  # resize by stretching image to square imgsz
-                im = cv2.resize(im, (self.imgsz, self.imgsz), interpolation=cv2.INTER_LINEAR)
+            cached = self.arena.get(i) if self.arena is not None and rect_mode else None
+            if cached is not None:  # already resized in the shared arena
+                im, hw0, hw = cached
+            else:
+                im, hw0, hw = self.read_image(i, rect_mode)
 
             # Add to buffer if training with augmentations
             if self.augment:
-                self.ims[i], self.im_hw0[i], self.im_hw[i] = im, (h0, w0), im.shape[:2]  # im, hw_original, hw_resized
+                if cached is None:  # arena images are not duplicated into per-worker self.ims
+                    self.ims[i], self.im_hw0[i], self.im_hw[i] = im, hw0, hw  # im, hw_original, hw_resized
                 self.buffer.append(i)
                 if 1 < len(self.buffer) >= self.max_buffer_length:  # prevent empty buffer
                     j = self.buffer.pop(0)
                     if self.cache != "ram":
                         self.ims[j], self.im_hw0[j], self.im_hw[j] = None, None, None
 
-            return im, (h0, w0), im.shape[:2]
+            return im, hw0, hw
 
         return self.ims[i], self.im_hw0[i], self.im_hw[i]
 
     def cache_images(self):
-        """Cache images to memory or disk."""
+        """Cache images to memory, disk or the shared memory-mapped arena."""
         b, gb = 0, 1 << 30  # bytes of cached images, bytes per gigabytes
-        fcn, storage = (self.cache_images_to_disk, "Disk") if self.cache == "disk" else (self.load_image, "RAM")
+        if self.cache == "disk":
+            fcn, storage = self.cache_images_to_disk, "Disk"
+        elif self.cache == "mmap":
+            fcn, storage = self.cache_image_to_arena, "shared mmap"
+        else:
+            fcn, storage = self.load_image, "RAM"
         with ThreadPool(NUM_THREADS) as pool:
             results = pool.imap(fcn, range(self.ni))
             pbar = TQDM(enumerate(results), total=self.ni, disable=LOCAL_RANK > 0)
             for i, x in pbar:
                 if self.cache == "disk":
-                    b += self.npy_files[i].stat().st_size
+                    if x is not None:
+                        self.disk_cache.append(i, *x)
+                    b += max(int(self.disk_cache.locations[i, 2]), 0)
+                elif self.cache == "mmap":
+                    b += x
                 else:  # 'ram'
                     self.ims[i], self.im_hw0[i], self.im_hw[i] = x  # im, hw_orig, hw_resized = load_image(self, i)
                     b += self.ims[i].nbytes
                 pbar.desc = f"{self.prefix}Caching images ({b / gb:.1f}GB {storage})"
             pbar.close()
+        if self.disk_cache is not None:
+            self.disk_cache.close_writer()
 
     def cache_images_to_disk(self, i):
-        """Saves an image as an *.npy file for faster loading."""
-        f = self.npy_files[i]
-        if not f.exists():
-            np.save(f.as_posix(), cv2.imread(self.im_files[i]), allow_pickle=False)
+        """Encodes resized image 'i' for the chunked disk cache, returns (buffer, hw0, hw) or None if already cached."""
+        if self.disk_cache.cached(i):
+            return None
+        im, hw0, hw = self.read_image(i)
+        buffer = self.disk_cache.encode(im)
+        return None if buffer is None else (buffer, hw0, hw)
+
+    def cache_image_to_arena(self, i):
+        """Resizes image 'i' into its slot of the shared arena, returns the number of bytes cached."""
+        im, hw0, _ = self.read_image(i)
+        return im.nbytes if self.arena.put(i, im, hw0) else 0
+
+    def check_cache_mmap(self, safety_margin=0.1):
+        """Check shared memory-mapped arena requirements vs free space of its directory and create the arena."""
+        import shutil
+
+        gb = 1 << 30  # bytes per gigabytes
+        arena_bytes = self.ni * ImageArena.slot_bytes(self.imgsz)
+        directory = ImageArena.directory(arena_bytes * (1 + safety_margin))
+        total, used, free = shutil.disk_usage(directory)
+        if arena_bytes * (1 + safety_margin) > free:
+            self.cache = None
+            LOGGER.info(
+                f"{self.prefix}{arena_bytes / gb:.1f}GB required for the shared image cache in {directory}, "
+                f"with {int(safety_margin * 100)}% safety margin but only "
+                f"{free / gb:.1f}/{total / gb:.1f}GB free, not caching images ⚠️"
+            )
+            return False
+        mem = psutil.virtual_memory()
+        if arena_bytes > mem.available:
+            LOGGER.warning(
+                f"{self.prefix}WARNING ⚠️ shared image cache of {arena_bytes / gb:.1f}GB exceeds "
+                f"{mem.available / gb:.1f}GB available RAM, cached images will be paged in from {directory}"
+            )
+        self.arena = ImageArena(self.ni, self.imgsz, directory)
+        return True
+
+    def image_cache_dir(self):
+        """Directory of the chunked disk cache, next to the images and specific to imgsz."""
+        name = f"v{ImageChunkCache.version}_imgsz_{self.imgsz}"
+        return Path(os.path.commonpath(self.im_files)) / ".image_cache" / name
 
     def check_cache_disk(self, safety_margin=0.5):
-        """Check image caching requirements vs available disk space."""
+        """Check compressed image cache requirements vs available disk space and open the cache."""
         import shutil
 
         b, gb = 0, 1 << 30  # bytes of cached images, bytes per gigabytes
-        n = min(self.ni, 30)  # extrapolate from 30 random images
-        for _ in range(n):
-            im_file = random.choice(self.im_files)
-            im = cv2.imread(im_file)
-            if im is None:
+        directory = self.image_cache_dir()
+        try:
+            self.disk_cache = ImageChunkCache(directory, self.im_files)
+        except OSError:
+            self.cache = None
+            LOGGER.info(f"{self.prefix}Skipping caching images to disk, directory not writeable ⚠️")
+            return False
+        missing = self.disk_cache.missing()
+        if len(missing) == 0:
+            return True
+        n = min(len(missing), 30)  # extrapolate from 30 random uncached images
+        for i in random.sample(list(missing), n):
+            try:
+                im = self.read_image(int(i))[0]
+            except FileNotFoundError:
                 continue
-            b += im.nbytes
-            if not os.access(Path(im_file).parent, os.W_OK):
-                self.cache = None
-                LOGGER.info(f"{self.prefix}Skipping caching images to disk, directory not writeable ⚠️")
-                return False
-        disk_required = b * self.ni / n * (1 + safety_margin)  # bytes required to cache dataset to disk
-        total, used, free = shutil.disk_usage(Path(self.im_files[0]).parent)
+            b += len(self.disk_cache.encode(im) or b"")
+        disk_required = b * len(missing) / n * (1 + safety_margin)  # bytes required to cache the rest of dataset
+        total, used, free = shutil.disk_usage(directory)
         if disk_required > free:
-            self.cache = None
+            self.cache, self.disk_cache = None, None
             LOGGER.info(
                 f"{self.prefix}{disk_required / gb:.1f}GB disk space required, "
                 f"with {int(safety_margin * 100)}% safety margin but only "
@@ -1,6 +1,7 @@
 # Ultralytics YOLO 🚀, AGPL-3.0 license
 
 import json
+import struct
 from collections import defaultdict
 from itertools import repeat
 from multiprocessing.pool import ThreadPool
@@ -30,16 +31,19 @@ from .base import BaseDataset
 from .utils import (
     HELP_URL,
     LOGGER,
+    file_stat_keys,
     get_hash,
     img2label_paths,
+    load_columnar_cache_file,
     load_dataset_cache_file,
+    save_columnar_cache_file,
     save_dataset_cache_file,
     verify_image,
     verify_image_label,
 )
 
-# Ultralytics dataset *.cache version, >= 1.0.0 for YOLOv8
-DATASET_CACHE_VERSION = "1.0.3"
+# Ultralytics dataset *.cache version, >= 1.0.0 for YOLOv8, >= 2.0.0 columnar detection label cache
+DATASET_CACHE_VERSION = "2.0.0"
 
 
 class YOLODataset(BaseDataset):
@@ -67,13 +71,15 @@ class YOLODataset(BaseDataset):
         """
         Cache dataset labels, check images and read shapes.
 
+        Images whose image and label files keep the (size, mtime) recorded in the columnar cache at path are read from
+        it, only new or changed files are verified again. The cache is rewritten only when something changed.
+
         Args:
             path (Path): Path where to save the cache file. Default is Path('./labels.cache').
 
         Returns:
-            (dict): labels.
+            (dict): labels, results, msgs and the number of verified images.
         """
-        x = {"labels": []}
         nm, nf, ne, nc, msgs = 0, 0, 0, 0, []  # number missing, found, empty, corrupt, messages
         desc = f"{self.prefix}Scanning {path.parent / path.stem}..."
         total = len(self.im_files)
@@ -83,74 +89,178 @@ class YOLODataset(BaseDataset):
                 "'kpt_shape' in data.yaml missing or incorrect. Should be a list with [number of "
                 "keypoints, number of dims (2 for x,y or 3 for x,y,visible)], i.e. 'kpt_shape: [17, 3]'"
             )
-        with ThreadPool(NUM_THREADS) as pool:
-            results = pool.imap(
-                func=verify_image_label,
-                iterable=zip(
-                    self.im_files,
-                    self.label_files,
-                    repeat(self.prefix),
-                    repeat(self.use_keypoints),
-                    repeat(len(self.data["names"])),
-                    repeat(nkpt),
-                    repeat(ndim),
-                ),
-            )
-            pbar = TQDM(results, desc=desc, total=total)
-            for im_file, lb, shape, segments, keypoint, nm_f, nf_f, ne_f, nc_f, msg in pbar:
-                nm += nm_f
-                nf += nf_f
-                ne += ne_f
-                nc += nc_f
-                if im_file:
-                    x["labels"].append(
-                        {
-                            "im_file": im_file,
-                            "shape": shape,
-                            "cls": lb[:, 0:1],  # n, 1
-                            "bboxes": lb[:, 1:],  # n, 4
-                            "segments": segments,
-                            "keypoints": keypoint,
-                            "normalized": True,
-                            "bbox_format": "xywh",
-                        }
-                    )
-                if msg:
-                    msgs.append(msg)
-                pbar.desc = f"{desc} {nf} images, {nm + ne} backgrounds, {nc} corrupt"
-            pbar.close()
-
-        if msgs:
+        meta = {
+            "version": DATASET_CACHE_VERSION,
+            "keypoints": self.use_keypoints,
+            "kpt_shape": [nkpt, ndim],
+            "num_cls": len(self.data["names"]),
+        }
+        keys = np.concatenate((file_stat_keys(self.im_files), file_stat_keys(self.label_files)), 1)
+        records = [None] * total
+        todo, changed = self._load_cached_records(path, meta, keys, records)
+
+        if todo:
+            with ThreadPool(NUM_THREADS) as pool:
+                results = pool.imap(
+                    func=verify_image_label,
+                    iterable=zip(
+                        [self.im_files[i] for i in todo],
+                        [self.label_files[i] for i in todo],
+                        repeat(self.prefix),
+                        repeat(self.use_keypoints),
+                        repeat(len(self.data["names"])),
+                        repeat(nkpt),
+                        repeat(ndim),
+                    ),
+                )
+                pbar = TQDM(zip(todo, results), desc=desc, total=len(todo))
+                for i, record in pbar:
+                    records[i] = record
+                    pbar.desc = f"{desc} {len(todo)} new or changed images"
+                pbar.close()
+
+        x = {"labels": []}
+        for im_file, lb, shape, segments, keypoint, nm_f, nf_f, ne_f, nc_f, msg in records:
+            nm += nm_f
+            nf += nf_f
+            ne += ne_f
+            nc += nc_f
+            if im_file:
+                x["labels"].append(
+                    {
+                        "im_file": im_file,
+                        "shape": shape,
+                        "cls": lb[:, 0:1],  # n, 1
+                        "bboxes": lb[:, 1:],  # n, 4
+                        "segments": segments,
+                        "keypoints": keypoint,
+                        "normalized": True,
+                        "bbox_format": "xywh",
+                    }
+                )
+            if msg:
+                msgs.append(msg)
+
+        if todo and msgs:
             LOGGER.info("\n".join(msgs))
         if nf == 0:
             LOGGER.warning(f"{self.prefix}WARNING ⚠️ No labels found in {path}. {HELP_URL}")
-        x["hash"] = get_hash(self.label_files + self.im_files)
-        x["results"] = nf, nm, ne, nc, len(self.im_files)
+        x["results"] = nf, nm, ne, nc, total
         x["msgs"] = msgs  # warnings
-        save_dataset_cache_file(self.prefix, path, x, DATASET_CACHE_VERSION)
+        x["verified"] = len(todo)
+        if changed:
+            self._save_label_cache(path, records, keys, meta)
         return x
 
+    def _load_cached_records(self, path, meta, keys, records):
+        """
+        Fill records with the still valid rows of the label cache at path.
+
+        The cache maps are only referenced inside this call, so once it returns the old file is no longer mapped and
+        can be replaced by _save_label_cache (os.replace fails on a mapped file on Windows).
+
+        Returns:
+            (tuple): list of indices that need verifying and whether the cache has to be rewritten.
+        """
+        try:
+            arrays, cached_meta = load_columnar_cache_file(path)
+            assert all(cached_meta[k] == v for k, v in meta.items())  # same version and verification arguments
+            paths = np.asarray(arrays["path_bytes"]).tobytes()
+            path_offsets = arrays["path_offsets"].tolist()
+            cached_rows = {
+                paths[path_offsets[r] : path_offsets[r + 1]].decode(): r for r in range(len(path_offsets) - 1)
+            }
+            rows = np.array([cached_rows.get(f, -1) for f in self.im_files], dtype=np.int64)
+            hit = rows >= 0
+            hit[hit] = (arrays["keys"][rows[hit]] == keys[hit]).all(1)
+            todo = np.flatnonzero(~hit).tolist()
+            changed = bool(todo) or len(cached_rows) != len(records)
+            # reused labels are copied out of the maps when the cache is rewritten
+            read = self._cached_record_reader(arrays, cached_meta["msgs"], copy=changed)
+            for i in np.flatnonzero(hit).tolist():
+                records[i] = read(int(rows[i]), self.im_files[i])
+            return todo, changed
+        except (FileNotFoundError, AssertionError, KeyError, ValueError, struct.error):
+            return list(range(len(records))), True  # no usable cache, verify all images
+
+    def _save_label_cache(self, path, records, keys, meta):
+        """Save verified records as flat concatenated arrays with per-image offsets."""
+        nkpt, _ = meta["kpt_shape"]
+        empty_lb = np.zeros((0, 5), dtype=np.float32)
+        valid = [r[0] is not None for r in records]
+        paths = [f.encode() for f in self.im_files]
+        lbs = [r[1] if v else empty_lb for r, v in zip(records, valid)]
+        segments = [r[3] if v else [] for r, v in zip(records, valid)]
+        points = [s for segs in segments for s in segs]
+        arrays = {
+            "path_bytes": np.frombuffer(b"".join(paths), dtype=np.uint8),
+            "path_offsets": np.cumsum([0] + [len(p) for p in paths], dtype=np.int64),
+            "keys": keys,  # image size, image mtime, label size, label mtime
+            "status": np.array([(v, *r[5:9]) for r, v in zip(records, valid)], dtype=np.int8).reshape(-1, 5),
+            "shapes": np.array([r[2] if v else (0, 0) for r, v in zip(records, valid)], dtype=np.int32).reshape(-1, 2),
+            "label_offsets": np.cumsum([0] + [len(lb) for lb in lbs], dtype=np.int64),
+            "labels": np.concatenate(lbs, 0).astype(np.float32, copy=False) if lbs else empty_lb,  # cls, xywh
+            "segment_offsets": np.cumsum([0] + [len(segs) for segs in segments], dtype=np.int64),
+            "point_offsets": np.cumsum([0] + [len(p) for p in points], dtype=np.int64),
+            "points": np.concatenate(points, 0).astype(np.float32, copy=False)
+            if points
+            else np.zeros((0, 2), dtype=np.float32),
+        }
+        if self.use_keypoints:
+            kpts = [r[4] for r, v in zip(records, valid) if v]
+            arrays["keypoints"] = (
+                np.concatenate(kpts, 0).astype(np.float32, copy=False) if kpts else np.zeros((0, nkpt, 3), np.float32)
+            )
+        meta = {**meta, "msgs": {f: r[9] for f, r in zip(self.im_files, records) if r[9]}}
+        save_columnar_cache_file(self.prefix, path, arrays, meta)
+
+    @staticmethod
+    def _cached_record_reader(arrays, msgs, copy=False):
+        """Returns a function reading the verify_image_label result of a cached row from the columnar arrays."""
+        status = arrays["status"].tolist()
+        shapes = arrays["shapes"].tolist()
+        label_offsets = arrays["label_offsets"].tolist()
+        segment_offsets = arrays["segment_offsets"].tolist()
+        point_offsets = arrays["point_offsets"].tolist()
+        # plain ndarrays, slicing a np.memmap is much slower. With copy the maps are read into memory once and the
+        # records only hold slices of those copies, never views of the file
+        to_array = np.array if copy else np.asarray
+        labels, points = to_array(arrays["labels"]), to_array(arrays["points"])
+        keypoints = to_array(arrays["keypoints"]) if "keypoints" in arrays else None
+
+        def read(r, im_file):
+            valid, nm, nf, ne, nc = status[r]
+            msg = msgs.get(im_file, "")
+            if not valid:
+                return None, None, None, None, None, nm, nf, ne, nc, msg
+            s, e = label_offsets[r], label_offsets[r + 1]
+            segments = [
+                points[point_offsets[j] : point_offsets[j + 1]]
+                for j in range(segment_offsets[r], segment_offsets[r + 1])
+            ]
+            keypoint = None if keypoints is None else keypoints[s:e]
+            return im_file, labels[s:e], tuple(shapes[r]), segments, keypoint, nm, nf, ne, nc, msg
+
+        return read
+
     def get_labels(self):
         """Returns dictionary of labels for YOLO training."""
         self.label_files = img2label_paths(self.im_files)
         cache_path = Path(self.label_files[0]).parent.with_suffix(".cache")
-        try:
-            cache, exists = load_dataset_cache_file(cache_path), True  # attempt to load a *.cache file
-            assert cache["version"] == DATASET_CACHE_VERSION  # matches current version
-            assert cache["hash"] == get_hash(self.label_files + self.im_files)  # identical hash
-        except (FileNotFoundError, AssertionError, AttributeError):
-            cache, exists = self.cache_labels(cache_path), False  # run cache ops
+        if isinstance(self.img_path, str) and Path(self.img_path).suffix == ".txt":
+            # image lists of different splits share one labels dir, keep one cache per list file
+            cache_path = Path(self.img_path).with_suffix(".cache")
+        cache = self.cache_labels(cache_path)
 
         # Display cache
         nf, nm, ne, nc, n = cache.pop("results")  # found, missing, empty, corrupt, total
-        if exists and LOCAL_RANK in {-1, 0}:
+        if not cache["verified"] and LOCAL_RANK in {-1, 0}:
             d = f"Scanning {cache_path}... {nf} images, {nm + ne} backgrounds, {nc} corrupt"
             TQDM(None, desc=self.prefix + d, total=n, initial=n)  # display results
             if cache["msgs"]:
                 LOGGER.info("\n".join(cache["msgs"]))  # display warnings
 
         # Read cache
-        [cache.pop(k) for k in ("hash", "version", "msgs")]  # remove items
         labels = cache["labels"]
         if not labels:
             LOGGER.warning(f"WARNING ⚠️ No images found in {cache_path}, training may not work correctly. {HELP_URL}")
@@ -4,6 +4,7 @@ import hashlib
 import json
 import os
 import random
+import struct
 import subprocess
 import time
 import zipfile
@@ -672,3 +673,72 @@ def save_dataset_cache_file(prefix, path, x, version):
         LOGGER.info(f"{prefix}New cache created: {path}")
     else:
         LOGGER.warning(f"{prefix}WARNING ⚠️ Cache directory {path.parent} is not writeable, cache not saved.")
+
+
+COLUMNAR_CACHE_MAGIC = b"ULCACHE1"
+
+
+def _align(n, alignment=64):
+    """Round n up to a multiple of alignment."""
+    return -(-n // alignment) * alignment
+
+
+def file_stat_keys(paths):
+    """Returns an (n, 2) int64 array of (size, mtime_ns) per path, (-1, -1) for missing files."""
+    keys = np.full((len(paths), 2), -1, dtype=np.int64)
+    for i, p in enumerate(paths):
+        try:
+            st = os.stat(p)
+            keys[i] = st.st_size, st.st_mtime_ns
+        except OSError:
+            pass
+    return keys
+
+
+def load_columnar_cache_file(path):
+    """
+    Load a columnar cache file written by save_columnar_cache_file without unpickling.
+
+    Returns:
+        (tuple): dict of copy-on-write memory-mapped arrays and the meta dict.
+    """
+    with open(path, "rb") as f:
+        assert f.read(len(COLUMNAR_CACHE_MAGIC)) == COLUMNAR_CACHE_MAGIC, "not a columnar cache file"
+        (n,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(n))
+    data_start = _align(len(COLUMNAR_CACHE_MAGIC) + 8 + n)
+    arrays = {}
+    for k, v in header["arrays"].items():
+        dtype, shape = np.dtype(v["dtype"]), tuple(v["shape"])
+        if 0 in shape:  # empty arrays can not be memory-mapped
+            arrays[k] = np.zeros(shape, dtype=dtype)
+        else:
+            arrays[k] = np.memmap(path, dtype=dtype, mode="c", offset=data_start + v["offset"], shape=shape)
+    return arrays, header["meta"]
+
+
+def save_columnar_cache_file(prefix, path, arrays, meta):
+    """Save named arrays and a JSON serializable meta dict to path as 64-byte aligned raw arrays after a JSON header."""
+    if not is_dir_writeable(path.parent):
+        LOGGER.warning(f"{prefix}WARNING ⚠️ Cache directory {path.parent} is not writeable, cache not saved.")
+        return
+    arrays = {k: np.ascontiguousarray(a) for k, a in arrays.items()}
+    offsets, offset = {}, 0
+    for k, a in arrays.items():
+        offsets[k] = {"dtype": a.dtype.str, "shape": list(a.shape), "offset": offset}
+        offset = _align(offset + a.nbytes)
+    header = json.dumps({"meta": meta, "arrays": offsets}).encode()
+    data_start = _align(len(COLUMNAR_CACHE_MAGIC) + 8 + len(header))
+    tmp = path.with_name(f"{path.name}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(COLUMNAR_CACHE_MAGIC + struct.pack("<Q", len(header)) + header)
+        for k, a in arrays.items():
+            f.seek(data_start + offsets[k]["offset"])
+            a.tofile(f)
+    try:
+        os.replace(tmp, path)  # atomic, readers never see a partial cache
+    except OSError as e:  # e.g. cache still memory-mapped by another process on Windows
+        tmp.unlink(missing_ok=True)
+        LOGGER.warning(f"{prefix}WARNING ⚠️ Cache file {path} could not be replaced, cache not saved: {e}")
+        return
+    LOGGER.info(f"{prefix}New cache created: {path}")
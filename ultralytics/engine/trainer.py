@@ -43,10 +43,11 @@ from ultralytics.utils.dist import ddp_cleanup, generate_ddp_command
 from ultralytics.utils.files import get_latest_run
 from ultralytics.utils.torch_utils import (
     TORCH_2_4,
+    CheckpointWriter,
     EarlyStopping,
     ModelEMA,
     autocast,
-    convert_optimizer_state_dict_to_fp16,
+    copy_state_to_cpu,
     init_seeds,
     one_cycle,
     select_device,
@@ -69,6 +70,8 @@ class BaseTrainer:
         last (Path): Path to the last checkpoint.
         best (Path): Path to the best checkpoint.
         save_period (int): Save checkpoint every x epochs (disabled if < 1).
+        checkpoint_writer (CheckpointWriter): Background writer of last, best and periodic checkpoints.
+        saved_checkpoint (dict): Epoch, fitness and written files of the checkpoint 'on_model_save' runs for.
         batch_size (int): Batch size for training.
         epochs (int): Number of epochs to train for.
         start_epoch (int): Starting epoch for training.
@@ -116,6 +119,8 @@ class BaseTrainer:
             yaml_save(self.save_dir / "args.yaml", vars(self.args))  # save run args
         self.last, self.best = self.wdir / "last.pt", self.wdir / "best.pt"  # checkpoint paths
         self.save_period = self.args.save_period
+        self.checkpoint_writer = CheckpointWriter()
+        self.saved_checkpoint = None
 
         self.batch_size = self.args.batch
         self.epochs = self.args.epochs or 100  # in case users accidentally pass epochs=None with timed training
@@ -423,6 +428,8 @@ class BaseTrainer:
 
                 self.run_callbacks("on_train_batch_end")
                 if self.interrupt:
+                    if RANK in {-1, 0}:
+                        self.checkpoint_writer.close()
                     self.run_callbacks("on_train_end")
                     gc.collect()
                     torch.cuda.empty_cache()
@@ -443,8 +450,7 @@ class BaseTrainer:
 
                 # Save model
                 if self.args.save or final_epoch:
-                    self.save_model()
-                    self.run_callbacks("on_model_save")
+                    self.save_model()  # runs 'on_model_save' once written
 
             # Scheduler
             t = time.time()
@@ -469,6 +475,7 @@ class BaseTrainer:
             epoch += 1
 
         if RANK in {-1, 0}:
+            self.checkpoint_writer.close()  # last.pt and best.pt must be on disk before final val
             # Do final val with best.pt
             seconds = time.time() - self.train_time_start
             LOGGER.info(f"\n{epoch - self.start_epoch + 1} epochs completed in {seconds / 3600:.3f} hours.")
@@ -516,39 +523,52 @@ class BaseTrainer:
         return pd.read_csv(self.csv).to_dict(orient="list")
 
     def save_model(self):
-        """Save model training checkpoints with additional metadata."""
-        import io
-
-        # Serialize ckpt to a byte buffer once (faster than repeated torch.save() calls)
-        buffer = io.BytesIO()
-        torch.save(
-            {
-                "epoch": self.epoch,
-                "best_fitness": self.best_fitness,
-                "model": None,  # resume and final checkpoints derive from EMA
-                "ema": deepcopy(self.ema.ema).half(),
-                "updates": self.ema.updates,
-                "optimizer": convert_optimizer_state_dict_to_fp16(deepcopy(self.optimizer.state_dict())),
-                "train_args": vars(self.args),  # save as dict
-                "train_metrics": {**self.metrics, **{"fitness": self.fitness}},
-                #"train_results": self.read_results_csv(),
-                "date": datetime.now().isoformat(),
-                "version": __version__,
-                "license": "AGPL-3.0 (https://ultralytics.com/license)",
-                "docs": "https://docs.ultralytics.com",
-            },
-            buffer,
-        )
-        serialized_ckpt = buffer.getvalue()  # get the serialized content to save
+        """
+        Save model training checkpoints with additional metadata.
+
+        Only the snapshot of EMA and optimizer state is taken here and copied to CPU, so queued checkpoints hold no
+        device memory. Serialization and disk writes run on the background checkpoint writer, see _on_checkpoint_saved()
+        for when 'on_model_save' callbacks run.
+        """
+        ckpt = {
+            "epoch": self.epoch,
+            "best_fitness": self.best_fitness,
+            "model": None,  # resume and final checkpoints derive from EMA
+            "ema": deepcopy(self.ema.ema).half().to("cpu", non_blocking=True),
+            "updates": self.ema.updates,
+            "optimizer": copy_state_to_cpu(self.optimizer.state_dict(), half=True),
+            "train_args": dict(vars(self.args)),  # save as dict, copied as args may change before it is written
+            "train_metrics": {**self.metrics, **{"fitness": self.fitness}},
+            #"train_results": self.read_results_csv(),
+            "date": datetime.now().isoformat(),
+            "version": __version__,
+            "license": "AGPL-3.0 (https://ultralytics.com/license)",
+            "docs": "https://docs.ultralytics.com",
+        }
 
         # Save checkpoints
-        self.last.write_bytes(serialized_ckpt)  # save last.pt
+        files = [self.last]  # save last.pt
         if self.best_fitness == self.fitness:
-            self.best.write_bytes(serialized_ckpt)  # save best.pt
+            files.append(self.best)  # save best.pt
         if (self.save_period > 0) and (self.epoch % self.save_period == 0):
-            (self.wdir / f"epoch{self.epoch}.pt").write_bytes(serialized_ckpt)  # save epoch, i.e. 'epoch3.pt'
+            files.append(self.wdir / f"epoch{self.epoch}.pt")  # save epoch, i.e. 'epoch3.pt'
         # if self.args.close_mosaic and self.epoch == (self.epochs - self.args.close_mosaic - 1):
-        #    (self.wdir / "last_mosaic.pt").write_bytes(serialized_ckpt)  # save mosaic checkpoint
+        #    files.append(self.wdir / "last_mosaic.pt")  # save mosaic checkpoint
+        if self.device.type == "cuda":
+            torch.cuda.synchronize(self.device)  # wait for the non_blocking copies to CPU
+        meta = {"epoch": self.epoch, "fitness": self.fitness, "best_fitness": self.best_fitness}
+        self.checkpoint_writer.submit(ckpt, files, callback=self._on_checkpoint_saved, meta=meta)
+
+    def _on_checkpoint_saved(self, meta, files):
+        """
+        Run 'on_model_save' callbacks on the checkpoint writer thread once a checkpoint is durable.
+
+        Callbacks run once per save_model() call, in order, and should read `saved_checkpoint` instead of live trainer
+        state that may have moved on. Its 'files' lists the files written for this snapshot, it is empty when a newer
+        checkpoint replaced all of them before this one was written.
+        """
+        self.saved_checkpoint = {**meta, "files": files}
+        self.run_callbacks("on_model_save")
 
     def get_dataset(self):
         """
@@ -10,7 +10,7 @@ from ultralytics.data import build_dataloader, build_yolo_dataset, converter
 from ultralytics.engine.validator import BaseValidator
 from ultralytics.utils import LOGGER, ops
 from ultralytics.utils.checks import check_requirements
-from ultralytics.utils.metrics import ConfusionMatrix, DetMetrics, box_iou
+from ultralytics.utils.metrics import APAccumulator, ConfusionMatrix, DetMetrics, box_iou
 from ultralytics.utils.plotting import output_to_target, plot_images
 
 
@@ -84,6 +84,10 @@ class DetectionValidator(BaseValidator):
         self.seen = 0
         self.jdict = []
         self.stats = dict(tp=[], conf=[], pred_cls=[], target_cls=[], target_img=[])
+        # binned statistics with bounded memory instead of per-prediction lists, see 'ap_bins' in default.yaml
+        self.ap_accumulator = (
+            APAccumulator(self.nc, self.niou, self.args.ap_bins, self.device) if self.args.ap_bins > 0 else None
+        )
 
     def get_desc(self):
         """Return a formatted string summarizing class metrics of YOLO model."""
@@ -139,8 +143,7 @@ class DetectionValidator(BaseValidator):
             stat["target_img"] = cls.unique()
             if npr == 0:
                 if nl:
-                    for k in self.stats.keys():
-                        self.stats[k].append(stat[k])
+                    self._append_stat(stat)
                     if self.args.plots:
                         self.confusion_matrix.process_batch(detections=None, gt_bboxes=bbox, gt_cls=cls)
                 continue
@@ -157,8 +160,7 @@ class DetectionValidator(BaseValidator):
                 stat["tp"] = self._process_batch(predn, bbox, cls)
             if self.args.plots:
                 self.confusion_matrix.process_batch(predn, bbox, cls)
-            for k in self.stats.keys():
-                self.stats[k].append(stat[k])
+            self._append_stat(stat)
 
             # Save
             if self.args.save_json:
@@ -171,6 +173,14 @@ class DetectionValidator(BaseValidator):
                     self.save_dir / "labels" / f'{Path(batch["im_file"][si]).stem}.txt',
                 )
 
+    def _append_stat(self, stat):
+        """Add the statistics of one image to the binned accumulator or the per-prediction lists."""
+        if self.ap_accumulator is not None:
+            self.ap_accumulator.update(**stat)
+        else:
+            for k in self.stats.keys():
+                self.stats[k].append(stat[k])
+
     def finalize_metrics(self, *args, **kwargs):
         """Set final values for metrics speed and confusion matrix."""
         self.metrics.speed = self.speed
@@ -178,6 +188,12 @@ class DetectionValidator(BaseValidator):
 
     def get_stats(self):
         """Returns metrics statistics and results dictionary."""
+        if self.ap_accumulator is not None:
+            self.nt_per_class = self.ap_accumulator.n_target.cpu().numpy()
+            self.nt_per_image = self.ap_accumulator.n_image.cpu().numpy()
+            if self.ap_accumulator.n_tp.any():
+                self.metrics.process_binned(self.ap_accumulator)
+            return self.metrics.results_dict
         stats = {k: torch.cat(v, 0).cpu().numpy() for k, v in self.stats.items()}  # to numpy
         self.nt_per_class = np.bincount(stats["target_cls"].astype(int), minlength=self.nc)
         self.nt_per_image = np.bincount(stats["target_img"].astype(int), minlength=self.nc)
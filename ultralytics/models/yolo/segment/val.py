@@ -51,6 +51,7 @@ class SegmentationValidator(DetectionValidator):
         # more accurate vs faster
         self.process = ops.process_mask_native if self.args.save_json or self.args.save_txt else ops.process_mask
         self.stats = dict(tp_m=[], tp=[], conf=[], pred_cls=[], target_cls=[], target_img=[])
+        self.ap_accumulator = None  # binned statistics only cover box mAP, keep exact per-prediction lists
 
     def get_desc(self):
         """Return a formatted description of evaluation metrics."""
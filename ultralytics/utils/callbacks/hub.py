@@ -51,11 +51,14 @@ def on_model_save(trainer):
     """Saves checkpoints to Ultralytics HUB with rate limiting."""
     session = getattr(trainer, "hub_session", None)
     if session:
-        # Upload checkpoints with rate limiting
-        is_best = trainer.best_fitness == trainer.fitness
+        # Upload checkpoints with rate limiting, state of the written snapshot as training may have moved on
+        ckpt = trainer.saved_checkpoint
+        if trainer.last not in ckpt["files"]:
+            return  # replaced by a newer checkpoint before it was written
+        is_best = ckpt["best_fitness"] == ckpt["fitness"]
         if time() - session.timers["ckpt"] > session.rate_limits["ckpt"]:
             LOGGER.info(f"{PREFIX}Uploading checkpoint {HUB_WEB_ROOT}/models/{session.model.id}")
-            session.upload_model(trainer.epoch, trainer.last, is_best)
+            session.upload_model(ckpt["epoch"], trainer.last, is_best)
             session.timers["ckpt"] = time()  # reset timer
 
 
@@ -600,6 +600,15 @@ def ap_per_class(
             if j == 0:
                 prec_values.append(np.interp(x, mrec, mpre))  # precision at mAP@0.5
 
+    return _ap_per_class_results(
+        ap, p_curve, r_curve, prec_values, x, unique_classes, nt, plot, on_plot, save_dir, names, eps, prefix
+    )
+
+
+def _ap_per_class_results(
+    ap, p_curve, r_curve, prec_values, x, unique_classes, nt, plot, on_plot, save_dir, names, eps, prefix
+):
+    """Computes F1 curves, max-F1 results and plots shared by exact and binned ap_per_class."""
     prec_values = np.array(prec_values)  # (nc, 1000)
 
     # Compute F1 (harmonic mean of precision and recall)
@@ -619,6 +628,111 @@ def ap_per_class(
     return tp, fp, p, r, f1, ap, unique_classes.astype(int), p_curve, r_curve, f1_curve, x, prec_values
 
 
+class APAccumulator:
+    """
+    Streaming accumulator of detection statistics for computing mAP on large validation sets.
+
+    Instead of keeping the tp, conf and class of every prediction, predictions are counted in fixed confidence bins per
+    class, together with their true positives at each IoU threshold. Memory is O(classes x bins x IoUs) regardless of
+    the number of images, and accumulators of different workers can be merged. Precision-recall points are taken at
+    the bin edges, so the AP error is bounded by the predictions of a class sharing one confidence bin and vanishes as
+    the bins get finer.
+
+    Attributes:
+        nc (int): Number of classes.
+        niou (int): Number of IoU thresholds.
+        bins (int): Number of confidence bins over [0, 1].
+        n_pred (torch.Tensor): Prediction counts per class and confidence bin. Shape: (nc, bins).
+        n_tp (torch.Tensor): True positive counts per class, confidence bin and IoU threshold. Shape: (nc, bins, niou).
+        n_target (torch.Tensor): Target counts per class. Shape: (nc,).
+        n_image (torch.Tensor): Number of images containing each class. Shape: (nc,).
+    """
+
+    def __init__(self, nc, niou=10, bins=1000, device=None):
+        """Initialize empty histograms on the device the statistics are produced on, avoiding per-image syncs."""
+        self.nc = nc
+        self.niou = niou
+        self.bins = bins
+        self.n_pred = torch.zeros(nc, bins, dtype=torch.long, device=device)
+        self.n_tp = torch.zeros(nc, bins, niou, dtype=torch.long, device=device)
+        self.n_target = torch.zeros(nc, dtype=torch.long, device=device)
+        self.n_image = torch.zeros(nc, dtype=torch.long, device=device)
+
+    def update(self, tp, conf, pred_cls, target_cls, target_img):
+        """
+        Add the statistics of one image.
+
+        Args:
+            tp (torch.Tensor): Correct predictions at each IoU threshold. Shape: (n, niou).
+            conf (torch.Tensor): Confidence of the predictions. Shape: (n,).
+            pred_cls (torch.Tensor): Predicted classes. Shape: (n,).
+            target_cls (torch.Tensor): Target classes. Shape: (m,).
+            target_img (torch.Tensor): Unique target classes of the image.
+        """
+        if len(conf):
+            b = (conf.float() * self.bins).long().clamp_(0, self.bins - 1)
+            idx = pred_cls.long() * self.bins + b
+            self.n_pred.view(-1).index_add_(0, idx, torch.ones_like(idx))
+            self.n_tp.view(-1, self.niou).index_add_(0, idx, tp.long())
+        self.n_target.index_add_(0, target_cls.long(), torch.ones_like(target_cls, dtype=torch.long))
+        self.n_image.index_add_(0, target_img.long(), torch.ones_like(target_img, dtype=torch.long))
+
+    def merge(self, other):
+        """Add the histograms of another accumulator with the same nc, niou and bins, i.e. of another worker."""
+        assert (self.nc, self.niou, self.bins) == (other.nc, other.niou, other.bins), "incompatible accumulators"
+        for k in "n_pred", "n_tp", "n_target", "n_image":
+            getattr(self, k).add_(getattr(other, k).to(getattr(self, k).device))
+        return self
+
+    def ap_per_class(self, plot=False, on_plot=None, save_dir=Path(), names={}, eps=1e-16, prefix=""):
+        """
+        Computes the average precision per class from the histograms, see ap_per_class() for arguments and returns.
+
+        The precision-recall curve of each class has one point per non-empty confidence bin instead of one per
+        prediction, no predictions are sorted.
+        """
+        n_pred = self.n_pred.cpu().numpy()[:, ::-1]  # descending confidence
+        n_tp = self.n_tp.cpu().numpy()[:, ::-1]
+        conf = np.arange(self.bins)[::-1] / self.bins  # lower bin edges, predictions in a bin have conf >= edge
+        unique_classes = np.flatnonzero(self.n_target.cpu().numpy())  # classes that have targets
+        nt = self.n_target.cpu().numpy()[unique_classes]
+        nc = unique_classes.shape[0]
+
+        # Create Precision-Recall curve and compute AP for each class
+        x, prec_values = np.linspace(0, 1, 1000), []
+
+        # Average precision, precision and recall curves
+        ap, p_curve, r_curve = np.zeros((nc, self.niou)), np.zeros((nc, 1000)), np.zeros((nc, 1000))
+        for ci, c in enumerate(unique_classes):
+            i = n_pred[c] > 0  # non-empty bins
+            n_l = nt[ci]  # number of labels
+            if not i.any():
+                continue
+
+            # Accumulate FPs and TPs
+            tpc = n_tp[c].cumsum(0)
+            fpc = (n_pred[c].cumsum(0)[:, None] - tpc)[i]
+            tpc = tpc[i]
+
+            # Recall
+            recall = tpc / (n_l + eps)  # recall curve
+            r_curve[ci] = np.interp(-x, -conf[i], recall[:, 0], left=0)  # negative x, xp because xp decreases
+
+            # Precision
+            precision = tpc / (tpc + fpc)  # precision curve
+            p_curve[ci] = np.interp(-x, -conf[i], precision[:, 0], left=1)  # p at pr_score
+
+            # AP from recall-precision curve
+            for j in range(self.niou):
+                ap[ci, j], mpre, mrec = compute_ap(recall[:, j], precision[:, j])
+                if j == 0:
+                    prec_values.append(np.interp(x, mrec, mpre))  # precision at mAP@0.5
+
+        return _ap_per_class_results(
+            ap, p_curve, r_curve, prec_values, x, unique_classes, nt, plot, on_plot, save_dir, names, eps, prefix
+        )
+
+
 class Metric(SimpleClass):
     """
     Class for computing evaluation metrics for YOLOv8 model.
@@ -848,6 +962,14 @@ class DetMetrics(SimpleClass):
         self.box.nc = len(self.names)
         self.box.update(results)
 
+    def process_binned(self, accumulator):
+        """Update metrics from the confidence histograms of an APAccumulator instead of per-prediction arrays."""
+        results = accumulator.ap_per_class(
+            plot=self.plot, save_dir=self.save_dir, names=self.names, on_plot=self.on_plot
+        )[2:]
+        self.box.nc = len(self.names)
+        self.box.update(results)
+
     @property
     def keys(self):
         """Returns a list of keys for accessing specific metrics."""
@@ -1246,6 +1368,14 @@ class OBBMetrics(SimpleClass):
         self.box.nc = len(self.names)
         self.box.update(results)
 
+    def process_binned(self, accumulator):
+        """Update metrics from the confidence histograms of an APAccumulator instead of per-prediction arrays."""
+        results = accumulator.ap_per_class(
+            plot=self.plot, save_dir=self.save_dir, names=self.names, on_plot=self.on_plot
+        )[2:]
+        self.box.nc = len(self.names)
+        self.box.update(results)
+
     @property
     def keys(self):
         """Returns a list of keys for accessing specific metrics."""
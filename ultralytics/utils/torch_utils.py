@@ -1,11 +1,13 @@
 # Ultralytics YOLO 🚀, AGPL-3.0 license
 
 import gc
+import io
 import math
 import os
 import random
+import threading
 import time
-from contextlib import contextmanager
+from contextlib import contextmanager, suppress
 from copy import deepcopy
 from datetime import datetime
 from pathlib import Path
@@ -687,6 +689,182 @@ def profile(input, ops, n=10, device=None, max_num_obj=0):
     return results
 
 
+def copy_state_to_cpu(obj, half=False, key=None):
+    """
+    Recursively copy the tensors of a nested state, i.e. an optimizer state_dict, to new CPU tensors.
+
+    CUDA tensors are copied with non_blocking=True, synchronize the device before using the copy. Other values are
+    deep-copied, so the copy stays independent of the live state.
+
+    Args:
+        obj (Any): Tensor or nested dicts, lists and tuples containing tensors.
+        half (bool, optional): Convert float32 tensors to float16, except 'step' counters. Defaults to False.
+        key (Any, optional): Key of obj in its parent dict, used internally.
+
+    Returns:
+        (Any): Copy of obj with all tensors on CPU.
+    """
+    if isinstance(obj, torch.Tensor):
+        t = obj.detach()
+        if half and key != "step" and t.dtype is torch.float32:
+            t = t.half()
+        return t.to("cpu", non_blocking=True) if t.is_cuda else t.clone()
+    if isinstance(obj, dict):
+        return {k: copy_state_to_cpu(v, half, k) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(copy_state_to_cpu(v, half) for v in obj)
+    return deepcopy(obj)
+
+
+class _CheckpointJob:
+    """Checkpoint queued in CheckpointWriter with the files it is written to and the callbacks to run afterwards."""
+
+    def __init__(self, ckpt, files, callback, meta):
+        """Initialize job, `superseded` holds callbacks of older checkpoints whose files this job took over."""
+        self.ckpt = ckpt
+        self.files = files
+        self.callback = callback
+        self.meta = meta
+        self.superseded = []
+
+
+class CheckpointWriter:
+    """
+    Background writer that serializes and saves training checkpoints off the training loop.
+
+    Each checkpoint is serialized once with torch.save() on a worker thread, written to a temporary file, fsynced and
+    atomically renamed, so an interrupted write never leaves a truncated last.pt or best.pt. A queued checkpoint that
+    has not started yet no longer writes files that a newer checkpoint also targets, and submit() blocks while
+    `max_pending` checkpoints are queued or being written, which bounds the memory held by snapshots.
+
+    Every submitted callback runs exactly once on the worker thread, in submission order, as callback(meta, files) with
+    the files written for its own checkpoint. A checkpoint superseded by a newer one before it was written runs its
+    callback with the files it still wrote, possibly none, once the newer checkpoint is durable.
+
+    Attributes:
+        max_pending (int): Maximum number of checkpoints queued or being written at once.
+    """
+
+    def __init__(self, max_pending=2):
+        """
+        Initialize checkpoint writer, the worker thread is started on the first submit.
+
+        Args:
+            max_pending (int, optional): Maximum number of checkpoints queued or being written at once.
+        """
+        self.max_pending = max(max_pending, 1)
+        self._jobs = []
+        self._busy = False
+        self._error = None
+        self._closed = False
+        self._thread = None
+        self._cond = threading.Condition()
+
+    def submit(self, ckpt, files, callback=None, meta=None):
+        """
+        Queue a checkpoint snapshot for writing.
+
+        Args:
+            ckpt (dict): Checkpoint to serialize, must not be modified after submitting.
+            files (list): Paths the checkpoint is written to, i.e. [last.pt, best.pt].
+            callback (callable, optional): Called as callback(meta, files) on the worker thread once the files of this
+                checkpoint are written and fsynced.
+            meta (dict, optional): State of the snapshot passed to the callback, i.e. epoch and fitness.
+        """
+        files = [Path(f) for f in files]
+        job = _CheckpointJob(ckpt, files, callback, meta or {})
+        with self._cond:
+            self._raise_error()
+            jobs = []
+            for queued in self._jobs:  # superseded files of queued checkpoints
+                queued.files = [f for f in queued.files if f not in files]
+                if queued.files:
+                    jobs.append(queued)
+                else:  # fully superseded, report it once this checkpoint is durable
+                    job.superseded.extend(queued.superseded)
+                    if queued.callback:
+                        job.superseded.append((queued.callback, queued.meta, []))
+            self._jobs = jobs
+            while len(self._jobs) + self._busy >= self.max_pending:
+                self._cond.wait()
+                self._raise_error()
+            self._jobs.append(job)
+            self._closed = False
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="checkpoint_writer", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def flush(self):
+        """Block until all queued checkpoints are written, re-raising any error of the worker thread."""
+        with self._cond:
+            while self._jobs or self._busy:
+                self._cond.wait()
+            self._raise_error()
+
+    def close(self):
+        """Write all queued checkpoints and stop the worker thread."""
+        try:
+            self.flush()
+        finally:
+            with self._cond:
+                self._closed = True
+                self._cond.notify_all()
+            if self._thread is not None:
+                self._thread.join()
+                self._thread = None
+
+    def _raise_error(self):
+        """Re-raise an error of the worker thread on the calling thread."""
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _run(self):
+        """Worker loop serializing and writing queued checkpoints in order."""
+        while True:
+            with self._cond:
+                while not self._jobs and not self._closed:
+                    self._cond.wait()
+                if not self._jobs:
+                    return
+                job = self._jobs.pop(0)
+                self._busy = True
+            error = None
+            try:
+                buffer = io.BytesIO()
+                torch.save(job.ckpt, buffer)  # serialize once for all files
+                job.ckpt = None
+                data = buffer.getbuffer()
+                for f in job.files:
+                    self._write(f, data)
+                callbacks = job.superseded + ([(job.callback, job.meta, job.files)] if job.callback else [])
+                for callback, meta, files in callbacks:
+                    callback(meta, files)
+            except Exception as e:
+                error = e
+            with self._cond:
+                self._busy = False
+                self._error = self._error or error
+                self._cond.notify_all()
+
+    @staticmethod
+    def _write(f, data):
+        """Write data to a temporary file next to f, fsync it and atomically replace f."""
+        tmp = f.with_name(f".{f.name}.tmp")
+        with open(tmp, "wb") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp, f)
+        with suppress(OSError):  # persist the rename, directories can not be opened on Windows
+            fd = os.open(f.parent, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+
 class EarlyStopping:
     """Early stopping class that stops training when a specified number of epochs have passed without improvement."""
 